@@ -0,0 +1,143 @@
+# Admission control for upstream LLM calls
+# A fixed number of calls may be in flight at once. Everyone else waits in a
+# bounded priority queue - Pro users and Pro-only readings are admitted first,
+# anonymous spell generation last - so a burst degrades into queueing (and,
+# past the queue bound, a fast 503) rather than a cascade of upstream 429s.
+# Each caller (user id, or client IP when anonymous) is also capped so one
+# client can't occupy the whole pool.
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get('ADMISSION_MAX_CONCURRENCY', os.environ.get('LLM_MAX_CONCURRENCY', '32')))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '200'))
+ADMISSION_PER_CALLER_LIMIT = int(os.environ.get('ADMISSION_PER_CALLER_LIMIT', '3'))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', '30'))
+
+# Lower number = admitted sooner
+PRIORITY_PRO = 0        # paid users and Pro-only readings
+PRIORITY_MEMBER = 1     # signed-in free users
+PRIORITY_ANONYMOUS = 2  # anonymous callers (spell generation, chat, oracles)
+PRIORITY_NAMES = {PRIORITY_PRO: 'pro', PRIORITY_MEMBER: 'member', PRIORITY_ANONYMOUS: 'anonymous'}
+
+class AdmissionController:
+    """Priority-ordered, bounded admission to a fixed pool of upstream slots"""
+
+    def __init__(self, max_concurrency=ADMISSION_MAX_CONCURRENCY, max_queue=ADMISSION_MAX_QUEUE,
+                 per_caller_limit=ADMISSION_PER_CALLER_LIMIT, queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.per_caller_limit = per_caller_limit
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.queue = []  # (priority, seq, future)
+        self.sequence = itertools.count()
+        self.per_caller = {}
+        self.stats = {
+            'admitted': 0, 'queued': 0, 'rejected_queue_full': 0,
+            'rejected_caller_limit': 0, 'timed_out': 0
+        }
+        self.wait_stats = {
+            name: {'count': 0, 'wait_ms_total': 0.0, 'wait_ms_max': 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def reject(self, reason, status_code, message):
+        self.stats[reason] += 1
+        raise HTTPException(status_code=status_code, detail=message, headers={'Retry-After': '5'})
+
+    def record_wait(self, priority, started):
+        wait_ms = (time.perf_counter() - started) * 1000
+        stats = self.wait_stats[PRIORITY_NAMES[priority]]
+        stats['count'] += 1
+        stats['wait_ms_total'] += wait_ms
+        stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+
+    def hold(self, caller):
+        if caller:
+            self.per_caller[caller] = self.per_caller.get(caller, 0) + 1
+
+    def forget(self, caller):
+        if caller:
+            count = self.per_caller.get(caller, 0) - 1
+            if count > 0:
+                self.per_caller[caller] = count
+            else:
+                self.per_caller.pop(caller, None)
+
+    async def acquire(self, priority, caller):
+        """Wait for a slot; raises 429 (caller at cap) or 503 (queue full / waited too long)"""
+        if caller and self.per_caller.get(caller, 0) >= self.per_caller_limit:
+            self.reject('rejected_caller_limit', 429, 'Too many AI requests in progress - please wait for one to finish')
+
+        started = time.perf_counter()
+        self.hold(caller)
+        try:
+            if self.active < self.max_concurrency and not self.waiting:
+                self.active += 1
+            elif self.waiting >= self.max_queue:
+                self.reject('rejected_queue_full', 503, 'The spirits are busy - please try again shortly')
+            else:
+                await self.wait_for_slot(priority)
+        except BaseException:
+            self.forget(caller)
+            raise
+        self.stats['admitted'] += 1
+        self.record_wait(priority, started)
+
+    async def wait_for_slot(self, priority):
+        """Queue until release() hands this waiter a slot (already counted in active)"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.sequence), future))
+        self.waiting += 1
+        self.stats['queued'] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                return  # handed a slot just as the wait expired
+            future.cancel()
+            self.reject('timed_out', 503, 'The spirits are busy - please try again shortly')
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(None)  # pass on the slot we were just given
+            else:
+                future.cancel()
+            raise
+        finally:
+            self.waiting -= 1
+
+    def release(self, caller):
+        """Free a slot, handing it to the best-priority waiter still queued"""
+        self.forget(caller)
+        while self.queue:
+            _, _, future = heapq.heappop(self.queue)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority, caller):
+        await self.acquire(priority, caller)
+        try:
+            yield
+        finally:
+            self.release(caller)
+
+    def metrics(self):
+        return {
+            'max_concurrency': self.max_concurrency,
+            'active': self.active,
+            'queue_depth': self.waiting,
+            'max_queue': self.max_queue,
+            'per_caller_limit': self.per_caller_limit,
+            **self.stats,
+            'wait_by_priority': self.wait_stats
+        }
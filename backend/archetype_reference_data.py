@@ -1,5 +1,9 @@
 # Archetype Reference Data for Spell Generation
 # This file contains movements, deities, and cultural references for each archetype
+# Helpers that pick at random take an optional rng (a random.Random) so callers
+# can replay a draw from its seed; without one they fall back to global random.
+
+import random
 
 ARCHETYPE_REFERENCE_DATA = {
     "shigg": {
@@ -349,16 +353,16 @@ def get_archetype_data(archetype_id):
     """Get the full reference data for an archetype"""
     return ARCHETYPE_REFERENCE_DATA.get(archetype_id, {})
 
-def get_random_movements(archetype_id, count=3):
+def get_random_movements(archetype_id, count=3, rng=None):
     """Get random movements from an archetype for spell generation"""
-    import random
+    rng = rng or random
     data = ARCHETYPE_REFERENCE_DATA.get(archetype_id, {})
     movements = data.get("movements", [])
-    return random.sample(movements, min(count, len(movements)))
+    return rng.sample(movements, min(count, len(movements)))
 
-def get_bird_oracle(situation_keywords):
+def get_bird_oracle(situation_keywords, rng=None):
     """Select appropriate bird based on situation"""
-    import random
+    rng = rng or random
     # Simple keyword matching - could be made smarter
     grief_birds = ["robin", "dove", "crow"]
     joy_birds = ["zebra_finch", "cockatiel", "goldfinch"]
@@ -366,14 +370,13 @@ def get_bird_oracle(situation_keywords):
     change_birds = ["raven", "crow", "blackbird"]
     
     # Default to random selection from Parliament
-    return random.choice(list(BIRD_CORRESPONDENCES.keys()))
+    return rng.choice(list(BIRD_CORRESPONDENCES.keys()))
 
-def get_talisman_suggestion(spell_type):
+def get_talisman_suggestion(spell_type, rng=None):
     """Suggest appropriate talisman for spell type"""
-    import random
-    return random.choice(list(TALISMAN_CORRESPONDENCES.keys()))
+    return (rng or random).choice(list(TALISMAN_CORRESPONDENCES.keys()))
 
-def get_thread_color(intention):
+def get_thread_color(intention, rng=None):
     """Suggest thread color for Katherine's textile magic"""
     intention_map = {
         "protection": ["red", "black"],
@@ -386,6 +389,5 @@ def get_thread_color(intention):
         "peace": ["blue", "white"],
         "courage": ["red", "gold"]
     }
-    import random
     colors = intention_map.get(intention, list(THREAD_CORRESPONDENCES.keys()))
-    return random.choice(colors)
+    return (rng or random).choice(colors)
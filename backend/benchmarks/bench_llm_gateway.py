@@ -0,0 +1,79 @@
+"""Load test: LLMGateway against the local fake OpenAI server.
+
+Starts benchmarks/fake_openai.py in-process, then fires a burst of concurrent
+JSON completions and streams through one gateway. Prints throughput, how many
+requests actually reached the upstream at once, and the gateway's metrics.
+
+    FAKE_OPENAI_FAILURE_RATE=0.2 python backend/benchmarks/bench_llm_gateway.py --requests 200 --concurrency 16
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import uvicorn  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+
+import fake_openai  # noqa: E402
+import llm_gateway  # noqa: E402
+from admission import AdmissionController, PRIORITY_PRO, PRIORITY_ANONYMOUS  # noqa: E402
+
+MESSAGES = [
+    {'role': 'system', 'content': 'You are Shigg, the Birds of Parliament Poet Laureate.'},
+    {'role': 'user', 'content': "Seeker's situation: new job anxiety"}
+]
+
+def start_fake_server(port):
+    server = uvicorn.Server(uvicorn.Config(fake_openai.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def one_request(gateway, i):
+    # Every third caller is Pro - their queue wait should stay well below the anonymous tier's
+    priority = PRIORITY_PRO if i % 3 == 0 else PRIORITY_ANONYMOUS
+    try:
+        if i % 4 == 0:
+            return bool(''.join([delta async for delta in gateway.stream('chat', MESSAGES, priority, f'caller-{i}')]))
+        return bool(await gateway.complete_json('bird_oracle', MESSAGES, priority, f'caller-{i}'))
+    except Exception:
+        return False
+
+async def run(args):
+    client = AsyncOpenAI(api_key='fake', base_url=f'http://127.0.0.1:{args.port}/v1', max_retries=0)
+    admission = AdmissionController(max_concurrency=args.concurrency, max_queue=args.requests)
+    gateway = llm_gateway.LLMGateway(client, admission=admission, max_retries=args.retries)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one_request(gateway, i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    print(f"requests: {args.requests}  ok: {sum(results)}  failed: {args.requests - sum(results)}")
+    print(f"elapsed: {elapsed:.2f}s  throughput: {args.requests / elapsed:.1f} req/s")
+    print(f"upstream max concurrent: {fake_openai.stats['max_concurrent']} (limit {args.concurrency})")
+    print(json.dumps(gateway.metrics(), indent=2))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8056)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--retries', type=int, default=llm_gateway.LLM_MAX_RETRIES)
+    args = parser.parse_args(argv)
+    server = start_fake_server(args.port)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
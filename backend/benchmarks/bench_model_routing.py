@@ -0,0 +1,172 @@
+"""Compare models per feature against recorded replies, offline.
+
+Replays benchmarks/fixtures/model_replies.json and prints, per feature and
+model, reply latency (p50/p95), how often the reply parsed as JSON straight
+away / only after truncation repair / not at all, and how often it had every
+field the frontend renders. A routing summary then shows, for each feature's
+configured model and timeout (llm_gateway.ROUTED_PROFILES), how many recorded
+calls would have fallen back.
+
+    python backend/benchmarks/bench_model_routing.py
+    LLM_MODEL_BIRD_ORACLE=gpt-4o python backend/benchmarks/bench_model_routing.py
+
+The checked-in fixture is synthetic: hand-written replies (a few deliberately
+truncated or missing fields) with no latencies. Against it the benchmark only
+shows how the parser and field checks treat those replies - it omits the
+latency columns and the routing summary, and its rates say nothing about any
+model. Record real replies before comparing models (costs tokens):
+
+    OPENAI_API_KEY=... python backend/benchmarks/bench_model_routing.py --record --models gpt-4o gpt-4o-mini --repeat 5
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import llm_gateway  # noqa: E402
+from llm_json import parse_json_reply  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'model_replies.json'
+
+# Top-level fields each feature's page reads from the reply
+REQUIRED_FIELDS = {
+    'bird_oracle': ('greeting', 'birds', 'poetic_reflection', 'closing'),
+    'corrie_tarot': ('greeting', 'reading', 'closing'),
+    'cobbles_quick_draw': ('greeting', 'cards', 'closing'),
+    'cobbles_oracle': ('greeting', 'cards', 'synthesis', 'closing'),
+    'ward_finder': ('greeting', 'wards', 'closing'),
+    'spell': ('tarot_card', 'title', 'introduction', 'materials', 'steps', 'spoken_words', 'closing_message')
+}
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+def check_reply(feature, content):
+    """'valid' / 'repaired' / 'invalid', and whether every required field is present"""
+    try:
+        data, repaired = parse_json_reply(content)
+    except ValueError:
+        return 'invalid', False
+    complete = all(data.get(field) for field in REQUIRED_FIELDS.get(feature, ()))
+    return ('repaired' if repaired else 'valid'), complete
+
+def summarize(replies):
+    """Per (feature, model): latency percentiles and JSON validity rates"""
+    groups = {}
+    for reply in replies:
+        groups.setdefault((reply['feature'], reply['model']), []).append(reply)
+
+    rows = []
+    for (feature, model), group in sorted(groups.items()):
+        outcomes = [check_reply(feature, reply['content']) for reply in group]
+        latencies = [reply['latency_ms'] for reply in group if 'latency_ms' in reply]
+        count = len(group)
+        rows.append({
+            'feature': feature,
+            'model': model,
+            'replies': count,
+            'p50_ms': percentile(latencies, 0.5) if latencies else None,
+            'p95_ms': percentile(latencies, 0.95) if latencies else None,
+            'valid': sum(status == 'valid' for status, _ in outcomes) / count,
+            'repaired': sum(status == 'repaired' for status, _ in outcomes) / count,
+            'invalid': sum(status == 'invalid' for status, _ in outcomes) / count,
+            'complete': sum(complete for _, complete in outcomes) / count
+        })
+    return rows
+
+def routing_summary(replies, profiles):
+    """For each routed feature: share of recorded primary-model calls over its timeout"""
+    rows = []
+    for feature, profile in profiles.items():
+        latencies = [reply['latency_ms'] for reply in replies
+                     if reply['feature'] == feature and reply['model'] == profile['model'] and 'latency_ms' in reply]
+        if not latencies:
+            continue
+        timeout_ms = profile['timeout'] * 1000
+        fallback = profile.get('fallback_model')
+        rows.append({
+            'feature': feature,
+            'model': profile['model'],
+            'fallback_model': fallback if fallback != profile['model'] else None,
+            'timeout_s': profile['timeout'],
+            'would_fall_back': sum(latency > timeout_ms for latency in latencies) / len(latencies)
+        })
+    return rows
+
+def print_table(rows, columns):
+    widths = {column: max(len(column), *(len(format_cell(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(format_cell(row[column]).ljust(widths[column]) for column in columns))
+
+def format_cell(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.0%}' if value <= 1 else f'{value:.0f}'
+    return str(value)
+
+async def record(fixtures, models, repeat):
+    """Call the real API for every case x model and replace the recorded replies"""
+    from openai import AsyncOpenAI
+    client = AsyncOpenAI(max_retries=0)
+    replies = []
+    for case in fixtures['cases']:
+        profile = llm_gateway.FEATURE_PROFILES[case['feature']]
+        for model in models:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = await client.chat.completions.create(
+                    messages=case['messages'],
+                    timeout=profile['timeout'] * 3,
+                    **llm_gateway.chat_settings(profile, model)
+                )
+                replies.append({
+                    'feature': case['feature'],
+                    'case': case['name'],
+                    'model': model,
+                    'latency_ms': round((time.perf_counter() - started) * 1000),
+                    'finish_reason': response.choices[0].finish_reason,
+                    'content': response.choices[0].message.content
+                })
+                print(f"recorded {case['feature']}/{case['name']} on {model}: {replies[-1]['latency_ms']}ms")
+    await client.close()
+    fixtures['recorded_at'] = datetime.now(timezone.utc).isoformat()
+    fixtures['synthetic'] = False
+    fixtures['replies'] = replies
+    return fixtures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', type=Path, default=FIXTURES)
+    parser.add_argument('--record', action='store_true', help='re-record replies from the live API')
+    parser.add_argument('--models', nargs='+', default=[llm_gateway.MODEL_FULL, llm_gateway.MODEL_LIGHT])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    fixtures = json.loads(args.fixtures.read_text())
+    if args.record:
+        fixtures = asyncio.run(record(fixtures, args.models, args.repeat))
+        args.fixtures.write_text(json.dumps(fixtures, indent=2, ensure_ascii=False) + '\n')
+
+    replies = fixtures['replies']
+    if fixtures.get('synthetic'):
+        print(f"SYNTHETIC FIXTURE - {len(replies)} hand-written replies, not model output.")
+        print("Rates below only show how the parser treats them; no latencies, no routing summary.")
+        print("Re-record with --record before comparing models.\n")
+        print_table(summarize(replies), ('feature', 'model', 'replies', 'valid', 'repaired', 'invalid', 'complete'))
+        return
+    print(f"{len(replies)} recorded replies ({fixtures.get('recorded_at') or 'unknown date'})\n")
+    print_table(summarize(replies), ('feature', 'model', 'replies', 'p50_ms', 'p95_ms', 'valid', 'repaired', 'invalid', 'complete'))
+    print()
+    print_table(routing_summary(replies, llm_gateway.ROUTED_PROFILES), ('feature', 'model', 'fallback_model', 'timeout_s', 'would_fall_back'))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,81 @@
+"""Microbenchmark: per-request spell prompt assembly cost.
+
+Compares the compiled templates in spell_prompts against rebuilding every
+static block per request (what generate_spell used to do). Persona data is
+read straight out of server.py so the benchmark runs without the app's
+runtime dependencies.
+
+    python backend/benchmarks/bench_spell_prompts.py
+"""
+import ast
+import sys
+import timeit
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import spell_prompts  # noqa: E402
+
+CONSTANTS = ('ARCHETYPE_PERSONAS', 'DEFAULT_SYSTEM_MESSAGE', 'KATHERINE_MATERIALS', 'CATHLEEN_MATERIALS')
+
+def load_server_constants():
+    """Pull the literal persona/material tables out of server.py"""
+    tree = ast.parse((BACKEND_DIR / 'server.py').read_text())
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in CONSTANTS:
+                found[name] = ast.literal_eval(node.value)
+    return found
+
+SAMPLE_CONTEXT = {
+    'materials': ['candles', 'herbs', 'paper'],
+    'time': 'medium',
+    'experience': 'some',
+    'environment': 'apartment',
+    'style': 'vocal'
+}
+SAMPLE_DB_CONTEXT = "\nRELEVANT DEITIES FROM OUR ARCHIVE: Hecate, Brigid, The Morrigan"
+
+def rebuild_per_request(constants, archetype_id, intention):
+    """Baseline: recompile the archetype's static blocks on every call"""
+    compiled = spell_prompts.compile_spell_prompts(
+        {archetype_id: constants['ARCHETYPE_PERSONAS'][archetype_id]},
+        constants['DEFAULT_SYSTEM_MESSAGE'],
+        constants['KATHERINE_MATERIALS'],
+        constants['CATHLEEN_MATERIALS']
+    )[archetype_id]
+    hints = {key: dict(values) for key, values in spell_prompts.PERSONALIZATION_HINTS.items()}
+    parts = [f"SEEKER HAS ACCESS TO: {', '.join(SAMPLE_CONTEXT['materials'])} - prioritize using these materials"]
+    parts.extend(hints[key][SAMPLE_CONTEXT[key]] for key in hints)
+    personalization = "\n\nSEEKER PERSONALIZATION:\n" + "\n".join(parts)
+    return compiled['system'], f'Create a spell/ritual for this intention: "{intention}"{compiled["body"]}{SAMPLE_DB_CONTEXT}{personalization}{spell_prompts.SPELL_PROMPT_TAIL}'
+
+def main(number=20000):
+    constants = load_server_constants()
+    compiled = spell_prompts.compile_spell_prompts(
+        constants['ARCHETYPE_PERSONAS'],
+        constants['DEFAULT_SYSTEM_MESSAGE'],
+        constants['KATHERINE_MATERIALS'],
+        constants['CATHLEEN_MATERIALS']
+    )
+    intention = "Courage to speak up at a difficult family dinner"
+
+    print(f"{'archetype':<12}{'rebuild (us)':>16}{'compiled (us)':>16}{'prompt chars':>16}")
+    for archetype_id in constants['ARCHETYPE_PERSONAS']:
+        baseline = timeit.timeit(
+            lambda: rebuild_per_request(constants, archetype_id, intention), number=number
+        )
+        fast = timeit.timeit(
+            lambda: spell_prompts.assemble_spell_prompt(
+                compiled[archetype_id], intention, SAMPLE_DB_CONTEXT, SAMPLE_CONTEXT
+            ),
+            number=number
+        )
+        prompt = spell_prompts.assemble_spell_prompt(compiled[archetype_id], intention, SAMPLE_DB_CONTEXT, SAMPLE_CONTEXT)
+        print(f"{archetype_id:<12}{baseline / number * 1e6:>16.2f}{fast / number * 1e6:>16.2f}{len(prompt):>16}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Minimal stand-in for the OpenAI API, for exercising llm_gateway offline.
+
+Serves /v1/chat/completions (plain and streamed) and /v1/images/generations
+with a configurable delay and a configurable share of 429/500 failures:
+
+    FAKE_OPENAI_LATENCY_MS=300 FAKE_OPENAI_FAILURE_RATE=0.1 \\
+        python backend/benchmarks/fake_openai.py --port 8055
+    OPENAI_BASE_URL=http://127.0.0.1:8055/v1 uvicorn server:app ...
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.environ.get('FAKE_OPENAI_LATENCY_MS', '300'))
+FAILURE_RATE = float(os.environ.get('FAKE_OPENAI_FAILURE_RATE', '0'))
+CHUNK_CHARS = 24
+
+REPLY = json.dumps({
+    "greeting": "Evening, love. Pull up a stool.",
+    "title": "A Small Ritual for Steady Courage",
+    "cards": [],
+    "synthesis": "Take it one step at a time.",
+    "closing": "Ta-ra for now."
+}, indent=2)
+# 1x1 transparent PNG
+PIXEL_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+
+app = FastAPI()
+stats = {'requests': 0, 'failures': 0, 'max_concurrent': 0, 'concurrent': 0}
+
+def usage_for(body):
+    prompt_chars = sum(len(message.get('content') or '') for message in body.get('messages', []))
+    prompt_tokens = prompt_chars // 4 + 1
+    completion_tokens = len(REPLY) // 4 + 1
+    return {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens, 'total_tokens': prompt_tokens + completion_tokens}
+
+def maybe_fail():
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        stats['failures'] += 1
+        if random.random() < 0.5:
+            return JSONResponse({'error': {'message': 'Rate limit reached', 'type': 'requests'}}, status_code=429, headers={'retry-after': '0'})
+        return JSONResponse({'error': {'message': 'The server had an error', 'type': 'server_error'}}, status_code=500)
+    return None
+
+@app.middleware('http')
+async def track_concurrency(request: Request, call_next):
+    stats['requests'] += 1
+    stats['concurrent'] += 1
+    stats['max_concurrent'] = max(stats['max_concurrent'], stats['concurrent'])
+    try:
+        return await call_next(request)
+    finally:
+        stats['concurrent'] -= 1
+
+@app.post('/v1/chat/completions')
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(LATENCY_MS / 1000)
+    failure = maybe_fail()
+    if failure:
+        return failure
+
+    completion_id = f'chatcmpl-{uuid.uuid4().hex[:12]}'
+    created = int(time.time())
+    model = body.get('model', 'gpt-4o')
+
+    if not body.get('stream'):
+        return {
+            'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': REPLY}, 'finish_reason': 'stop'}],
+            'usage': usage_for(body)
+        }
+
+    async def events():
+        base = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model}
+        for start in range(0, len(REPLY), CHUNK_CHARS):
+            chunk = {**base, 'choices': [{'index': 0, 'delta': {'content': REPLY[start:start + CHUNK_CHARS]}, 'finish_reason': None}]}
+            yield f'data: {json.dumps(chunk)}\n\n'
+            await asyncio.sleep(0)
+        yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+        if (body.get('stream_options') or {}).get('include_usage'):
+            yield f"data: {json.dumps({**base, 'choices': [], 'usage': usage_for(body)})}\n\n"
+        yield 'data: [DONE]\n\n'
+
+    return StreamingResponse(events(), media_type='text/event-stream')
+
+@app.post('/v1/images/generations')
+async def image_generations(request: Request):
+    await request.json()
+    await asyncio.sleep(LATENCY_MS / 1000)
+    failure = maybe_fail()
+    if failure:
+        return failure
+    return {'created': int(time.time()), 'data': [{'b64_json': PIXEL_B64}]}
+
+@app.get('/stats')
+async def get_stats():
+    return stats
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8055)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,154 @@
+# Content-addressed blob store for generated images
+# A DALL-E PNG is ~1.8MB as base64 - kept inline, every grimoire listing hauled
+# all of them out of Mongo. Image bytes live here instead, keyed by their
+# sha256 so the same image saved twice is stored once; documents keep only the
+# key and the API serves /api/images/{key} with a long, immutable cache
+# lifetime (the key can never point at different bytes).
+#
+# Files sit on local disk under BLOB_STORE_DIR, fanned out by key prefix. The
+# interface (put/get/path by key) is what an S3-compatible bucket would need,
+# so the backing store can be swapped without touching callers. Functions here
+# block on disk I/O - call them through asyncio.to_thread from handlers.
+#
+# Uploaded images are capped at BLOB_MAX_IMAGE_BYTES (checked on the base64
+# length, before decoding) and must be PNG/JPEG/WebP/GIF. Deleting a spell
+# doesn't delete its blobs - another spell may share them - so sweep_blobs()
+# removes whatever no document references any more. A blob is kept for at
+# least BLOB_SWEEP_GRACE_SECONDS after it was last written or re-saved, which
+# covers a save whose blob is on disk before its document is.
+
+import os
+import re
+import time
+import base64
+import hashlib
+import tempfile
+from pathlib import Path
+
+BLOB_STORE_DIR = Path(os.environ.get('BLOB_STORE_DIR', Path(__file__).parent / 'blobs'))
+BLOB_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+BLOB_MAX_IMAGE_BYTES = int(os.environ.get('BLOB_MAX_IMAGE_BYTES', str(8 * 1024 * 1024)))
+BLOB_SWEEP_GRACE_SECONDS = float(os.environ.get('BLOB_SWEEP_GRACE_SECONDS', str(24 * 3600)))
+
+# Leading bytes -> media type for the formats we store (WebP is RIFF....WEBP)
+MEDIA_TYPES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF8', 'image/gif')
+)
+UNKNOWN_MEDIA_TYPE = 'application/octet-stream'
+
+blob_stats = {
+    'puts': 0, 'deduplicated': 0, 'bytes_written': 0, 'reads': 0, 'misses': 0,
+    'rejected': 0, 'swept': 0, 'bytes_swept': 0
+}
+
+class BlobTooLarge(ValueError):
+    """An upload over BLOB_MAX_IMAGE_BYTES"""
+
+def blob_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+def is_blob_key(key):
+    return bool(key) and bool(BLOB_KEY_PATTERN.match(key))
+
+def blob_path(key):
+    """Where key's bytes live - ab/cd/abcd... keeps directories small"""
+    return BLOB_STORE_DIR / key[:2] / key[2:4] / key
+
+def media_type(data):
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'image/webp'
+    for magic, kind in MEDIA_TYPES:
+        if data.startswith(magic):
+            return kind
+    return UNKNOWN_MEDIA_TYPE
+
+def put_blob(data):
+    """Store bytes under their content hash (once) and return the key"""
+    key = blob_key(data)
+    path = blob_path(key)
+    blob_stats['puts'] += 1
+    if path.exists():
+        blob_stats['deduplicated'] += 1
+        try:
+            # Re-saved - restart its grace period so a sweep can't remove it under the new document
+            os.utime(path)
+            return key
+        except FileNotFoundError:
+            pass  # swept just now - write it again
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a reader never sees a half-written file
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    blob_stats['bytes_written'] += len(data)
+    return key
+
+def put_base64_blob(encoded, max_bytes=BLOB_MAX_IMAGE_BYTES):
+    """Store a base64 image (as the image API returns it) and return the key.
+
+    Raises BlobTooLarge over max_bytes (None for no cap), ValueError if it isn't base64 or an image.
+    """
+    # Every 4 base64 characters decode to 3 bytes - refuse before allocating the decoded copy
+    if max_bytes is not None and len(encoded) > 4 * -(-max_bytes // 3) + 4:
+        blob_stats['rejected'] += 1
+        raise BlobTooLarge(f'Image over {max_bytes} bytes')
+    data = base64.b64decode(encoded, validate=True)
+    if max_bytes is not None and len(data) > max_bytes:
+        blob_stats['rejected'] += 1
+        raise BlobTooLarge(f'Image over {max_bytes} bytes')
+    if media_type(data) == UNKNOWN_MEDIA_TYPE:
+        blob_stats['rejected'] += 1
+        raise ValueError('Not a PNG, JPEG, WebP or GIF image')
+    return put_blob(data)
+
+def find_blob(key):
+    """(path, media type) for a stored blob, or None"""
+    if not is_blob_key(key):
+        return None
+    path = blob_path(key)
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(16)
+    except FileNotFoundError:
+        blob_stats['misses'] += 1
+        return None
+    blob_stats['reads'] += 1
+    return path, media_type(head)
+
+def get_blob(key):
+    """The stored bytes for key, or None"""
+    found = find_blob(key)
+    return found[0].read_bytes() if found else None
+
+def sweep_blobs(referenced, grace_seconds=BLOB_SWEEP_GRACE_SECONDS):
+    """Delete stored blobs whose key isn't in referenced and that are past their grace period"""
+    cutoff = time.time() - grace_seconds
+    swept = 0
+    for path in BLOB_STORE_DIR.glob('*/*/*'):
+        if not is_blob_key(path.name) or path.name in referenced:
+            continue
+        try:
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        swept += 1
+        blob_stats['swept'] += 1
+        blob_stats['bytes_swept'] += stat.st_size
+    return swept
+
+def image_url(key):
+    """Public URL path for a stored image"""
+    return f'/api/images/{key}' if key else None
+
+def get_blob_store_metrics():
+    return {'directory': str(BLOB_STORE_DIR), **blob_stats}
@@ -1,6 +1,8 @@
 # Cathleen's Signature Spells - The Keeper of Secrets & Weaver of Voice
 # These sample spells demonstrate Cathleen's unique voice-magic, Morrigan-aligned, talisman-focused approach
 
+from seed_sync import sync_seed
+
 CATHLEEN_SAMPLE_SPELLS = [
     {
         "id": "cathleen-silver-ward",
@@ -302,16 +304,9 @@ CATHLEEN_SAMPLE_SPELLS = [
 ]
 
 # Function to seed Cathleen's sample spells into the database
-async def seed_cathleen_spells(db):
-    """Seed Cathleen's sample spells into the database"""
-    collection = db.sample_spells
-    
-    # Remove existing Cathleen spells
-    await collection.delete_many({"archetype_id": "kathleen"})
-    
-    # Insert new spells
-    for spell in CATHLEEN_SAMPLE_SPELLS:
-        await collection.insert_one(spell)
+async def seed_cathleen_spells(db, force=False):
+    """Seed Cathleen's sample spells into the database (upserted in bulk; a no-op if unchanged)"""
+    result = await sync_seed(db, 'sample_spells', CATHLEEN_SAMPLE_SPELLS, scope={"archetype_id": "kathleen"}, name="sample_spells:kathleen", force=force)
     
     print(f"Seeded {len(CATHLEEN_SAMPLE_SPELLS)} Cathleen sample spells")
-    return len(CATHLEEN_SAMPLE_SPELLS)
+    return result
@@ -0,0 +1,160 @@
+# Persisted multi-turn sessions for the persona chat
+# Mongo holds the durable copy (expired by a TTL index on updated_at); a small
+# in-process cache keeps active conversations from round-tripping on every turn.
+# History sent to OpenAI is trimmed to a token budget, with older turns folded
+# into a short running summary so long chats stay bounded in cost and latency.
+#
+# Every append bumps the session's version. A cached copy is only ever replaced
+# by a newer version, so exchanges that finish out of order can't leave an
+# older history cached, and entries expire after CHAT_SESSION_CACHE_TTL_SECONDS
+# so turns another worker appended show up within that window.
+
+import os
+import logging
+from datetime import datetime, timezone
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+from token_budget import count_tokens
+
+CHAT_SESSION_TTL_SECONDS = int(os.environ.get('CHAT_SESSION_TTL_SECONDS', str(7 * 24 * 3600)))
+CHAT_SESSION_CACHE_SIZE = int(os.environ.get('CHAT_SESSION_CACHE_SIZE', '2000'))
+CHAT_SESSION_CACHE_TTL_SECONDS = float(os.environ.get('CHAT_SESSION_CACHE_TTL_SECONDS', '15'))
+CHAT_SESSION_MAX_TURNS = int(os.environ.get('CHAT_SESSION_MAX_TURNS', '40'))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET', '3000'))
+CHAT_SUMMARY_MAX_CHARS = 1200
+SUMMARY_SNIPPET_CHARS = 160
+SUMMARY_FOLD_ATTEMPTS = 5
+
+session_cache = TTLCache(maxsize=CHAT_SESSION_CACHE_SIZE, ttl=CHAT_SESSION_CACHE_TTL_SECONDS)
+
+def _cache_session(session_id, session):
+    """Cache a session snapshot unless a newer version is already cached"""
+    cached = session_cache.get(session_id)
+    if cached is None or session['version'] > cached['version']:
+        session_cache[session_id] = session
+        return session
+    return cached
+
+async def load_chat_session(db, session_id):
+    """Return {'turns': [...], 'summary': str, 'version': int} for a session, empty if new"""
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached
+
+    doc = await db.chat_sessions.find_one(
+        {'session_id': session_id},
+        {'_id': 0, 'turns': 1, 'summary': 1, 'version': 1}
+    )
+    doc = doc or {}
+    return _cache_session(session_id, {
+        'turns': doc.get('turns', []),
+        'summary': doc.get('summary', ''),
+        'version': doc.get('version', 0)
+    })
+
+def _snippet(text):
+    """First sentence of a turn, clipped for the running summary"""
+    text = ' '.join(text.split())
+    for end in ('. ', '? ', '! '):
+        idx = text.find(end)
+        if 0 < idx < SUMMARY_SNIPPET_CHARS:
+            return text[:idx + 1]
+    if len(text) > SUMMARY_SNIPPET_CHARS:
+        return text[:SUMMARY_SNIPPET_CHARS].rstrip() + '…'
+    return text
+
+def summarise_turns(summary, turns):
+    """Fold turns that no longer fit into the running summary"""
+    lines = [
+        f"{'Seeker' if turn['role'] == 'user' else 'Guide'}: {_snippet(turn['content'])}"
+        for turn in turns
+    ]
+    combined = '\n'.join(part for part in [summary] + lines if part)
+    if len(combined) > CHAT_SUMMARY_MAX_CHARS:
+        # Keep the most recent lines; the oldest context matters least
+        combined = combined[-CHAT_SUMMARY_MAX_CHARS:]
+        newline = combined.find('\n')
+        if newline != -1:
+            combined = combined[newline + 1:]
+    return combined
+
+def build_chat_messages(system_message, session, user_message, token_budget=CHAT_HISTORY_TOKEN_BUDGET):
+    """Assemble the OpenAI messages for the next turn within the history budget"""
+    turns = session['turns']
+    kept = []
+    used = 0
+    for turn in reversed(turns):
+        cost = count_tokens(turn['content'])
+        if used + cost > token_budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+
+    summary = session['summary']
+    dropped = turns[:len(turns) - len(kept)]
+    if dropped:
+        summary = summarise_turns(summary, dropped)
+
+    messages = [{'role': 'system', 'content': system_message}]
+    if summary:
+        messages.append({
+            'role': 'system',
+            'content': f"Earlier in this conversation (summary):\n{summary}"
+        })
+    messages.extend({'role': turn['role'], 'content': turn['content']} for turn in kept)
+    messages.append({'role': 'user', 'content': user_message})
+    return messages
+
+async def append_chat_turns(db, session_id, archetype, user_message, reply):
+    """Record one exchange, capping stored turns and refreshing the expiry"""
+    exchange = [
+        {'role': 'user', 'content': user_message},
+        {'role': 'assistant', 'content': reply}
+    ]
+    # Appended and capped in one atomic update so concurrent exchanges on the
+    # same session (two tabs, a retried request) can't overwrite each other.
+    # The document as it was just before this push says exactly which turns
+    # the cap pushed out; with this exchange added it is the stored document
+    # as of this version.
+    current_time = datetime.now(timezone.utc)
+    before = await db.chat_sessions.find_one_and_update(
+        {'session_id': session_id},
+        {
+            '$push': {'turns': {'$each': exchange, '$slice': -CHAT_SESSION_MAX_TURNS}},
+            '$set': {'archetype': archetype, 'updated_at': current_time},
+            '$inc': {'version': 1},
+            '$setOnInsert': {'created_at': current_time, 'summary': ''}
+        },
+        projection={'_id': 0, 'turns': 1, 'summary': 1, 'version': 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    ) or {}
+    turns = before.get('turns', []) + exchange
+    dropped = turns[:-CHAT_SESSION_MAX_TURNS]
+    turns = turns[-CHAT_SESSION_MAX_TURNS:]
+    summary = before.get('summary', '')
+    version = before.get('version', 0) + 1
+
+    if dropped:
+        summary = await _fold_into_summary(db, session_id, summary, dropped)
+
+    _cache_session(session_id, {'turns': turns, 'summary': summary, 'version': version})
+
+async def _fold_into_summary(db, session_id, summary, dropped):
+    """Add dropped turns to the stored summary, retrying if another exchange folded first"""
+    for _ in range(SUMMARY_FOLD_ATTEMPTS):
+        folded = summarise_turns(summary, dropped)
+        written = await db.chat_sessions.update_one(
+            {'session_id': session_id, 'summary': summary},
+            {'$set': {'summary': folded}}
+        )
+        if written.matched_count:
+            return folded
+        doc = await db.chat_sessions.find_one({'session_id': session_id}, {'_id': 0, 'summary': 1})
+        if doc is None:
+            # Expired or deleted meanwhile - nothing left to summarise into
+            return summary
+        summary = doc.get('summary', '')
+    logging.error(f'Chat session {session_id}: summary fold kept racing, {len(dropped)} turns not summarised')
+    return summary
@@ -1,6 +1,11 @@
 # The Cobbles Oracle - 78-Card Corrie Tarot Deck
 # A tarot-style oracle system for Shigg's "What Would Corrie Do?" feature
 
+import re
+import random
+import secrets
+from types import MappingProxyType
+
 COBBLES_ORACLE_DECK = {
     "deck_name": "The Cobbles Oracle",
     "tone": "pub-cheeky, warm, straight-talking",
@@ -875,6 +880,101 @@ CARD_ROUTING_RULES = {
     }
 }
 
+# Situation routing - every trigger and topic keyword compiled into one regex at
+# import, so matching is a single pass over the situation however many rules exist
+SAFETY_TOPIC = "safety"
+APOSTROPHES = str.maketrans({"\u2019": "'", "\u2018": "'", "\u02bc": "'"})
+
+def _build_keyword_index():
+    """Map each keyword to the topics it votes for"""
+    index = {}
+    for keyword in CARD_ROUTING_RULES["safety_triggers"]["keywords"]:
+        index.setdefault(keyword, []).append(SAFETY_TOPIC)
+    for topic, rules in CARD_ROUTING_RULES["topic_routing"].items():
+        for keyword in rules["keywords"]:
+            index.setdefault(keyword, []).append(topic)
+    return MappingProxyType({keyword: tuple(topics) for keyword, topics in index.items()})
+
+KEYWORD_TOPICS = _build_keyword_index()
+
+# Longest keywords first so "hot and cold" wins over any shorter overlap.
+# Keywords are stems - "abuse" also catches "abuser"/"abused", "danger" catches
+# "dangerous", "panic" catches "panicking" - except the shortest ones, which only
+# take a plural/possessive so "ex" doesn't fire on "exam" or "excited"
+STEM_MIN_LENGTH = 3
+
+def _keyword_alternation(keywords):
+    return "|".join(
+        re.escape(keyword).replace(r"\ ", r"\s+")
+        for keyword in sorted(keywords, key=len, reverse=True)
+    )
+
+ROUTING_PATTERN = re.compile(
+    r"\b(?:(" + _keyword_alternation(k for k in KEYWORD_TOPICS if len(k) >= STEM_MIN_LENGTH) + r")\w*"
+    r"|(" + _keyword_alternation(k for k in KEYWORD_TOPICS if len(k) < STEM_MIN_LENGTH) + r")(?:'s|es|s)?\b)"
+)
+
+def route_situation(situation):
+    """Match a situation in one pass -> {"safety": bool, "topics": [(topic, score), ...]} best-first"""
+    text = situation.lower().translate(APOSTROPHES)
+    scores = {}
+    safety = False
+    for match in ROUTING_PATTERN.finditer(text):
+        keyword = " ".join((match.group(1) or match.group(2)).split())
+        # Multi-word phrases are more specific, so each hit scores a point per word
+        weight = keyword.count(" ") + 1
+        for topic in KEYWORD_TOPICS[keyword]:
+            if topic == SAFETY_TOPIC:
+                safety = True
+            else:
+                scores[topic] = scores.get(topic, 0) + weight
+    # Ties keep rule order, matching the old first-match-wins behaviour
+    order = {topic: i for i, topic in enumerate(CARD_ROUTING_RULES["topic_routing"])}
+    topics = sorted(scores.items(), key=lambda item: (-item[1], order[item[0]]))
+    return {"safety": safety, "topics": topics}
+
+def select_routed_cards(routing, num_cards):
+    """Pick card ids for a routed situation, sharing the spread across matched topics by score"""
+    if routing["safety"]:
+        return list(CARD_ROUTING_RULES["safety_triggers"]["priority_cards"][:num_cards])
+    topics = routing["topics"]
+    if not topics:
+        return []
+
+    rules = CARD_ROUTING_RULES["topic_routing"]
+    total = sum(score for _, score in topics)
+    selected = []
+    for topic, score in topics:
+        share = max(1, round(num_cards * score / total))
+        selected.extend([cid for cid in rules[topic]["primary_cards"] if cid not in selected][:share])
+    # Top up from the strongest topics if the weighted shares came up short
+    for key in ("primary_cards", "secondary_cards"):
+        for topic, _ in topics:
+            selected.extend(cid for cid in rules[topic][key] if cid not in selected)
+    return selected[:num_cards]
+
+def make_draw_rng(seed=None):
+    """Return (seed, rng) for a reading; replaying the same seed replays the draw"""
+    if seed is None:
+        seed = secrets.randbits(32)
+    return seed, random.Random(seed)
+
+def draw_cards(routing, num_cards, rng):
+    """Draw a spread's cards: routed cards first, then random fill - never mutates the deck"""
+    selected_card_ids = select_routed_cards(routing, num_cards)
+
+    # If no specific routing, use Major Arcana for variety
+    if not selected_card_ids:
+        selected_card_ids = [card["id"] for card in rng.sample(_MAJOR_ARCANA, num_cards)]
+
+    # Ensure no duplicates, then pad with random cards if needed
+    selected_card_ids = list(dict.fromkeys(selected_card_ids))[:num_cards]
+    if len(selected_card_ids) < num_cards:
+        remaining = [card["id"] for card in _ALL_CARDS if card["id"] not in selected_card_ids]
+        selected_card_ids.extend(rng.sample(remaining, num_cards - len(selected_card_ids)))
+
+    return [CARDS_BY_ID[cid] for cid in selected_card_ids if cid in CARDS_BY_ID]
+
 # Spread definitions
 ORACLE_SPREADS = {
     "one_card": {
@@ -915,43 +1015,146 @@ ORACLE_SPREADS = {
     }
 }
 
+# Deck indexes - built once at import so lookups don't rebuild or scan the deck
+MINOR_SUITS = ("pints", "sparks", "keys", "pennies")
+
+_MAJOR_ARCANA = tuple(COBBLES_ORACLE_DECK["major_arcana"])
+_MINOR_ARCANA = tuple(card for suit in MINOR_SUITS for card in COBBLES_ORACLE_DECK[suit])
+_ALL_CARDS = _MAJOR_ARCANA + _MINOR_ARCANA
+
+CARDS_BY_ID = MappingProxyType({card["id"]: card for card in _ALL_CARDS})
+CARDS_BY_SUIT = MappingProxyType({
+    **{suit: tuple(COBBLES_ORACLE_DECK[suit]) for suit in MINOR_SUITS},
+    "major": _MAJOR_ARCANA
+})
+
 def get_all_cards():
-    """Return all 78 cards as a flat list"""
-    all_cards = []
-    all_cards.extend(COBBLES_ORACLE_DECK["major_arcana"])
-    all_cards.extend(COBBLES_ORACLE_DECK["pints"])
-    all_cards.extend(COBBLES_ORACLE_DECK["sparks"])
-    all_cards.extend(COBBLES_ORACLE_DECK["keys"])
-    all_cards.extend(COBBLES_ORACLE_DECK["pennies"])
-    return all_cards
+    """Return all 78 cards as a flat tuple"""
+    return _ALL_CARDS
 
 def get_card_by_id(card_id):
     """Get a specific card by its ID"""
-    for card in get_all_cards():
-        if card["id"] == card_id:
-            return card
-    return None
+    return CARDS_BY_ID.get(card_id)
 
 def get_cards_by_suit(suit):
     """Get all cards from a specific suit"""
-    suit_map = {
-        "pints": COBBLES_ORACLE_DECK["pints"],
-        "sparks": COBBLES_ORACLE_DECK["sparks"],
-        "keys": COBBLES_ORACLE_DECK["keys"],
-        "pennies": COBBLES_ORACLE_DECK["pennies"],
-        "major": COBBLES_ORACLE_DECK["major_arcana"]
-    }
-    return suit_map.get(suit.lower(), [])
+    return CARDS_BY_SUIT.get(suit.lower(), ())
 
 def get_major_arcana():
     """Get all Major Arcana cards"""
-    return COBBLES_ORACLE_DECK["major_arcana"]
+    return _MAJOR_ARCANA
 
 def get_minor_arcana():
     """Get all Minor Arcana cards"""
-    minor = []
-    minor.extend(COBBLES_ORACLE_DECK["pints"])
-    minor.extend(COBBLES_ORACLE_DECK["sparks"])
-    minor.extend(COBBLES_ORACLE_DECK["keys"])
-    minor.extend(COBBLES_ORACLE_DECK["pennies"])
-    return minor
+    return _MINOR_ARCANA
+
+# Local reading engine - renders the full reading JSON from card data alone.
+# Used when the render policy in server.py keeps a reading off the LLM (Quick
+# Draw on the free tier, an overloaded worker, or an OpenAI outage). Output is
+# deterministic: the same cards and situation always read the same way.
+TOPIC_VOICES = {
+    "dating_relationships": {
+        "label": "a matter of the heart",
+        "greeting": "Come in, love, pull up a stool. Affairs of the heart have kept this street talking for sixty years, so you're in good company."
+    },
+    "boundaries_people_pleasing": {
+        "label": "a boundary that needs drawing",
+        "greeting": "Sit yourself down. You've been giving and giving, and the Cobbles reckon it's your turn to be looked after."
+    },
+    "work_career": {
+        "label": "a work situation",
+        "greeting": "Right, let's talk shop. Every factory floor on this street has seen a bit of bother, and every one of them has a lesson in it."
+    },
+    "money_stability": {
+        "label": "pennies and stability",
+        "greeting": "Put the kettle on. Money worries feel heavy, but the street's survived leaner times than this and so will you."
+    },
+    "family": {
+        "label": "family business",
+        "greeting": "Ah, family. Nobody knows how to press your buttons like the ones who installed them. Let's see what the Cobbles say."
+    },
+    "anxiety_overwhelm": {
+        "label": "an overwhelmed mind",
+        "greeting": "Deep breath, petal. Your head's been busy, so let's slow it all down to one card and one clear thought."
+    },
+    "gossip_reputation": {
+        "label": "what people are saying",
+        "greeting": "The Kabin's always buzzing, isn't it? Let's sort what's true from what's just tittle-tattle."
+    },
+    "grief_endings": {
+        "label": "an ending and what it leaves behind",
+        "greeting": "Come here, love. Endings are hard on everyone, and the street knows how to hold a loss gently."
+    },
+    "reinvention_confidence": {
+        "label": "a fresh start",
+        "greeting": "Ooh, a new chapter. The Cobbles love a comeback, and this one's got your name on it."
+    },
+    "revenge_anger": {
+        "label": "anger that needs somewhere to go",
+        "greeting": "I can feel the steam from here. Let's put that fire to work before it burns the wrong bridge."
+    }
+}
+DEFAULT_VOICE = {
+    "label": "what's on your mind",
+    "greeting": "Evening, love. Pull up a stool at the Rovers and let's see what the Cobbles have to say."
+}
+SAFETY_VOICE = {
+    "label": "your safety",
+    "greeting": "I'm really glad you reached out. Before anything else, your safety comes first, so let's take this gently."
+}
+LOCAL_CLOSINGS = (
+    "Off you go, then. Chin up, kettle on, and be kind to yourself.",
+    "The street's got your back. Come back and tell us how it goes.",
+    "That's your lot from the Cobbles today. Go gently, you're doing better than you think.",
+    "Ta-ra for now, love. One small step is still a step."
+)
+
+def _card_summary(card):
+    summary = {key: card[key] for key in ("id", "name", "symbol", "arcana")}
+    if card.get("suit"):
+        summary["suit"] = card["suit"]
+    return summary
+
+def render_local_reading(spread, cards, routing=None):
+    """Build a complete Cobbles Oracle reading from card data, without the LLM"""
+    routing = routing or {"safety": False, "topics": []}
+    if routing["safety"]:
+        voice = SAFETY_VOICE
+    elif routing["topics"]:
+        voice = TOPIC_VOICES.get(routing["topics"][0][0], DEFAULT_VOICE)
+    else:
+        voice = DEFAULT_VOICE
+
+    positions = spread["positions"]
+    readings = []
+    for i, card in enumerate(cards):
+        position = positions[i] if i < len(positions) else f"Card {i+1}"
+        readings.append({
+            "position": position,
+            "card": _card_summary(card),
+            "core_message": card["core"],
+            "wwcd_advice": list(card["advice"]),
+            "because_they": f"{card['name']} turned up for {voice['label']} because they know this one from experience: {card['core'][0].lower()}{card['core'][1:]}",
+            "shadow_to_avoid": card["shadow"],
+            "blessing": card["blessing"],
+            "next_step_today": card["advice"][0],
+            "corrie_charm": card["charm"],
+            "rovers_return_line": f"\"{card['mantra']}\""
+        })
+
+    if len(cards) > 1:
+        synthesis = (
+            f"Read together, {', '.join(card['name'] for card in cards[:-1])} and {cards[-1]['name']} "
+            f"are telling one story: {cards[0]['core']} Then, {cards[-1]['core'][0].lower()}{cards[-1]['core'][1:]}"
+        )
+    else:
+        synthesis = ""
+
+    closing = LOCAL_CLOSINGS[sum(card.get("number", 0) for card in cards) % len(LOCAL_CLOSINGS)]
+    return {
+        "greeting": voice["greeting"],
+        "spread_name": spread["name"],
+        "cards": readings,
+        "synthesis": synthesis,
+        "closing": closing
+    }
@@ -0,0 +1,159 @@
+# Declared MongoDB indexes and the checks that keep queries on them
+# Every lookup the API makes on a hot path is listed here with the index that
+# serves it. ensure_indexes() runs at startup and only creates what's missing
+# (safe on every boot and across workers); a changed TTL is migrated in place
+# with collMod, any other option change on an existing index is reported
+# rather than dropped. index_usage() compares what's declared with what exists
+# and with $indexStats so missing and unused indexes show up in
+# /api/metrics/indexes. HOT_QUERIES + find_collection_scans() let
+# tests/test_query_plans.py fail when one of those lookups falls back to a
+# collection scan.
+
+import logging
+from pymongo.errors import OperationFailure, PyMongoError
+from chat_sessions import CHAT_SESSION_TTL_SECONDS
+from grimoire_pages import PAGE_ORDER, encode_cursor, page_query
+
+UNIQUE_ID = {'keys': [('id', 1)], 'unique': True}
+
+# collection -> index specs ('keys' plus create_index options)
+REQUIRED_INDEXES = {
+    'users': [
+        UNIQUE_ID,
+        {'keys': [('email', 1)], 'unique': True}
+    ],
+    'waitlist': [{'keys': [('email', 1)], 'unique': True}],
+    'user_spells': [
+        UNIQUE_ID,
+        {'keys': [('user_id', 1)] + PAGE_ORDER}  # grimoire listing pages
+    ],
+    'user_wards': [
+        UNIQUE_ID,
+        {'keys': [('user_id', 1)] + PAGE_ORDER}
+    ],
+    'payment_transactions': [{'keys': [('session_id', 1)], 'unique': True}],
+    'sample_spells': [UNIQUE_ID, {'keys': [('archetype_id', 1)]}],  # seeding upserts by id
+    'chat_sessions': [
+        {'keys': [('session_id', 1)], 'unique': True},
+        {'keys': [('updated_at', 1)], 'expireAfterSeconds': CHAT_SESSION_TTL_SECONDS}
+    ],
+    # Reference collections - detail pages look items up by id
+    'deities': [UNIQUE_ID],
+    'historical_figures': [UNIQUE_ID],
+    'sacred_sites': [UNIQUE_ID],
+    'rituals': [UNIQUE_ID, {'keys': [('category', 1)]}],
+    'timeline_events': [{'keys': [('year', 1)]}]
+}
+
+_PROBE = 'query-plan-probe'
+_PROBE_PAGE = page_query({'user_id': _PROBE}, encode_cursor({'created_at': '2026-01-01T00:00:00+00:00', 'id': _PROBE}))
+
+# The lookups request handlers make, shaped like the real queries
+HOT_QUERIES = [
+    {'collection': 'users', 'filter': {'id': _PROBE}},
+    {'collection': 'users', 'filter': {'email': 'probe@example.com'}},
+    {'collection': 'waitlist', 'filter': {'email': 'probe@example.com'}},
+    {'collection': 'user_spells', 'filter': {'user_id': _PROBE}, 'sort': dict(PAGE_ORDER)},
+    {'collection': 'user_spells', 'filter': _PROBE_PAGE, 'sort': dict(PAGE_ORDER)},
+    {'collection': 'user_spells', 'filter': {'id': _PROBE, 'user_id': _PROBE}},
+    {'collection': 'user_wards', 'filter': {'user_id': _PROBE}, 'sort': dict(PAGE_ORDER)},
+    {'collection': 'user_wards', 'filter': _PROBE_PAGE, 'sort': dict(PAGE_ORDER)},
+    {'collection': 'user_wards', 'filter': {'id': _PROBE, 'user_id': _PROBE}},
+    {'collection': 'payment_transactions', 'filter': {'session_id': _PROBE}},
+    {'collection': 'sample_spells', 'filter': {'archetype_id': _PROBE}},
+    {'collection': 'chat_sessions', 'filter': {'session_id': _PROBE}},
+    {'collection': 'deities', 'filter': {'id': _PROBE}},
+    {'collection': 'historical_figures', 'filter': {'id': _PROBE}},
+    {'collection': 'sacred_sites', 'filter': {'id': _PROBE}},
+    {'collection': 'rituals', 'filter': {'id': _PROBE}},
+    {'collection': 'rituals', 'filter': {'category': _PROBE}},
+    {'collection': 'timeline_events', 'filter': {}, 'sort': {'year': 1}}
+]
+
+index_report = {'created': [], 'migrated': [], 'present': 0, 'failed': []}
+
+def index_key(keys):
+    """Comparable form of an index key pattern (Mongo may hand back 1.0 for 1)"""
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in keys)
+
+def index_name(keys):
+    """Mongo's default name for a key pattern"""
+    return '_'.join(f'{field}_{direction}' for field, direction in index_key(keys))
+
+async def ensure_indexes(db, declared=REQUIRED_INDEXES):
+    """Create missing indexes, migrate changed TTLs; returns (and keeps) a report"""
+    report = {'created': [], 'migrated': [], 'present': 0, 'failed': []}
+    for collection, specs in declared.items():
+        existing = {index_key(info['key']): info for info in (await db[collection].index_information()).values()}
+        for spec in specs:
+            keys = spec['keys']
+            options = {option: value for option, value in spec.items() if option != 'keys'}
+            label = f'{collection}.{index_name(keys)}'
+            current = existing.get(index_key(keys))
+            try:
+                if current is None:
+                    await db[collection].create_index(keys, **options)
+                    report['created'].append(label)
+                elif bool(current.get('unique')) != bool(options.get('unique')):
+                    # Rebuilding as unique can fail on existing duplicates - leave that to a person
+                    logging.error(f'Index {label} exists with different uniqueness; not rebuilt')
+                    report['failed'].append({'index': label, 'error': f"exists with unique={bool(current.get('unique'))}"})
+                elif current.get('expireAfterSeconds') != options.get('expireAfterSeconds'):
+                    await db.command('collMod', collection, index={
+                        'keyPattern': dict(keys), 'expireAfterSeconds': options.get('expireAfterSeconds')
+                    })
+                    report['migrated'].append(label)
+                else:
+                    report['present'] += 1
+            except PyMongoError as e:
+                logging.error(f'Index {label} not in place: {str(e)}')
+                report['failed'].append({'index': label, 'error': str(e)})
+    if report['created'] or report['migrated']:
+        logging.info(f"Indexes created: {report['created']} migrated: {report['migrated']}")
+    index_report.update(report)
+    return report
+
+async def index_usage(db, declared=REQUIRED_INDEXES):
+    """Per collection: declared indexes that are missing, and existing ones that are undeclared or unused"""
+    usage = {}
+    for collection, specs in declared.items():
+        existing = {index_key(info['key']): name for name, info in (await db[collection].index_information()).items()}
+        try:
+            # Op counts since the index was built or the server restarted
+            ops = {stats['name']: stats['accesses']['ops'] async for stats in db[collection].aggregate([{'$indexStats': {}}])}
+        except OperationFailure:
+            ops = {}
+        wanted = {index_key(spec['keys']) for spec in specs}
+        usage[collection] = {
+            'missing': [index_name(spec['keys']) for spec in specs if index_key(spec['keys']) not in existing],
+            'undeclared': [name for key, name in existing.items() if key not in wanted and name != '_id_'],
+            'unused': [name for name, count in ops.items() if count == 0 and name != '_id_'],
+            'ops': ops
+        }
+    return usage
+
+def plan_stages(plan):
+    """Every stage name in an explain plan, however deeply nested"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+async def find_collection_scans(db, queries=HOT_QUERIES):
+    """The queries whose winning plan includes a COLLSCAN"""
+    scans = []
+    for query in queries:
+        command = {'find': query['collection'], 'filter': query['filter']}
+        if query.get('sort'):
+            command['sort'] = query['sort']
+        explained = await db.command('explain', command, verbosity='queryPlanner')
+        if 'COLLSCAN' in plan_stages(explained['queryPlanner']['winningPlan']):
+            scans.append(query)
+    return scans
+
+def get_index_metrics():
+    return index_report
@@ -0,0 +1,68 @@
+# Keyset pagination for grimoire listings
+# Saved spells and wards are listed newest first, a page at a time. Instead of
+# skip/limit (which walks every skipped document) each page ends with an opaque
+# cursor naming the last (created_at, id) it served, and the next page starts
+# strictly after it - with the (user_id, created_at, id) index every page costs
+# the same however far back a seeker scrolls. id breaks ties between items
+# saved in the same instant.
+#
+# Listings carry only what a card in the list shows; the full document comes
+# from the per-item detail endpoints.
+
+import os
+import json
+import base64
+
+GRIMOIRE_PAGE_SIZE = int(os.environ.get('GRIMOIRE_PAGE_SIZE', '24'))
+GRIMOIRE_MAX_PAGE_SIZE = 100
+
+# Newest first; must match the listing index in db_indexes.py
+PAGE_ORDER = [('created_at', -1), ('id', -1)]
+
+SPELL_SUMMARY_FIELDS = {
+    '_id': 0, 'id': 1, 'title': 1, 'archetype_id': 1, 'archetype_name': 1, 'archetype_title': 1,
+    'created_at': 1, 'image_ref': 1, 'image_variants': 1
+}
+WARD_SUMMARY_FIELDS = {
+    '_id': 0, 'id': 1, 'name': 1, 'symbol': 1, 'situation': 1, 'archetype_id': 1, 'archetype_name': 1,
+    'created_at': 1, 'ward_data.name': 1, 'ward_data.symbol': 1, 'ward_data.category': 1,
+    'ward_data.meaning': 1, 'ward_data.where_to_find': 1
+}
+
+def encode_cursor(doc):
+    """Opaque cursor pointing just past doc"""
+    raw = json.dumps([doc['created_at'], doc['id']], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor; ValueError if it wasn't one of ours"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(item_id, str):
+        raise ValueError('Invalid cursor')
+    return created_at, item_id
+
+def page_query(query, cursor=None):
+    """Restrict query to items that sort after the cursor"""
+    if not cursor:
+        return query
+    created_at, item_id = decode_cursor(cursor)
+    return {
+        **query,
+        '$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, 'id': {'$lt': item_id}}
+        ]
+    }
+
+async def fetch_page(collection, query, projection, cursor=None, limit=GRIMOIRE_PAGE_SIZE):
+    """One page of a listing -> (items, next_cursor or None)"""
+    limit = max(1, min(limit, GRIMOIRE_MAX_PAGE_SIZE))
+    # One extra tells us whether another page exists without counting
+    docs = await collection.find(page_query(query, cursor), projection).sort(PAGE_ORDER).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        return docs[:limit], encode_cursor(docs[limit - 1])
+    return docs, None
@@ -0,0 +1,60 @@
+# Derived sizes/formats for stored spell images
+# The grimoire list shows each spell image as a small card header, so it gets a
+# ~320px WebP thumbnail (a few KB) instead of the 1024x1024 PNG (~1.4MB), and
+# the detail view gets a full-size WebP at a fraction of the PNG's weight.
+# Variants are ordinary blobs in the blob store, so identical output is stored
+# once and served through the same immutable /api/images/{key} route.
+#
+# Encoding is CPU-bound - derive_variants() runs on a worker thread, after the
+# save has already responded.
+
+import io
+import os
+from PIL import Image
+from blob_store import get_blob, put_blob
+
+IMAGE_THUMBNAIL_SIZE = int(os.environ.get('IMAGE_THUMBNAIL_SIZE', '320'))
+
+# name -> (longest side or None for full size, Pillow save options)
+IMAGE_VARIANTS = {
+    'thumb': (IMAGE_THUMBNAIL_SIZE, {'format': 'WEBP', 'quality': 75, 'method': 4}),
+    'webp': (None, {'format': 'WEBP', 'quality': 82, 'method': 4})
+}
+
+variant_stats = {'derived': 0, 'failed': 0, 'source_bytes': 0, 'variant_bytes': 0}
+
+def render_variants(data):
+    """Encode every variant of an image -> {name: bytes}"""
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'A' in source.getbands() else 'RGB')
+        rendered = {}
+        for name, (size, options) in IMAGE_VARIANTS.items():
+            image = source
+            if size and max(source.size) > size:
+                image = source.copy()
+                image.thumbnail((size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, **options)
+            rendered[name] = buffer.getvalue()
+    return rendered
+
+def derive_variants(image_ref):
+    """Render and store the variants of a stored image -> {name: blob key}, or None if it can't be read"""
+    data = get_blob(image_ref)
+    if data is None:
+        variant_stats['failed'] += 1
+        return None
+    try:
+        rendered = render_variants(data)
+    except (OSError, ValueError):
+        variant_stats['failed'] += 1
+        raise
+    variant_stats['derived'] += 1
+    variant_stats['source_bytes'] += len(data)
+    variant_stats['variant_bytes'] += sum(len(variant) for variant in rendered.values())
+    return {name: put_blob(variant) for name, variant in rendered.items()}
+
+def get_image_variant_metrics():
+    return {'variants': list(IMAGE_VARIANTS), **variant_stats}
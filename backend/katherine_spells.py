@@ -1,6 +1,8 @@
 # Katherine's Signature Spells - The Weaver of Hidden Knowledge
 # These sample spells demonstrate Katherine's unique craft-based, 1920s spiritualist approach
 
+from seed_sync import sync_seed
+
 KATHERINE_SAMPLE_SPELLS = [
     {
         "id": "katherine-mirror-of-truth",
@@ -311,16 +313,9 @@ KATHERINE_SAMPLE_SPELLS = [
 ]
 
 # Function to seed Katherine's sample spells into the database
-async def seed_katherine_spells(db):
-    """Seed Katherine's sample spells into the database"""
-    collection = db.sample_spells
-    
-    # Remove existing Katherine spells
-    await collection.delete_many({"archetype_id": "catherine"})
-    
-    # Insert new spells
-    for spell in KATHERINE_SAMPLE_SPELLS:
-        await collection.insert_one(spell)
+async def seed_katherine_spells(db, force=False):
+    """Seed Katherine's sample spells into the database (upserted in bulk; a no-op if unchanged)"""
+    result = await sync_seed(db, 'sample_spells', KATHERINE_SAMPLE_SPELLS, scope={"archetype_id": "catherine"}, name="sample_spells:catherine", force=force)
     
     print(f"Seeded {len(KATHERINE_SAMPLE_SPELLS)} Katherine sample spells")
-    return len(KATHERINE_SAMPLE_SPELLS)
+    return result
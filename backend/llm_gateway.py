@@ -0,0 +1,306 @@
+# Shared gateway for every OpenAI call the API makes
+# Each AI feature has a profile (model, fallback model, temperature, max_tokens,
+# timeout). Light features - the bird oracle and Cobbles Quick Draw - run on a
+# smaller, faster model; a call that times out is sent once to the profile's
+# fallback model instead of being retried on the same one. Every call is
+# admitted through the shared AdmissionController (see admission.py), so a
+# burst queues by priority instead of opening hundreds of upstream connections,
+# and 429/5xx errors (and timeouts, where there is no fallback) are retried
+# with jittered exponential backoff. Per-feature
+# token counts (reserved vs used), calls per model and latency histograms are
+# kept for /api/metrics.
+#
+# Models can be re-routed per feature without a deploy:
+#   LLM_MODEL_BIRD_ORACLE=gpt-4o LLM_FALLBACK_MODEL_SPELL=gpt-4o-mini
+# (an empty fallback disables it). Point OPENAI_BASE_URL at
+# benchmarks/fake_openai.py to exercise it offline, and compare models against
+# recorded replies with benchmarks/bench_model_routing.py.
+
+import os
+import time
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+from llm_json import parse_json_reply
+from admission import AdmissionController, PRIORITY_ANONYMOUS
+from token_budget import count_message_tokens, fit_max_tokens
+
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', '2'))
+LLM_RETRY_BASE_SECONDS = float(os.environ.get('LLM_RETRY_BASE_SECONDS', '0.5'))
+LLM_RETRY_MAX_SECONDS = 8.0
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 80000)
+
+# JSON mode - the model can only emit a single valid object (prompts must say "JSON")
+JSON_OBJECT = {'type': 'json_object'}
+
+MODEL_FULL = 'gpt-4o'
+MODEL_LIGHT = 'gpt-4o-mini'
+
+# Per-feature call settings. max_tokens is the ceiling - handlers pass a smaller
+# per-request budget from token_budget where the reply size is predictable.
+# timeout is per attempt on the primary model; when it has a fallback_model the
+# timeout is kept short enough that switching still answers in reasonable time
+FEATURE_PROFILES = {
+    'chat': {'model': MODEL_FULL, 'fallback_model': MODEL_LIGHT, 'temperature': 0.8, 'max_tokens': 2000, 'timeout': 45},
+    'spell': {'model': MODEL_FULL, 'fallback_model': MODEL_LIGHT, 'temperature': 0.8, 'max_tokens': 4000, 'timeout': 60, 'response_format': JSON_OBJECT},
+    'bird_oracle': {'model': MODEL_LIGHT, 'fallback_model': MODEL_FULL, 'temperature': 0.9, 'max_tokens': 1500, 'timeout': 20, 'response_format': JSON_OBJECT},
+    'corrie_tarot': {'model': MODEL_FULL, 'fallback_model': MODEL_LIGHT, 'temperature': 0.9, 'max_tokens': 2000, 'timeout': 45, 'response_format': JSON_OBJECT},
+    'cobbles_quick_draw': {'model': MODEL_LIGHT, 'fallback_model': MODEL_FULL, 'temperature': 0.9, 'max_tokens': 1000, 'timeout': 20, 'response_format': JSON_OBJECT},
+    'cobbles_oracle': {'model': MODEL_FULL, 'fallback_model': MODEL_LIGHT, 'temperature': 0.9, 'max_tokens': 2500, 'timeout': 45, 'response_format': JSON_OBJECT},
+    'ward_finder': {'model': MODEL_FULL, 'fallback_model': MODEL_LIGHT, 'temperature': 0.9, 'max_tokens': 2000, 'timeout': 45, 'response_format': JSON_OBJECT},
+    'spell_image': {'model': 'dall-e-3', 'size': '1024x1024', 'quality': 'standard', 'timeout': 120},
+    'image': {'model': 'dall-e-3', 'size': '1024x1024', 'quality': 'standard', 'timeout': 120}
+}
+
+def route_models(profiles, environ=os.environ):
+    """Apply LLM_MODEL_<FEATURE> / LLM_FALLBACK_MODEL_<FEATURE> overrides to the profiles"""
+    routed = {}
+    for feature, profile in profiles.items():
+        profile = dict(profile)
+        model = environ.get(f'LLM_MODEL_{feature.upper()}')
+        if model:
+            profile['model'] = model
+        fallback = environ.get(f'LLM_FALLBACK_MODEL_{feature.upper()}')
+        if fallback is not None:
+            profile['fallback_model'] = fallback or None
+        routed[feature] = profile
+    return routed
+
+ROUTED_PROFILES = route_models(FEATURE_PROFILES)
+
+IMAGE_SETTINGS = ('model', 'size', 'quality')
+CHAT_SETTINGS = ('model', 'temperature', 'max_tokens')
+
+def is_retryable(error):
+    """429s, 5xxs, timeouts and dropped connections are worth another try"""
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+def retry_delay(error, attempt):
+    """Full-jitter backoff, stretched to honour a Retry-After header"""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt)))
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, min(float(retry_after), LLM_RETRY_MAX_SECONDS))
+        except ValueError:
+            pass
+    return delay
+
+def chat_settings(profile, model=None):
+    settings = {key: profile[key] for key in CHAT_SETTINGS}
+    if model:
+        settings['model'] = model
+    if profile.get('response_format'):
+        settings['response_format'] = profile['response_format']
+    return settings
+
+class LLMGateway:
+    """Profiles, limits, retries and accounting around one AsyncOpenAI client"""
+
+    def __init__(self, client, profiles=ROUTED_PROFILES, admission=None, max_retries=LLM_MAX_RETRIES):
+        self.client = client
+        self.profiles = profiles
+        self.admission = admission or AdmissionController()
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.stats = {}
+
+    def profile(self, feature, overrides=None):
+        profile = dict(self.profiles[feature])
+        profile.update({key: value for key, value in (overrides or {}).items() if value is not None})
+        return profile
+
+    def plan(self, feature, messages, profile):
+        """Count the prompt locally and fit max_tokens under the profile ceiling and context window"""
+        prompt_tokens = count_message_tokens(messages)
+        ceiling = self.profiles[feature]['max_tokens']
+        profile['max_tokens'] = fit_max_tokens(prompt_tokens, min(profile['max_tokens'], ceiling))
+        stats = self.feature_stats(feature)
+        stats['prompt_tokens_estimated'] += prompt_tokens
+        stats['completion_tokens_reserved'] += profile['max_tokens']
+        return profile
+
+    def feature_stats(self, feature):
+        stats = self.stats.get(feature)
+        if stats is None:
+            stats = self.stats[feature] = {
+                'calls': 0, 'errors': 0, 'retries': 0, 'timeouts': 0, 'fallbacks': 0,
+                'calls_by_model': {},
+                'prompt_tokens': 0, 'completion_tokens': 0,
+                'prompt_tokens_estimated': 0, 'completion_tokens_reserved': 0,
+                'json_repairs': 0, 'json_failures': 0,
+                'queue_wait_ms_total': 0.0,
+                'latency_ms': [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            }
+        return stats
+
+    def record_latency(self, feature, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        buckets = self.feature_stats(feature)['latency_ms']
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                buckets[i] += 1
+                return
+        buckets[-1] += 1
+
+    def record_usage(self, feature, usage):
+        if usage is None:
+            return
+        stats = self.feature_stats(feature)
+        stats['prompt_tokens'] += usage.prompt_tokens or 0
+        stats['completion_tokens'] += usage.completion_tokens or 0
+
+    @asynccontextmanager
+    async def slot(self, feature, priority, caller):
+        """Hold one of the shared upstream slots for the duration of a call"""
+        stats = self.feature_stats(feature)
+        stats['calls'] += 1
+        queued = time.perf_counter()
+        async with self.admission.admit(priority, caller):
+            stats['queue_wait_ms_total'] += (time.perf_counter() - queued) * 1000
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def with_retries(self, feature, call, retry_timeouts=True):
+        """Run call() until it succeeds or a non-retryable error/attempt limit is hit"""
+        stats = self.feature_stats(feature)
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                timed_out = isinstance(e, APITimeoutError)
+                if timed_out:
+                    stats['timeouts'] += 1
+                if attempt >= self.max_retries or not is_retryable(e) or (timed_out and not retry_timeouts):
+                    stats['errors'] += 1
+                    raise
+                delay = retry_delay(e, attempt)
+                logging.warning(f'LLM {feature} call failed ({type(e).__name__}), retrying in {delay:.2f}s')
+                stats['retries'] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def with_fallback(self, feature, profile, call):
+        """Run call(model) on the profile's model; if that times out, once more on its fallback_model"""
+        stats = self.feature_stats(feature)
+        model = profile['model']
+        fallback = profile.get('fallback_model')
+        if fallback == model:
+            fallback = None
+        stats['calls_by_model'][model] = stats['calls_by_model'].get(model, 0) + 1
+        try:
+            # A model that timed out once is likely to again - don't spend retries waiting on it
+            return await self.with_retries(feature, lambda: call(model), retry_timeouts=not fallback)
+        except APITimeoutError:
+            if not fallback:
+                raise
+        logging.warning(f'LLM {feature} call timed out on {model}, falling back to {fallback}')
+        stats['fallbacks'] += 1
+        stats['calls_by_model'][fallback] = stats['calls_by_model'].get(fallback, 0) + 1
+        return await self.with_retries(feature, lambda: call(fallback))
+
+    async def complete(self, feature, messages, priority=PRIORITY_ANONYMOUS, caller=None, **overrides):
+        """Return the reply text for a chat completion"""
+        profile = self.plan(feature, messages, self.profile(feature, overrides))
+        async with self.slot(feature, priority, caller):
+            started = time.perf_counter()
+            try:
+                response = await self.with_fallback(feature, profile, lambda model: self.client.chat.completions.create(
+                    messages=messages,
+                    timeout=profile['timeout'],
+                    **chat_settings(profile, model)
+                ))
+            finally:
+                self.record_latency(feature, started)
+        self.record_usage(feature, response.usage)
+        return response.choices[0].message.content
+
+    async def complete_json(self, feature, messages, priority=PRIORITY_ANONYMOUS, caller=None, **overrides):
+        """Return the reply parsed as a JSON object, repairing it if it was cut short"""
+        return self.parse_json(feature, await self.complete(feature, messages, priority, caller, **overrides))
+
+    def parse_json(self, feature, text):
+        """Parse a reply for feature, counting repairs and failures"""
+        return self.parse_json_reply(feature, text)[0]
+
+    def parse_json_reply(self, feature, text):
+        """parse_json, also saying whether the reply was truncated -> (data, repaired)"""
+        stats = self.feature_stats(feature)
+        try:
+            data, repaired = parse_json_reply(text)
+        except ValueError:
+            stats['json_failures'] += 1
+            raise
+        if repaired:
+            logging.warning(f'LLM {feature} reply was truncated; recovered the complete fields')
+            stats['json_repairs'] += 1
+        return data, repaired
+
+    async def stream(self, feature, messages, priority=PRIORITY_ANONYMOUS, caller=None, **overrides):
+        """Yield reply deltas as they arrive; only opening the stream is retried"""
+        profile = self.plan(feature, messages, self.profile(feature, overrides))
+        async with self.slot(feature, priority, caller):
+            started = time.perf_counter()
+            try:
+                stream = await self.with_fallback(feature, profile, lambda model: self.client.chat.completions.create(
+                    messages=messages,
+                    timeout=profile['timeout'],
+                    stream=True,
+                    stream_options={'include_usage': True},
+                    **chat_settings(profile, model)
+                ))
+                async for chunk in stream:
+                    if chunk.usage:
+                        self.record_usage(feature, chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                self.record_latency(feature, started)
+
+    async def generate_image(self, feature, prompt, priority=PRIORITY_ANONYMOUS, caller=None, **overrides):
+        """Return a base64 PNG for prompt, or None if the API sent nothing back"""
+        profile = self.profile(feature, overrides)
+        async with self.slot(feature, priority, caller):
+            started = time.perf_counter()
+            try:
+                response = await self.with_fallback(feature, profile, lambda model: self.client.images.generate(
+                    prompt=prompt,
+                    n=1,
+                    response_format='b64_json',
+                    timeout=profile['timeout'],
+                    **{**{key: profile[key] for key in IMAGE_SETTINGS}, 'model': model}
+                ))
+            finally:
+                self.record_latency(feature, started)
+        if response.data:
+            return response.data[0].b64_json
+        return None
+
+    def metrics(self):
+        return {
+            'in_flight': self.in_flight,
+            'admission': self.admission.metrics(),
+            'latency_buckets_ms': list(LATENCY_BUCKETS_MS) + ['+inf'],
+            'features': {
+                feature: {
+                    **stats,
+                    'latency_ms': list(stats['latency_ms']),
+                    'calls_by_model': dict(stats['calls_by_model']),
+                    'model': self.profiles.get(feature, {}).get('model'),
+                    'fallback_model': self.profiles.get(feature, {}).get('fallback_model')
+                }
+                for feature, stats in self.stats.items()
+            }
+        }
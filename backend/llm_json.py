@@ -0,0 +1,87 @@
+# Single-pass parsing for model replies that should be one JSON object
+# JSON mode keeps replies to a bare object, but older prompts still come back
+# fenced or with a sentence of preamble, and a reply cut off at max_tokens
+# ends mid-object. Rather than regex-scanning the whole reply, decode straight
+# from the first "{" and, if the text is truncated, close whatever is still
+# open at the last point that leaves valid JSON - a paid completion that ran
+# out of tokens still yields every complete field it produced.
+
+import json
+
+_decoder = json.JSONDecoder()
+_CLOSERS = {'{': '}', '[': ']'}
+# Each attempt re-parses the prefix, so give up rather than go quadratic on garbage
+MAX_REPAIR_ATTEMPTS = 32
+
+def _cut_points(text, start):
+    """(end, closers) pairs where text[start:end] could be closed off, last first - empty unless truncated"""
+    cuts = []
+    stack = []
+    in_string = False
+    escaped = False
+    escape_at = None
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+                escape_at = i
+            elif char == '"':
+                in_string = False
+                cuts.append((i + 1, ''.join(reversed(stack))))
+        elif char == '"':
+            in_string = True
+            escape_at = None
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif char in '}]':
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif char == ',':
+            # Whatever number or literal preceded the comma is complete
+            cuts.append((i, ''.join(reversed(stack))))
+
+    if not stack:
+        return []
+    closers = ''.join(reversed(stack))
+    if in_string:
+        if escape_at is not None:
+            # Cut off mid-escape (a lone backslash, or \u short of 4 hex digits) - drop the escape
+            cuts.append((escape_at, '"' + closers))
+        # Keep the partial string - close it where it stopped
+        cuts.append((len(text), '"' + closers))
+    else:
+        # A trailing number ("12") is kept if it parses; a partial one ("1.", "tru") falls back to the comma before it
+        cuts.append((len(text), closers))
+    return cuts[::-1]
+
+def repair_truncated(text, start=0):
+    """Close a truncated JSON object at its last recoverable point, or return None"""
+    for end, closers in _cut_points(text, start)[:MAX_REPAIR_ATTEMPTS]:
+        try:
+            value = json.loads(text[start:end] + closers)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict) and value:
+            return value
+    return None
+
+def parse_json_reply(text):
+    """Parse the JSON object in a model reply -> (data, repaired)"""
+    text = text or ''
+    start = text.find('{')
+    if start == -1:
+        raise ValueError('No JSON object in model response')
+    try:
+        # raw_decode stops at the end of the object, so trailing prose or a closing fence is ignored
+        data, _ = _decoder.raw_decode(text, start)
+        return data, False
+    except json.JSONDecodeError as e:
+        data = repair_truncated(text, start)
+        if data is None:
+            raise e
+        return data, True
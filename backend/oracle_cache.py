@@ -0,0 +1,147 @@
+# Near-duplicate cache for oracle readings
+# Seekers ask the same things over and over ("breakup", "new job anxiety"), so a
+# reading generated for one situation can be served for a near-identical one.
+# Situations are normalized to word shingles and compared with MinHash; an LSH
+# band index keeps lookups to a handful of candidates. Entries are scoped by
+# feature plus anything that must match exactly (archetype, spread, cards).
+# Off unless ORACLE_CACHE_ENABLED=true - cached readings are shared across users.
+
+import os
+import re
+import copy
+import time
+import hashlib
+import random
+from collections import OrderedDict
+
+ORACLE_CACHE_ENABLED = os.environ.get('ORACLE_CACHE_ENABLED', 'false').lower() == 'true'
+# Minimum estimated Jaccard similarity between two situations to reuse a reading
+ORACLE_CACHE_THRESHOLD = float(os.environ.get('ORACLE_CACHE_THRESHOLD', '0.8'))
+ORACLE_CACHE_TTL_SECONDS = float(os.environ.get('ORACLE_CACHE_TTL_SECONDS', '3600'))
+ORACLE_CACHE_MAX_ENTRIES = int(os.environ.get('ORACLE_CACHE_MAX_ENTRIES', '5000'))
+
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed so signatures are comparable across restarts and workers
+_PERMUTATIONS = [
+    (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+    for rng in [random.Random(1847)]
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+STOPWORDS = frozenset(
+    "a an the and or but so of to in on at for with about my me i im i'm i've ive "
+    "is am are was were be been it its this that what how do does should can will "
+    "just really very".split()
+)
+_WORD = re.compile(r"[a-z0-9']+")
+
+oracle_cache = OrderedDict()   # entry key -> entry, oldest first
+lsh_buckets = {}               # (scope, band, band hash) -> set of entry keys
+oracle_cache_stats = {'hits': 0, 'near_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+def normalize_situation(text):
+    """Lowercase, straighten apostrophes and drop filler words"""
+    text = (text or '').lower().replace('’', "'").replace('‘', "'")
+    return ' '.join(word.strip("'") for word in _WORD.findall(text) if word not in STOPWORDS)
+
+def shingles(normalized):
+    """Word unigrams and bigrams - short situations need both to compare well"""
+    words = normalized.split()
+    return set(words) | {f'{a} {b}' for a, b in zip(words, words[1:])}
+
+def minhash(tokens):
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=4).digest(), 'big') for t in tokens]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+def _bands(scope, signature):
+    for band in range(LSH_BANDS):
+        yield (scope, band, hash(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+
+def _similarity(left, right):
+    return sum(a == b for a, b in zip(left, right)) / MINHASH_PERMUTATIONS
+
+def _drop(key):
+    entry = oracle_cache.pop(key, None)
+    if entry and entry['signature']:
+        for band_key in _bands(entry['scope'], entry['signature']):
+            bucket = lsh_buckets.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del lsh_buckets[band_key]
+
+def get_cached_reading(feature, situation, scope=()):
+    """Return a copy of a cached reading for this or a near-identical situation, else None"""
+    if not ORACLE_CACHE_ENABLED:
+        return None
+    scope = (feature,) + tuple(scope)
+    normalized = normalize_situation(situation)
+    now = time.monotonic()
+
+    entry = oracle_cache.get((scope, normalized))
+    if entry and entry['expires_at'] > now:
+        oracle_cache_stats['hits'] += 1
+        return copy.deepcopy(entry['reading'])
+
+    tokens = shingles(normalized)
+    if tokens:
+        signature = minhash(tokens)
+        candidates = set()
+        for band_key in _bands(scope, signature):
+            candidates |= lsh_buckets.get(band_key, set())
+        best, best_score = None, ORACLE_CACHE_THRESHOLD
+        for key in candidates:
+            candidate = oracle_cache[key]
+            if candidate['expires_at'] <= now:
+                continue
+            score = _similarity(signature, candidate['signature'])
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best:
+            oracle_cache_stats['near_hits'] += 1
+            return copy.deepcopy(best['reading'])
+
+    oracle_cache_stats['misses'] += 1
+    return None
+
+def store_reading(feature, situation, reading, scope=()):
+    """Cache a freshly generated reading under its situation"""
+    if not ORACLE_CACHE_ENABLED:
+        return
+    scope = (feature,) + tuple(scope)
+    normalized = normalize_situation(situation)
+    key = (scope, normalized)
+    tokens = shingles(normalized)
+
+    _drop(key)
+    entry = {
+        'scope': scope,
+        'signature': minhash(tokens) if tokens else None,
+        'reading': copy.deepcopy(reading),
+        'expires_at': time.monotonic() + ORACLE_CACHE_TTL_SECONDS
+    }
+    oracle_cache[key] = entry
+    if entry['signature']:
+        for band_key in _bands(scope, entry['signature']):
+            lsh_buckets.setdefault(band_key, set()).add(key)
+    oracle_cache_stats['stores'] += 1
+
+    while len(oracle_cache) > ORACLE_CACHE_MAX_ENTRIES:
+        _drop(next(iter(oracle_cache)))
+        oracle_cache_stats['evictions'] += 1
+
+def get_oracle_cache_metrics():
+    return {
+        'enabled': ORACLE_CACHE_ENABLED,
+        'entries': len(oracle_cache),
+        'threshold': ORACLE_CACHE_THRESHOLD,
+        'ttl_seconds': ORACLE_CACHE_TTL_SECONDS,
+        **oracle_cache_stats
+    }
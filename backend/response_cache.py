@@ -0,0 +1,102 @@
+# Pre-serialized responses for the read-mostly reference endpoints
+# Bodies are encoded to JSON bytes once and reused until the reference data is
+# reseeded. Each body carries a strong ETag so repeat clients can revalidate
+# with If-None-Match and get an empty 304 back. The gzip bytes are a different
+# representation from the identity bytes, so they get their own ETag ("-gzip"
+# suffix) - a cache must never answer one encoding's revalidation with the other.
+
+import os
+import gzip
+import json
+import hashlib
+import inspect
+from types import MappingProxyType
+from cachetools import TTLCache
+from starlette.requests import Request
+from starlette.responses import Response
+
+REFERENCE_CACHE_MAX_AGE = int(os.environ.get('REFERENCE_CACHE_MAX_AGE', '300'))
+# Bounds how long another worker process can serve data from before a reseed
+REFERENCE_CACHE_TTL_SECONDS = float(os.environ.get('REFERENCE_CACHE_TTL_SECONDS', '600'))
+REFERENCE_CACHE_CONTROL = f'public, max-age={REFERENCE_CACHE_MAX_AGE}'
+# Bodies smaller than this aren't worth a Content-Encoding round trip
+GZIP_MIN_BYTES = 1024
+
+response_cache = TTLCache(maxsize=256, ttl=REFERENCE_CACHE_TTL_SECONDS)
+response_cache_stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+def encode_payload(payload, precompress=False):
+    """Serialize a payload once and derive its strong ETags"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    entry = {
+        'body': body,
+        'etag': f'"{digest}"',
+        'gzip': None,
+        'gzip_etag': None
+    }
+    if precompress and len(body) >= GZIP_MIN_BYTES:
+        entry['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        entry['gzip_etag'] = f'"{digest}-gzip"'
+    return entry
+
+def static_json_payload(payload):
+    """Freeze a payload that never changes: JSON bytes, gzip variant and ETag"""
+    return MappingProxyType(encode_payload(payload, precompress=True))
+
+def accepts_gzip(request: Request):
+    """True unless the client's Accept-Encoding rules out gzip"""
+    for coding in request.headers.get('accept-encoding', '').split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip() in ('gzip', '*') and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            return True
+    return False
+
+def etag_matches(request: Request, etag):
+    """True when the client's If-None-Match already names this ETag"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+def serve_encoded(request: Request, entry, cache_control=REFERENCE_CACHE_CONTROL):
+    """Return the cached bytes, or a bodiless 304 if the client is current"""
+    compressed = bool(entry.get('gzip')) and accepts_gzip(request)
+    etag = entry['gzip_etag'] if compressed else entry['etag']
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if entry.get('gzip'):
+        headers['Vary'] = 'Accept-Encoding'
+    if etag_matches(request, etag):
+        response_cache_stats['not_modified'] += 1
+        return Response(status_code=304, headers=headers)
+    if compressed:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(content=entry['gzip'], media_type='application/json', headers=headers)
+    return Response(content=entry['body'], media_type='application/json', headers=headers)
+
+async def cached_json_response(request: Request, key, build):
+    """Serve `key` from the cache, calling build() to produce it on a miss"""
+    entry = response_cache.get(key)
+    if entry is None:
+        response_cache_stats['misses'] += 1
+        payload = build()
+        if inspect.isawaitable(payload):
+            payload = await payload
+        entry = encode_payload(payload)
+        response_cache[key] = entry
+    else:
+        response_cache_stats['hits'] += 1
+    return serve_encoded(request, entry)
+
+def invalidate_response_cache():
+    """Drop every cached body - call after reference data changes"""
+    response_cache.clear()
+    response_cache_stats['invalidations'] += 1
+
+def get_response_cache_metrics():
+    return {
+        'entries': len(response_cache),
+        'ttl_seconds': REFERENCE_CACHE_TTL_SECONDS,
+        **response_cache_stats
+    }
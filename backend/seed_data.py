@@ -1,8 +1,10 @@
+import sys
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from seed_sync import sync_seed
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -11,14 +13,7 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-async def seed_database():
-    # Clear existing data
-    await db.deities.delete_many({})
-    await db.historical_figures.delete_many({})
-    await db.sacred_sites.delete_many({})
-    await db.rituals.delete_many({})
-    await db.timeline_events.delete_many({})
-    
+async def seed_database(force=False):
     # Seed Deities
     deities = [
         {
@@ -233,20 +228,29 @@ async def seed_database():
         {'id': 'event-012', 'year': 1945, 'title': 'End of WWII - New Occult Era Begins', 'description': 'Post-war period sees foundation for modern Wicca and neo-paganism', 'category': 'Historical'}
     ]
     
-    # Insert all data
-    if deities:
-        await db.deities.insert_many(deities)
-    if figures:
-        await db.historical_figures.insert_many(figures)
-    if sites:
-        await db.sacred_sites.insert_many(sites)
-    if rituals:
-        await db.rituals.insert_many(rituals)
-    if events:
-        await db.timeline_events.insert_many(events)
+    # Upsert every collection in bulk, in parallel - the live site keeps serving
+    # the old documents until each one is replaced, and unchanged seeds are skipped
+    results = await asyncio.gather(*(
+        sync_seed(db, collection, docs, force=force)
+        for collection, docs in (
+            ('deities', deities),
+            ('historical_figures', figures),
+            ('sacred_sites', sites),
+            ('rituals', rituals),
+            ('timeline_events', events)
+        )
+    ))
+    for result in results:
+        if result['changed']:
+            print(f"{result['seed']}: {result['upserted']} added, {result['modified']} updated, {result['deleted']} removed")
+        else:
+            print(f"{result['seed']}: unchanged")
     
     print('Database seeded successfully!')
+    if any(result['changed'] for result in results):
+        print('Reference data changed - POST /api/admin/refresh-reference-data to reload running servers')
     client.close()
 
 if __name__ == '__main__':
-    asyncio.run(seed_database())
+    # --force rewrites every seed even if its manifest hash matches
+    asyncio.run(seed_database(force='--force' in sys.argv[1:]))
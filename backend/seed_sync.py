@@ -0,0 +1,59 @@
+# Bulk, idempotent seeding for data that ships in code
+# Reseeding used to delete a collection (or one archetype's sample spells) and
+# insert the documents back one at a time, so for the length of the reseed
+# readers saw an empty or half-filled collection. sync_seed() instead sends
+# every document as an upsert keyed by id in one bulk_write, followed by a
+# delete of only the documents in the seed's scope that the seed no longer
+# contains - a reader sees the old or the new version of each document, never
+# a gap. Unchanged documents are matched but not rewritten.
+#
+# Each seed's content hash is recorded in seed_manifests, so reseeding data
+# that hasn't changed costs a find_one and a count. The count guards against
+# the collection having changed underneath the manifest (wiped, documents
+# deleted or added by hand) - then the seed is written again regardless.
+
+import json
+import hashlib
+from datetime import datetime, timezone
+from pymongo import ReplaceOne, DeleteMany
+
+SEED_MANIFESTS = 'seed_manifests'
+
+def seed_hash(docs):
+    """Stable content hash of a seed - key order doesn't matter"""
+    body = json.dumps(docs, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+async def sync_seed(db, collection, docs, scope=None, name=None, force=False):
+    """Make the documents in collection matching scope equal to docs, keyed by id"""
+    scope = scope or {}
+    name = name or collection
+    # insert_one adds _id to the dicts it's given - never send one back
+    docs = [{key: value for key, value in doc.items() if key != '_id'} for doc in docs]
+    digest = seed_hash(docs)
+    result = {'seed': name, 'documents': len(docs), 'changed': False, 'upserted': 0, 'modified': 0, 'deleted': 0}
+
+    manifest = await db[SEED_MANIFESTS].find_one({'_id': name})
+    if manifest and manifest.get('hash') == digest and not force:
+        if await db[collection].count_documents(scope) == len(docs):
+            return result
+
+    operations = [ReplaceOne({'id': doc['id']}, doc, upsert=True) for doc in docs]
+    operations.append(DeleteMany({**scope, 'id': {'$nin': [doc['id'] for doc in docs]}}))
+    written = await db[collection].bulk_write(operations, ordered=True)
+
+    await db[SEED_MANIFESTS].replace_one({'_id': name}, {
+        '_id': name,
+        'collection': collection,
+        'scope': scope,
+        'hash': digest,
+        'documents': len(docs),
+        'seeded_at': datetime.now(timezone.utc).isoformat()
+    }, upsert=True)
+    result.update({
+        'changed': bool(written.upserted_count or written.modified_count or written.deleted_count),
+        'upserted': written.upserted_count,
+        'modified': written.modified_count,
+        'deleted': written.deleted_count
+    })
+    return result
@@ -1,27 +1,50 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Request, BackgroundTasks
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import time
+import asyncio
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import uuid
 import json
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
+from cachetools import TTLCache
 from openai import AsyncOpenAI
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
 import base64
 from katherine_spells import KATHERINE_SAMPLE_SPELLS, seed_katherine_spells
 from cathleen_spells import CATHLEEN_SAMPLE_SPELLS, seed_cathleen_spells
 from shigg_spells import SHIGG_SAMPLE_SPELLS, SHIGG_BIRD_ORACLE, SHIGG_CORRIE_CHARACTERS, seed_shigg_spells
+from response_cache import (
+    cached_json_response, serve_encoded, static_json_payload, etag_matches, invalidate_response_cache,
+    get_response_cache_metrics
+)
+from blob_store import BlobTooLarge, put_base64_blob, find_blob, sweep_blobs, image_url, get_blob_store_metrics
+from image_variants import derive_variants, get_image_variant_metrics
+from db_indexes import ensure_indexes, index_usage, get_index_metrics
+from grimoire_pages import (
+    GRIMOIRE_PAGE_SIZE, SPELL_SUMMARY_FIELDS, WARD_SUMMARY_FIELDS, fetch_page
+)
+from spell_prompts import compile_spell_prompts, assemble_spell_prompt
+from chat_sessions import (
+    load_chat_session, build_chat_messages, append_chat_turns
+)
+from llm_gateway import LLMGateway
+from token_budget import start_tokenizer_load, reading_output_budget, spell_output_budget
+from admission import AdmissionController, PRIORITY_PRO, PRIORITY_MEMBER, PRIORITY_ANONYMOUS
+from oracle_cache import get_cached_reading, store_reading, get_oracle_cache_metrics
 from cobbles_oracle import (
-    COBBLES_ORACLE_DECK, CARD_ROUTING_RULES, ORACLE_SPREADS,
-    get_all_cards, get_card_by_id, get_cards_by_suit, get_major_arcana, get_minor_arcana
+    COBBLES_ORACLE_DECK, ORACLE_SPREADS, route_situation, make_draw_rng, draw_cards, render_local_reading,
+    get_all_cards, get_cards_by_suit, get_major_arcana, get_minor_arcana
 )
 
 ROOT_DIR = Path(__file__).parent
@@ -42,8 +65,35 @@ JWT_ALGORITHM = 'HS256'
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY', '')
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+# Initialize OpenAI client - retries are handled by the gateway, not the SDK
+openai_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    base_url=os.environ.get('OPENAI_BASE_URL') or None,
+    max_retries=0
+)
+llm_gateway = LLMGateway(openai_client, admission=AdmissionController())
+
+# Password hashing pool - bcrypt takes ~250ms of CPU per call, so it runs on its
+# own threads instead of the event loop. Once MAX_PENDING calls are in flight or
+# queued, new logins are turned away with a 503 rather than piling up.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '64'))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='bcrypt')
+password_pool_stats = {
+    'pending': 0,
+    'peak_pending': 0,
+    'completed': 0,
+    'rejected': 0
+}
+
+# Short-lived cache of user documents for get_current_user. Every code path that
+# writes to db.users must call invalidate_cached_user so stale tiers/counts are
+# never served for longer than the write itself; the TTL only bounds drift
+# between worker processes.
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '10000'))
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+user_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
 
 # Models
 class UserRegister(BaseModel):
@@ -187,22 +237,77 @@ class SavedSpellResponse(BaseModel):
     archetype_id: Optional[str] = None
     archetype_name: Optional[str] = None
     archetype_title: Optional[str] = None
-    image_base64: Optional[str] = None
+    image_ref: Optional[str] = None
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    webp_url: Optional[str] = None
     created_at: str
     title: str
 
+class SavedSpellSummary(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    archetype_id: Optional[str] = None
+    archetype_name: Optional[str] = None
+    archetype_title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    created_at: str
+
+class SavedSpellPage(BaseModel):
+    items: List[SavedSpellSummary]
+    next_cursor: Optional[str] = None
+
 class WaitlistRequest(BaseModel):
     email: EmailStr
     name: Optional[str] = None
     source: Optional[str] = 'homepage'
 
 # Helper functions
-def hash_password(password: str) -> str:
+def _hash_password_sync(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-def verify_password(password: str, hashed: str) -> bool:
+def _verify_password_sync(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+async def run_password_task(func, *args):
+    """Run a bcrypt call on the password pool, rejecting with 503 when saturated"""
+    if password_pool_stats['pending'] >= PASSWORD_HASH_MAX_PENDING:
+        password_pool_stats['rejected'] += 1
+        raise HTTPException(
+            status_code=503,
+            detail='Too many sign-in requests right now. Please try again in a moment.',
+            headers={'Retry-After': '2'}
+        )
+    
+    password_pool_stats['pending'] += 1
+    password_pool_stats['peak_pending'] = max(password_pool_stats['peak_pending'], password_pool_stats['pending'])
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        password_pool_stats['pending'] -= 1
+        password_pool_stats['completed'] += 1
+
+async def hash_password(password: str) -> str:
+    return await run_password_task(_hash_password_sync, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await run_password_task(_verify_password_sync, password, hashed)
+
+def get_password_pool_metrics() -> dict:
+    """Snapshot of the password pool for the metrics endpoint"""
+    pending = password_pool_stats['pending']
+    return {
+        'workers': PASSWORD_HASH_WORKERS,
+        'max_pending': PASSWORD_HASH_MAX_PENDING,
+        'running': min(pending, PASSWORD_HASH_WORKERS),
+        'queued': max(0, pending - PASSWORD_HASH_WORKERS),
+        'peak_pending': password_pool_stats['peak_pending'],
+        'completed': password_pool_stats['completed'],
+        'rejected': password_pool_stats['rejected']
+    }
+
 def create_token(user_id: str) -> str:
     payload = {
         'user_id': user_id,
@@ -210,6 +315,33 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Proxies in front of the app that append to X-Forwarded-For. Only the entries
+# they added can be trusted - anything further left came from the client and
+# could be anything, so it must never pick the per-caller admission key.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+def client_address(http_request: Request) -> str:
+    """The address the outermost trusted proxy saw the request come from"""
+    forwarded = [hop.strip() for hop in http_request.headers.get('x-forwarded-for', '').split(',') if hop.strip()]
+    if TRUSTED_PROXY_HOPS > 0 and len(forwarded) >= TRUSTED_PROXY_HOPS:
+        return forwarded[-TRUSTED_PROXY_HOPS]
+    return http_request.client.host if http_request.client else ''
+
+def admission_for(user: Optional[dict] = None, http_request: Optional[Request] = None) -> dict:
+    """Priority tier and caller key for an LLM call (pass as **kwargs to llm_gateway)"""
+    if user:
+        priority = PRIORITY_PRO if user.get('subscription_tier', 'free') == 'paid' else PRIORITY_MEMBER
+        return {'priority': priority, 'caller': f"user:{user['id']}"}
+    caller = None
+    if http_request is not None:
+        host = client_address(http_request)
+        caller = f'ip:{host}' if host else None
+    return {'priority': PRIORITY_ANONYMOUS, 'caller': caller}
+
 async def check_spell_generation_limit(user: dict) -> dict:
     """Check if user can generate spell and return status"""
     subscription_tier = user.get('subscription_tier', 'free')
@@ -239,13 +371,43 @@ async def increment_spell_count(user_id: str):
             }
         }
     )
+    invalidate_cached_user(user_id)
+
+async def load_user(user_id: str) -> Optional[dict]:
+    """Fetch a user document by id, served from the TTL cache when possible"""
+    if not user_id:
+        return None
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        user_cache_stats['hits'] += 1
+        return dict(cached)
+    
+    user_cache_stats['misses'] += 1
+    user = await db.users.find_one({'id': user_id}, {'_id': 0})
+    if user:
+        user_cache[user_id] = user
+        return dict(user)
+    return None
+
+def invalidate_cached_user(user_id: str):
+    """Drop a user from the cache after any write to their document"""
+    if user_cache.pop(user_id, None) is not None:
+        user_cache_stats['invalidations'] += 1
+
+def get_user_cache_metrics() -> dict:
+    return {
+        'size': len(user_cache),
+        'max_size': USER_CACHE_MAX_SIZE,
+        'ttl_seconds': USER_CACHE_TTL_SECONDS,
+        **user_cache_stats
+    }
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get('user_id')
-        user = await db.users.find_one({'id': user_id}, {'_id': 0})
+        user = await load_user(user_id)
         if not user:
             raise HTTPException(status_code=401, detail='User not found')
         return user
@@ -267,7 +429,7 @@ async def register(user_data: UserRegister):
         'id': user_id,
         'email': user_data.email,
         'name': user_data.name,
-        'password_hash': hash_password(user_data.password),
+        'password_hash': await hash_password(user_data.password),
         'favorites': [],
         'created_at': current_time.isoformat(),
         
@@ -305,7 +467,7 @@ async def register(user_data: UserRegister):
 @api_router.post('/auth/login', response_model=AuthResponse)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({'email': credentials.email}, {'_id': 0})
-    if not user or not verify_password(credentials.password, user['password_hash']):
+    if not user or not await verify_password(credentials.password, user['password_hash']):
         raise HTTPException(status_code=401, detail='Invalid credentials')
     
     # Update last login
@@ -313,6 +475,7 @@ async def login(credentials: UserLogin):
         {'id': user['id']},
         {'$set': {'last_login': datetime.now(timezone.utc).isoformat()}}
     )
+    invalidate_cached_user(user['id'])
     
     token = create_token(user['id'])
     user_response = UserResponse(
@@ -335,7 +498,7 @@ async def update_email(request: UpdateEmailRequest, user = Depends(get_current_u
     """Update user's email address"""
     
     # Verify password
-    if not verify_password(request.password, user['password_hash']):
+    if not await verify_password(request.password, user['password_hash']):
         raise HTTPException(status_code=401, detail='Incorrect password')
     
     # Check if new email is already taken
@@ -348,6 +511,7 @@ async def update_email(request: UpdateEmailRequest, user = Depends(get_current_u
         {'id': user['id']},
         {'$set': {'email': request.new_email}}
     )
+    invalidate_cached_user(user['id'])
     
     return UserResponse(
         id=user['id'],
@@ -383,9 +547,11 @@ async def join_waitlist(request: WaitlistRequest):
 
 # Deities endpoints
 @api_router.get('/deities', response_model=List[Deity])
-async def get_deities():
-    deities = await db.deities.find({}, {'_id': 0}).to_list(100)
-    return deities
+async def get_deities(request: Request):
+    async def build():
+        deities = await db.deities.find({}, {'_id': 0}).to_list(100)
+        return [Deity(**d).model_dump(mode='json') for d in deities]
+    return await cached_json_response(request, 'deities', build)
 
 @api_router.get('/deities/{deity_id}', response_model=Deity)
 async def get_deity(deity_id: str):
@@ -396,9 +562,11 @@ async def get_deity(deity_id: str):
 
 # Historical Figures endpoints
 @api_router.get('/historical-figures', response_model=List[HistoricalFigure])
-async def get_figures():
-    figures = await db.historical_figures.find({}, {'_id': 0}).to_list(100)
-    return figures
+async def get_figures(request: Request):
+    async def build():
+        figures = await db.historical_figures.find({}, {'_id': 0}).to_list(100)
+        return [HistoricalFigure(**f).model_dump(mode='json') for f in figures]
+    return await cached_json_response(request, 'historical-figures', build)
 
 @api_router.get('/historical-figures/{figure_id}', response_model=HistoricalFigure)
 async def get_figure(figure_id: str):
@@ -409,9 +577,11 @@ async def get_figure(figure_id: str):
 
 # Sacred Sites endpoints
 @api_router.get('/sacred-sites', response_model=List[SacredSite])
-async def get_sites():
-    sites = await db.sacred_sites.find({}, {'_id': 0}).to_list(100)
-    return sites
+async def get_sites(request: Request):
+    async def build():
+        sites = await db.sacred_sites.find({}, {'_id': 0}).to_list(100)
+        return [SacredSite(**site).model_dump(mode='json') for site in sites]
+    return await cached_json_response(request, 'sacred-sites', build)
 
 @api_router.get('/sacred-sites/{site_id}', response_model=SacredSite)
 async def get_site(site_id: str):
@@ -422,10 +592,12 @@ async def get_site(site_id: str):
 
 # Rituals endpoints
 @api_router.get('/rituals', response_model=List[Ritual])
-async def get_rituals(category: Optional[str] = None):
-    query = {'category': category} if category else {}
-    rituals = await db.rituals.find(query, {'_id': 0}).to_list(100)
-    return rituals
+async def get_rituals(request: Request, category: Optional[str] = None):
+    async def build():
+        query = {'category': category} if category else {}
+        rituals = await db.rituals.find(query, {'_id': 0}).to_list(100)
+        return [Ritual(**r).model_dump(mode='json') for r in rituals]
+    return await cached_json_response(request, f'rituals:{category or ""}', build)
 
 @api_router.get('/rituals/{ritual_id}', response_model=Ritual)
 async def get_ritual(ritual_id: str):
@@ -436,9 +608,11 @@ async def get_ritual(ritual_id: str):
 
 # Timeline endpoints
 @api_router.get('/timeline', response_model=List[TimelineEvent])
-async def get_timeline():
-    events = await db.timeline_events.find({}, {'_id': 0}).sort('year', 1).to_list(100)
-    return events
+async def get_timeline(request: Request):
+    async def build():
+        events = await db.timeline_events.find({}, {'_id': 0}).sort('year', 1).to_list(100)
+        return [TimelineEvent(**e).model_dump(mode='json') for e in events]
+    return await cached_json_response(request, 'timeline', build)
 
 # Archetype personas for AI spell generation
 ARCHETYPE_PERSONAS = {
@@ -789,127 +963,172 @@ When creating spells or rituals:
 
 Remember: Every spell is a formula others have used. Users can adapt, break, and build their own. No intermediaries necessary."""
 
+def get_chat_system_message(archetype: Optional[str]) -> str:
+    """Pick the persona system prompt for an archetype, or the default guide"""
+    if archetype and archetype in ARCHETYPE_PERSONAS:
+        return ARCHETYPE_PERSONAS[archetype]['system_prompt']
+    return DEFAULT_SYSTEM_MESSAGE
+
 # AI Chat endpoint
 @api_router.post('/ai/chat')
-async def chat_with_ai(message_data: ChatMessage):
+async def chat_with_ai(message_data: ChatMessage, http_request: Request):
     try:
         session_id = message_data.session_id or str(uuid.uuid4())
         
         # Determine system message based on archetype
-        if message_data.archetype and message_data.archetype in ARCHETYPE_PERSONAS:
-            persona = ARCHETYPE_PERSONAS[message_data.archetype]
-            system_message = persona['system_prompt']
-        else:
-            system_message = DEFAULT_SYSTEM_MESSAGE
+        system_message = get_chat_system_message(message_data.archetype)
         
-        # Use direct OpenAI API for chat
-        chat_response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": message_data.message}
-            ],
-            temperature=0.8,
-            max_tokens=2000
-        )
+        # Replay stored history (trimmed to budget) ahead of the new message
+        session = await load_chat_session(db, session_id)
+        messages = build_chat_messages(system_message, session, message_data.message)
         
-        response = chat_response.choices[0].message.content
+        response = await llm_gateway.complete('chat', messages, **admission_for(None, http_request))
+        await append_chat_turns(db, session_id, message_data.archetype, message_data.message, response)
         
         return {'response': response, 'session_id': session_id, 'archetype': message_data.archetype}
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f'AI chat error: {str(e)}')
         raise HTTPException(status_code=500, detail='Failed to process chat request')
 
+@api_router.post('/ai/chat/stream')
+async def chat_with_ai_stream(message_data: ChatMessage, http_request: Request):
+    """Stream a chat reply as Server-Sent Events.
+    
+    Emits `token` events ({"delta": ...}) as the persona replies, then a `done`
+    event with the same body /ai/chat returns.
+    """
+    session_id = message_data.session_id or str(uuid.uuid4())
+    system_message = get_chat_system_message(message_data.archetype)
+    session = await load_chat_session(db, session_id)
+    messages = build_chat_messages(system_message, session, message_data.message)
+    admission = admission_for(None, http_request)
+    
+    async def event_stream():
+        try:
+            parts = []
+            async for delta in llm_gateway.stream('chat', messages, **admission):
+                parts.append(delta)
+                yield sse_event('token', {'delta': delta})
+            
+            response = ''.join(parts)
+            await append_chat_turns(db, session_id, message_data.archetype, message_data.message, response)
+            
+            yield sse_event('done', {
+                'response': response,
+                'session_id': session_id,
+                'archetype': message_data.archetype
+            })
+        except HTTPException as e:
+            yield sse_event('error', {'detail': e.detail, 'status': e.status_code})
+        except Exception as e:
+            logging.error(f'AI chat stream error: {str(e)}')
+            yield sse_event('error', {'detail': 'Failed to process chat request'})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Spell personalization questions endpoint
+SPELL_CONTEXT_QUESTIONS = {
+    "questions": [
+        {
+            "id": "materials",
+            "question": "What materials do you have access to? (select all that apply)",
+            "options": [
+                {"value": "candles", "label": "Candles or oil lamps"},
+                {"value": "herbs", "label": "Herbs, plants, or flowers"},
+                {"value": "stones", "label": "Stones, crystals, or shells"},
+                {"value": "fabric", "label": "Fabric, thread, or ribbon"},
+                {"value": "water", "label": "Bowls, water, or mirrors"},
+                {"value": "photos", "label": "Photographs or mementos"},
+                {"value": "paper", "label": "Paper, pen, and journal"},
+                {"value": "kitchen", "label": "Kitchen items (salt, honey, spices)"},
+                {"value": "none", "label": "I'll gather what's needed"}
+            ],
+            "type": "multiselect",
+            "required": False
+        },
+        {
+            "id": "time",
+            "question": "How much time can you dedicate?",
+            "options": [
+                {"value": "quick", "label": "5-10 minutes (quick practice)"},
+                {"value": "medium", "label": "20-30 minutes (focused session)"},
+                {"value": "deep", "label": "1 hour or more (deep working)"},
+                {"value": "extended", "label": "Multiple days (extended ritual)"}
+            ],
+            "type": "single",
+            "required": False
+        },
+        {
+            "id": "experience",
+            "question": "Your experience with ritual practice?",
+            "options": [
+                {"value": "beginner", "label": "Complete beginner - guide me through"},
+                {"value": "some", "label": "Some experience - I know the basics"},
+                {"value": "regular", "label": "Regular practitioner"},
+                {"value": "experienced", "label": "Experienced - give me depth"}
+            ],
+            "type": "single",
+            "required": False
+        },
+        {
+            "id": "environment",
+            "question": "Where will you perform this ritual?",
+            "options": [
+                {"value": "apartment", "label": "Small apartment or room"},
+                {"value": "house", "label": "House with private space"},
+                {"value": "garden", "label": "Garden or outdoor space"},
+                {"value": "nature", "label": "Woods, beach, or natural setting"},
+                {"value": "discreet", "label": "Shared space - need to be discreet"}
+            ],
+            "type": "single",
+            "required": False
+        },
+        {
+            "id": "style",
+            "question": "What kind of ritual appeals to you most?",
+            "options": [
+                {"value": "contemplative", "label": "Quiet contemplation and meditation"},
+                {"value": "active", "label": "Active, movement-based practice"},
+                {"value": "creative", "label": "Creative - writing, crafting, making"},
+                {"value": "vocal", "label": "Vocal - singing, chanting, speaking"},
+                {"value": "nature", "label": "Nature-based - working with elements"},
+                {"value": "surprise", "label": "Surprise me with something new"}
+            ],
+            "type": "single",
+            "required": False
+        }
+    ],
+    "instructions": "These questions help personalize your spell. All are optional - skip any you prefer."
+}
+
+# Serialized (and gzipped) once at import - served as raw bytes
+SPELL_CONTEXT_QUESTIONS_RESPONSE = static_json_payload(SPELL_CONTEXT_QUESTIONS)
+
 @api_router.get('/spell-context-questions')
-async def get_spell_context_questions():
+async def get_spell_context_questions(request: Request):
     """Return leading questions to personalize spell generation"""
-    return {
-        "questions": [
-            {
-                "id": "materials",
-                "question": "What materials do you have access to? (select all that apply)",
-                "options": [
-                    {"value": "candles", "label": "Candles or oil lamps"},
-                    {"value": "herbs", "label": "Herbs, plants, or flowers"},
-                    {"value": "stones", "label": "Stones, crystals, or shells"},
-                    {"value": "fabric", "label": "Fabric, thread, or ribbon"},
-                    {"value": "water", "label": "Bowls, water, or mirrors"},
-                    {"value": "photos", "label": "Photographs or mementos"},
-                    {"value": "paper", "label": "Paper, pen, and journal"},
-                    {"value": "kitchen", "label": "Kitchen items (salt, honey, spices)"},
-                    {"value": "none", "label": "I'll gather what's needed"}
-                ],
-                "type": "multiselect",
-                "required": False
-            },
-            {
-                "id": "time",
-                "question": "How much time can you dedicate?",
-                "options": [
-                    {"value": "quick", "label": "5-10 minutes (quick practice)"},
-                    {"value": "medium", "label": "20-30 minutes (focused session)"},
-                    {"value": "deep", "label": "1 hour or more (deep working)"},
-                    {"value": "extended", "label": "Multiple days (extended ritual)"}
-                ],
-                "type": "single",
-                "required": False
-            },
-            {
-                "id": "experience",
-                "question": "Your experience with ritual practice?",
-                "options": [
-                    {"value": "beginner", "label": "Complete beginner - guide me through"},
-                    {"value": "some", "label": "Some experience - I know the basics"},
-                    {"value": "regular", "label": "Regular practitioner"},
-                    {"value": "experienced", "label": "Experienced - give me depth"}
-                ],
-                "type": "single",
-                "required": False
-            },
-            {
-                "id": "environment",
-                "question": "Where will you perform this ritual?",
-                "options": [
-                    {"value": "apartment", "label": "Small apartment or room"},
-                    {"value": "house", "label": "House with private space"},
-                    {"value": "garden", "label": "Garden or outdoor space"},
-                    {"value": "nature", "label": "Woods, beach, or natural setting"},
-                    {"value": "discreet", "label": "Shared space - need to be discreet"}
-                ],
-                "type": "single",
-                "required": False
-            },
-            {
-                "id": "style",
-                "question": "What kind of ritual appeals to you most?",
-                "options": [
-                    {"value": "contemplative", "label": "Quiet contemplation and meditation"},
-                    {"value": "active", "label": "Active, movement-based practice"},
-                    {"value": "creative", "label": "Creative - writing, crafting, making"},
-                    {"value": "vocal", "label": "Vocal - singing, chanting, speaking"},
-                    {"value": "nature", "label": "Nature-based - working with elements"},
-                    {"value": "surprise", "label": "Surprise me with something new"}
-                ],
-                "type": "single",
-                "required": False
-            }
-        ],
-        "instructions": "These questions help personalize your spell. All are optional - skip any you prefer."
-    }
+    return serve_encoded(request, SPELL_CONTEXT_QUESTIONS_RESPONSE)
 
 # Archetypes endpoint - returns all archetypes data
 @api_router.get('/archetypes')
-async def get_archetypes():
+async def get_archetypes(request: Request):
     """Return all available archetypes for the frontend"""
-    archetypes = []
-    for archetype_id, persona in ARCHETYPE_PERSONAS.items():
-        archetypes.append({
-            'id': archetype_id,
-            'name': persona['name'],
-            'title': persona['title']
-        })
-    return archetypes
+    def build():
+        archetypes = []
+        for archetype_id, persona in ARCHETYPE_PERSONAS.items():
+            archetypes.append({
+                'id': archetype_id,
+                'name': persona['name'],
+                'title': persona['title']
+            })
+        return archetypes
+    return await cached_json_response(request, 'archetypes', build)
 
 @api_router.get('/sample-spells/{archetype_id}')
 async def get_sample_spells(archetype_id: str):
@@ -927,43 +1146,59 @@ async def get_all_sample_spells():
     return spells
 
 @api_router.post('/admin/seed-katherine-spells')
-async def admin_seed_katherine_spells():
+async def admin_seed_katherine_spells(force: bool = False):
     """Seed Katherine's sample spells into the database (admin only)"""
     try:
-        count = await seed_katherine_spells(db)
-        return {"message": f"Successfully seeded {count} Katherine sample spells", "count": count}
+        result = await seed_katherine_spells(db, force=force)
+        if result['changed']:
+            invalidate_response_cache()
+        return {"message": f"Successfully seeded {result['documents']} Katherine sample spells", "count": result['documents'], **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post('/admin/seed-cathleen-spells')
-async def admin_seed_cathleen_spells():
+async def admin_seed_cathleen_spells(force: bool = False):
     """Seed Cathleen's sample spells into the database (admin only)"""
     try:
-        count = await seed_cathleen_spells(db)
-        return {"message": f"Successfully seeded {count} Cathleen sample spells", "count": count}
+        result = await seed_cathleen_spells(db, force=force)
+        if result['changed']:
+            invalidate_response_cache()
+        return {"message": f"Successfully seeded {result['documents']} Cathleen sample spells", "count": result['documents'], **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post('/admin/seed-shigg-spells')
-async def admin_seed_shigg_spells():
+async def admin_seed_shigg_spells(force: bool = False):
     """Seed Shigg's sample spells into the database (admin only)"""
     try:
-        count = await seed_shigg_spells(db)
-        return {"message": f"Successfully seeded {count} Shigg sample spells", "count": count}
+        result = await seed_shigg_spells(db, force=force)
+        if result['changed']:
+            invalidate_response_cache()
+        return {"message": f"Successfully seeded {result['documents']} Shigg sample spells", "count": result['documents'], **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post('/admin/refresh-reference-data')
+async def admin_refresh_reference_data(admin_key: str):
+    """Reload in-memory reference snapshots after the archive is reseeded (admin only)"""
+    if admin_key != os.environ.get('ADMIN_KEY', 'change-me-in-production'):
+        raise HTTPException(status_code=403, detail='Unauthorized')
+    
+    await refresh_reference_context()
+    invalidate_response_cache()
+    return {'success': True, 'message': 'Reference data reloaded'}
+
 # Bird Oracle - Shigg's integrated feature
 @api_router.get('/ai/bird-oracle')
-async def get_bird_oracle():
+async def get_bird_oracle(request: Request):
     """Return Shigg's Bird Oracle data for the frontend"""
-    return {
+    return await cached_json_response(request, 'bird-oracle', lambda: {
         "success": True,
         "oracle": SHIGG_BIRD_ORACLE
-    }
+    })
 
 @api_router.post('/ai/bird-oracle-reading')
-async def get_bird_oracle_reading(request: dict):
+async def get_bird_oracle_reading(request: dict, http_request: Request):
     """Get a personalized bird oracle reading from Shigg"""
     try:
         situation = request.get('situation', '')
@@ -1012,35 +1247,28 @@ Remember: You are warm, dawn-quiet, British-inflected. Use understatement. Offer
         if not user_message:
             user_message = "The seeker asks for general guidance from the Bird Oracle today."
 
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
+        oracle_data = get_cached_reading('bird', f"{situation}\n{question}")
+        cached = oracle_data is not None
+        if not cached:
+            oracle_data = await llm_gateway.complete_json('bird_oracle', [
                 {"role": "system", "content": bird_oracle_prompt},
                 {"role": "user", "content": user_message}
-            ],
-            temperature=0.9,
-            max_tokens=1500
-        )
-        
-        response_text = response.choices[0].message.content
+            ], max_tokens=reading_output_budget('bird_oracle', 2), **admission_for(None, http_request))
+            store_reading('bird', f"{situation}\n{question}", oracle_data)
         
-        # Parse JSON
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            oracle_data = json.loads(json_match.group())
-            return {
-                "success": True,
-                "archetype": {
-                    "id": "shiggy",
-                    "name": "Shigg",
-                    "title": "The Birds of Parliament Poet Laureate"
-                },
-                "result": oracle_data
-            }
-        else:
-            raise ValueError("Could not parse bird oracle reading")
+        return {
+            "success": True,
+            "archetype": {
+                "id": "shiggy",
+                "name": "Shigg",
+                "title": "The Birds of Parliament Poet Laureate"
+            },
+            "cached": cached,
+            "result": oracle_data
+        }
             
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         logging.error(f"JSON parse error in bird oracle: {e}")
         raise HTTPException(status_code=500, detail="Failed to parse bird oracle reading")
@@ -1146,34 +1374,25 @@ async def get_corrie_tarot_reading(request: CorrieTarotRequest, user = Depends(g
         if request.question:
             user_message += f"\nTheir specific question: {request.question}"
 
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
+        reading_data = get_cached_reading('corrie', f"{request.situation}\n{request.question or ''}")
+        cached = reading_data is not None
+        if not cached:
+            reading_data = await llm_gateway.complete_json('corrie_tarot', [
                 {"role": "system", "content": CORRIE_TAROT_PROMPT},
                 {"role": "user", "content": user_message}
-            ],
-            temperature=0.9,
-            max_tokens=2000
-        )
-        
-        response_text = response.choices[0].message.content
+            ], max_tokens=reading_output_budget('corrie_tarot', 3), **admission_for(user))
+            store_reading('corrie', f"{request.situation}\n{request.question or ''}", reading_data)
         
-        # Parse JSON
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            reading_data = json.loads(json_match.group())
-            return {
-                "success": True,
-                "archetype": {
-                    "id": "shiggy",
-                    "name": "Shigg",
-                    "title": "The Birds of Parliament Poet Laureate"
-                },
-                "result": reading_data
-            }
-        else:
-            raise ValueError("Could not parse Corrie tarot reading")
+        return {
+            "success": True,
+            "archetype": {
+                "id": "shiggy",
+                "name": "Shigg",
+                "title": "The Birds of Parliament Poet Laureate"
+            },
+            "cached": cached,
+            "result": reading_data
+        }
             
     except HTTPException:
         raise
@@ -1190,6 +1409,32 @@ class CobbleOracleRequest(BaseModel):
     situation: str
     question: Optional[str] = None
     spread_type: str = "one_card"  # one_card, three_card, street_spread, etc.
+    seed: Optional[int] = None  # Replays an earlier draw - returned with every reading
+
+# Which readings are rendered locally from card data instead of by the LLM:
+#   free     - Quick Draw for free-tier users
+#   overload - any spread once COBBLES_LLM_MAX_IN_FLIGHT oracle calls are already running
+#   outage   - any spread whose LLM call fails or returns unparseable output
+COBBLES_LOCAL_RENDER = {
+    policy.strip() for policy in os.environ.get('COBBLES_LOCAL_RENDER', 'free,overload,outage').split(',') if policy.strip()
+}
+COBBLES_LLM_MAX_IN_FLIGHT = int(os.environ.get('COBBLES_LLM_MAX_IN_FLIGHT', '16'))
+cobbles_render_stats = {'local': 0, 'llm': 0, 'cache': 0, 'outage_fallbacks': 0, 'in_flight': 0}
+
+def choose_cobbles_renderer(spread_type, is_pro):
+    """Return 'local' or 'llm' for a reading according to COBBLES_LOCAL_RENDER"""
+    if 'free' in COBBLES_LOCAL_RENDER and spread_type == 'one_card' and not is_pro:
+        return 'local'
+    if 'overload' in COBBLES_LOCAL_RENDER and cobbles_render_stats['in_flight'] >= COBBLES_LLM_MAX_IN_FLIGHT:
+        return 'local'
+    return 'llm'
+
+def get_cobbles_render_metrics():
+    return {
+        'policy': sorted(COBBLES_LOCAL_RENDER),
+        'max_in_flight': COBBLES_LLM_MAX_IN_FLIGHT,
+        **cobbles_render_stats
+    }
 
 # System prompt for the enhanced Cobbles Oracle
 COBBLES_ORACLE_PROMPT = """You are Shigg's "What Would Corrie Do?" Cobbles Oracle. You use a 78-card tarot-style deck based on Coronation Street characters and locations.
@@ -1232,89 +1477,31 @@ CARD SELECTION RULES:
 
 You will receive the cards that have been pre-selected based on the user's situation. Your job is to bring them to life with personalized, specific guidance that feels like Shigg is really seeing them."""
 
+# Deck summary is fixed for the life of the process - counted and serialized once
+COBBLES_DECK_INFO_RESPONSE = static_json_payload({
+    "success": True,
+    "deck_name": COBBLES_ORACLE_DECK["deck_name"],
+    "total_cards": len(get_all_cards()),
+    "major_arcana_count": len(get_major_arcana()),
+    "minor_arcana_count": len(get_minor_arcana()),
+    "suits": ["Pints (Heart)", "Sparks (Drive)", "Keys (Truth)", "Pennies (Stability)"],
+    "spreads": ORACLE_SPREADS
+})
+
 @api_router.get('/ai/cobbles-oracle/deck')
-async def get_oracle_deck_info():
+async def get_oracle_deck_info(request: Request):
     """Return info about the Cobbles Oracle deck and available spreads"""
-    return {
-        "success": True,
-        "deck_name": COBBLES_ORACLE_DECK["deck_name"],
-        "total_cards": 78,
-        "major_arcana_count": len(COBBLES_ORACLE_DECK["major_arcana"]),
-        "minor_arcana_count": 56,
-        "suits": ["Pints (Heart)", "Sparks (Drive)", "Keys (Truth)", "Pennies (Stability)"],
-        "spreads": ORACLE_SPREADS
-    }
-
-@api_router.post('/ai/cobbles-oracle/reading')
-async def get_cobbles_oracle_reading(request: CobbleOracleRequest, user = Depends(get_current_user)):
-    """Get a Cobbles Oracle reading - Quick Draw free, advanced spreads Pro-only"""
-    try:
-        spread = ORACLE_SPREADS.get(request.spread_type, ORACLE_SPREADS["one_card"])
-        
-        # Check Pro status for advanced spreads
-        is_pro = user.get('subscription_tier', 'free') == 'paid'
-        if spread.get("pro_only", False) and not is_pro:
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "error": "feature_locked",
-                    "message": f"The {spread['name']} spread is a Pro feature",
-                    "upgrade_prompt": "Upgrade to Pro for advanced oracle spreads!"
-                }
-            )
-        
-        num_cards = len(spread["positions"])
-        situation_lower = request.situation.lower()
-        
-        # Intelligent card selection based on routing rules
-        selected_card_ids = []
-        
-        # Check for safety triggers first
-        safety_triggered = any(kw in situation_lower for kw in CARD_ROUTING_RULES["safety_triggers"]["keywords"])
-        
-        if safety_triggered:
-            # Prioritize safety cards
-            selected_card_ids = CARD_ROUTING_RULES["safety_triggers"]["priority_cards"][:num_cards]
-        else:
-            # Route based on topic
-            for topic, rules in CARD_ROUTING_RULES["topic_routing"].items():
-                if any(kw in situation_lower for kw in rules["keywords"]):
-                    selected_card_ids.extend(rules["primary_cards"])
-                    if len(selected_card_ids) < num_cards:
-                        selected_card_ids.extend(rules["secondary_cards"])
-                    break
-        
-        # If no specific routing, use Major Arcana for variety
-        if not selected_card_ids:
-            major_cards = get_major_arcana()
-            import random
-            random.shuffle(major_cards)
-            selected_card_ids = [c["id"] for c in major_cards[:num_cards]]
-        
-        # Ensure we have enough cards and no duplicates
-        selected_card_ids = list(dict.fromkeys(selected_card_ids))[:num_cards]
-        
-        # Pad with random cards if needed
-        if len(selected_card_ids) < num_cards:
-            all_cards = get_all_cards()
-            import random
-            random.shuffle(all_cards)
-            for card in all_cards:
-                if card["id"] not in selected_card_ids:
-                    selected_card_ids.append(card["id"])
-                    if len(selected_card_ids) >= num_cards:
-                        break
-        
-        # Get the actual card data
-        selected_cards = [get_card_by_id(cid) for cid in selected_card_ids if get_card_by_id(cid)]
-        
-        # Build the AI prompt with the selected cards
-        cards_info = ""
-        for i, card in enumerate(selected_cards):
-            position = spread["positions"][i] if i < len(spread["positions"]) else f"Card {i+1}"
-            cards_info += f"\nPosition: {position}\nCard: {card['name']} ({card['symbol']})\nCore: {card['core']}\nAdvice: {', '.join(card['advice'])}\nShadow: {card['shadow']}\nBlessing: {card['blessing']}\nCharm: {card['charm']}\nMantra: {card['mantra']}\n"
-        
-        oracle_prompt = f"""{COBBLES_ORACLE_PROMPT}
+    return serve_encoded(request, COBBLES_DECK_INFO_RESPONSE)
+
+async def render_llm_reading(request: CobbleOracleRequest, spread, selected_cards, admission: dict):
+    """Have the LLM personalize the drawn cards for the seeker's situation"""
+    # Build the AI prompt with the selected cards
+    cards_info = ""
+    for i, card in enumerate(selected_cards):
+        position = spread["positions"][i] if i < len(spread["positions"]) else f"Card {i+1}"
+        cards_info += f"\nPosition: {position}\nCard: {card['name']} ({card['symbol']})\nCore: {card['core']}\nAdvice: {', '.join(card['advice'])}\nShadow: {card['shadow']}\nBlessing: {card['blessing']}\nCharm: {card['charm']}\nMantra: {card['mantra']}\n"
+    
+    oracle_prompt = f"""{COBBLES_ORACLE_PROMPT}
 
 CARDS DRAWN FOR THIS READING:
 {cards_info}
@@ -1349,44 +1536,85 @@ Return JSON:
     "closing": "Warm Shigg closing (1-2 sentences)"
 }}"""
 
-        user_message = f"Seeker's situation: {request.situation}"
-        if request.question:
-            user_message += f"\nTheir question: {request.question}"
+    user_message = f"Seeker's situation: {request.situation}"
+    if request.question:
+        user_message += f"\nTheir question: {request.question}"
+    
+    # A single card is light work - Quick Draw runs on the smaller model
+    feature = 'cobbles_quick_draw' if len(selected_cards) == 1 else 'cobbles_oracle'
+    return await llm_gateway.complete_json(feature, [
+        {"role": "system", "content": oracle_prompt},
+        {"role": "user", "content": user_message}
+    ], max_tokens=reading_output_budget('cobbles_oracle', len(selected_cards)), **admission)
+
+@api_router.post('/ai/cobbles-oracle/reading')
+async def get_cobbles_oracle_reading(request: CobbleOracleRequest, user = Depends(get_current_user)):
+    """Get a Cobbles Oracle reading - Quick Draw free, advanced spreads Pro-only"""
+    try:
+        spread = ORACLE_SPREADS.get(request.spread_type, ORACLE_SPREADS["one_card"])
         
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": oracle_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.9,
-            max_tokens=2500
-        )
+        # Check Pro status for advanced spreads
+        is_pro = user.get('subscription_tier', 'free') == 'paid'
+        if spread.get("pro_only", False) and not is_pro:
+            raise HTTPException(
+                status_code=403,
+                detail={
+                    "error": "feature_locked",
+                    "message": f"The {spread['name']} spread is a Pro feature",
+                    "upgrade_prompt": "Upgrade to Pro for advanced oracle spreads!"
+                }
+            )
         
-        response_text = response.choices[0].message.content
+        num_cards = len(spread["positions"])
         
-        # Parse JSON
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            reading_data = json.loads(json_match.group())
-            
-            # Add safety note if triggered
-            if safety_triggered:
-                reading_data["safety_note"] = "If you're in immediate danger, please contact local emergency services or a crisis helpline. Your safety matters."
-            
-            return {
-                "success": True,
-                "archetype": {
-                    "id": "shiggy",
-                    "name": "Shigg",
-                    "title": "The Birds of Parliament Poet Laureate"
-                },
-                "spread_type": request.spread_type,
-                "result": reading_data
-            }
-        else:
-            raise ValueError("Could not parse oracle reading")
+        # Intelligent card selection based on routing rules
+        routing = route_situation(request.situation)
+        safety_triggered = routing["safety"]
+        seed, rng = make_draw_rng(request.seed)
+        selected_cards = draw_cards(routing, num_cards, rng)
+        
+        spread_type = request.spread_type if request.spread_type in ORACLE_SPREADS else "one_card"
+        rendered_by = choose_cobbles_renderer(spread_type, is_pro)
+        # Only LLM readings are worth caching; local renders cost microseconds
+        cache_text = f"{request.situation}\n{request.question or ''}"
+        cache_scope = (spread_type,) + tuple(card["id"] for card in selected_cards)
+        if rendered_by == 'llm':
+            reading_data = get_cached_reading('cobbles', cache_text, cache_scope)
+            if reading_data is not None:
+                rendered_by = 'cache'
+        if rendered_by == 'llm':
+            cobbles_render_stats['in_flight'] += 1
+            try:
+                reading_data = await render_llm_reading(request, spread, selected_cards, admission_for(user))
+                store_reading('cobbles', cache_text, reading_data, cache_scope)
+            except Exception as e:
+                if 'outage' not in COBBLES_LOCAL_RENDER:
+                    raise
+                logging.error(f"Cobbles Oracle LLM unavailable, rendering locally: {str(e)}")
+                cobbles_render_stats['outage_fallbacks'] += 1
+                rendered_by = 'local'
+            finally:
+                cobbles_render_stats['in_flight'] -= 1
+        if rendered_by == 'local':
+            reading_data = render_local_reading(spread, selected_cards, routing)
+        cobbles_render_stats[rendered_by] += 1
+        
+        # Add safety note if triggered
+        if safety_triggered:
+            reading_data["safety_note"] = "If you're in immediate danger, please contact local emergency services or a crisis helpline. Your safety matters."
+        
+        return {
+            "success": True,
+            "archetype": {
+                "id": "shiggy",
+                "name": "Shigg",
+                "title": "The Birds of Parliament Poet Laureate"
+            },
+            "spread_type": request.spread_type,
+            "seed": seed,
+            "rendered_by": rendered_by,
+            "result": reading_data
+        }
             
     except HTTPException:
         raise
@@ -1550,7 +1778,7 @@ Return a JSON object with 2-3 ward suggestions, each deeply personalized:
 Remember: You are Cathleen. Speak with warmth, wisdom, and the quiet certainty of someone who has kept secrets for duchesses and factory girls alike. These wards are not generic—they are GIFTS you are choosing specifically for this seeker."""
 
 @api_router.post('/ai/suggest-ward')
-async def suggest_ward(request: WardRequest):
+async def suggest_ward(request: WardRequest, http_request: Request):
     """Cathleen's Ward Finder - suggests personalized wards based on the seeker's situation"""
     try:
         # Build the user message
@@ -1567,36 +1795,30 @@ async def suggest_ward(request: WardRequest):
         
         user_message += "\n\nPlease suggest 2-3 wards that would be perfect for them. Remember to vary your suggestions and make them specific to THIS person."
         
-        # Call OpenAI
-        response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
+        # Personality and preferences shape the wards, so they must match exactly
+        ward_scope = (request.personality or '', json.dumps(request.preferences or {}, sort_keys=True))
+        ward_data = get_cached_reading('ward', request.situation, ward_scope)
+        cached = ward_data is not None
+        if not cached:
+            ward_data = await llm_gateway.complete_json('ward_finder', [
                 {"role": "system", "content": WARD_FINDER_PROMPT},
                 {"role": "user", "content": user_message}
-            ],
-            temperature=0.9,  # Higher temperature for more variety
-            max_tokens=2000
-        )
-        
-        response_text = response.choices[0].message.content
+            ], max_tokens=reading_output_budget('ward_finder', 3), **admission_for(None, http_request))
+            store_reading('ward', request.situation, ward_data, ward_scope)
         
-        # Parse JSON from response
-        import re
-        json_match = re.search(r'\{[\s\S]*\}', response_text)
-        if json_match:
-            ward_data = json.loads(json_match.group())
-            return {
-                "success": True,
-                "archetype": {
-                    "id": "kathleen",
-                    "name": "Cathleen",
-                    "title": "The Singer of Strength"
-                },
-                "result": ward_data
-            }
-        else:
-            raise ValueError("Could not parse ward suggestions")
+        return {
+            "success": True,
+            "archetype": {
+                "id": "kathleen",
+                "name": "Cathleen",
+                "title": "The Singer of Strength"
+            },
+            "cached": cached,
+            "result": ward_data
+        }
             
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         logging.error(f"JSON parse error in ward suggestion: {e}")
         raise HTTPException(status_code=500, detail="Failed to parse ward suggestions")
@@ -1897,486 +2119,281 @@ romantic symbolism of mortality and transformation, no color - strictly black in
     'neutral': 'vintage occult grimoire illustration, woodcut engraving style, parchment texture, mystical symbols, 1920s-1940s esoteric art'
 }
 
+# Static prompt blocks per archetype, compiled once at import
+SPELL_PROMPTS = compile_spell_prompts(ARCHETYPE_PERSONAS, DEFAULT_SYSTEM_MESSAGE, KATHERINE_MATERIALS, CATHLEEN_MATERIALS)
+
+# Snapshot of the seeded reference collections that spell prompts cite.
+# Loaded at startup and after /admin/refresh-reference-data; once older than
+# REFERENCE_CONTEXT_REFRESH_SECONDS it is re-read in the background, which picks
+# up reseeds done out-of-process with seed_data.py.
+REFERENCE_CONTEXT_REFRESH_SECONDS = float(os.environ.get('REFERENCE_CONTEXT_REFRESH_SECONDS', '600'))
+reference_context = {'db_context': '', 'loaded_at': None, 'refresh_task': None}
+
+async def refresh_reference_context():
+    """Rebuild the archive context string from deities, rituals and figures"""
+    deities = await db.deities.find({}, {'_id': 0, 'name': 1}).to_list(10)
+    rituals = await db.rituals.find({}, {'_id': 0, 'name': 1}).to_list(10)
+    figures = await db.historical_figures.find({}, {'_id': 0, 'name': 1}).to_list(10)
+    
+    db_context = ""
+    if deities:
+        db_context += f"\nRELEVANT DEITIES FROM OUR ARCHIVE: {', '.join([d['name'] for d in deities])}"
+    if rituals:
+        db_context += f"\nRELEVANT RITUALS FROM OUR ARCHIVE: {', '.join([r['name'] for r in rituals])}"
+    if figures:
+        db_context += f"\nHISTORICAL FIGURES TO REFERENCE: {', '.join([f['name'] for f in figures])}"
+    
+    reference_context['db_context'] = db_context
+    reference_context['loaded_at'] = time.monotonic()
+
+async def _refresh_reference_context_quietly():
+    try:
+        await refresh_reference_context()
+    except Exception as e:
+        logging.error(f'Reference context refresh failed: {str(e)}')
+
+def get_reference_context() -> str:
+    """Return the cached archive context, scheduling a refresh when stale"""
+    loaded_at = reference_context['loaded_at']
+    stale = loaded_at is None or time.monotonic() - loaded_at > REFERENCE_CONTEXT_REFRESH_SECONDS
+    task = reference_context['refresh_task']
+    if stale and (task is None or task.done()):
+        reference_context['refresh_task'] = asyncio.create_task(_refresh_reference_context_quietly())
+    return reference_context['db_context']
+
 # Enhanced spell generation endpoint with structured output
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[dict]:
+    """Resolve the bearer token if one was sent; anonymous callers get None"""
+    if not credentials:
+        return None
+    try:
+        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        return await load_user(payload.get('user_id'))
+    except Exception:
+        return None  # Anonymous user
+
+async def enforce_spell_generation_limit(user: Optional[dict]):
+    """Raise 403 when an authenticated free user has used up their spells"""
+    if not user:
+        return
+    limit_check = await check_spell_generation_limit(user)
+    if not limit_check['can_generate']:
+        raise HTTPException(
+            status_code=403, 
+            detail={
+                'error': 'spell_limit_reached',
+                'message': f"You've reached your limit of {limit_check['limit']} free spells. Upgrade to Pro for unlimited spell generation!",
+                'limit': limit_check['limit'],
+                'current_count': limit_check['current_count']
+            }
+        )
+
+def resolve_spell_archetype(archetype_id: Optional[str]) -> dict:
+    """Return the id/name/title block used in spell responses"""
+    if archetype_id and archetype_id in ARCHETYPE_PERSONAS:
+        persona = ARCHETYPE_PERSONAS[archetype_id]
+        return {'id': archetype_id, 'name': persona['name'], 'title': persona['title']}
+    return {'id': None, 'name': 'The Crowlands Guide', 'title': 'Keeper of Ancestral Wisdom'}
+
+def build_spell_messages(request: SpellRequest, archetype_id: Optional[str]) -> List[dict]:
+    """Assemble the system and user messages for a spell generation call"""
+    compiled = SPELL_PROMPTS.get(archetype_id) or SPELL_PROMPTS[None]
+    
+    # Archive context comes from the in-memory snapshot - no database reads here
+    structured_prompt = assemble_spell_prompt(
+        compiled,
+        request.intention,
+        db_context=get_reference_context(),
+        context=request.context
+    )
+    
+    return [
+        {"role": "system", "content": compiled['system']},
+        {"role": "user", "content": structured_prompt}
+    ]
+
+def parse_spell_response(response: str) -> Tuple[dict, bool]:
+    """Parse the model's spell JSON -> (spell, truncated), falling back to the raw text on failure"""
+    try:
+        # truncated: the reply ran out of tokens and only its complete fields were kept
+        return llm_gateway.parse_json_reply('spell', response)
+    except ValueError:
+        # If JSON parsing fails, return the raw response
+        return {
+            'title': 'Your Custom Spell',
+            'raw_response': response,
+            'parse_error': True
+        }, False
+
+def build_spell_image_prompt(intention: str, archetype_id: Optional[str]) -> str:
+    """Derive the header image prompt from the request itself.
+    
+    The prompt no longer waits for the spell's own image_prompt field, so the
+    image can render while the text completion is still running.
+    """
+    style = ARCHETYPE_IMAGE_STYLES.get(archetype_id or 'neutral', ARCHETYPE_IMAGE_STYLES['neutral'])
+    subject = ' '.join(intention.split())[:300]
+    return f"{style}, symbolic illustration of a ritual for: {subject}, mystical ritual scene, no text"
+
+async def generate_spell_image(image_prompt: str, admission: dict) -> Optional[str]:
+    """Render the spell header image; failures are logged and yield None"""
+    try:
+        return await llm_gateway.generate_image('spell_image', image_prompt, **admission)
+    except Exception as img_error:
+        logging.error(f'Spell image generation error: {str(img_error)}')
+    return None
+
+def start_spell_image_task(request: SpellRequest, archetype_id: Optional[str], admission: dict) -> Optional[asyncio.Task]:
+    """Kick off image generation in the background if the request wants one"""
+    if not request.generate_image:
+        return None
+    return asyncio.create_task(generate_spell_image(build_spell_image_prompt(request.intention, archetype_id), admission))
+
+async def record_spell_generation(user: Optional[dict]) -> Optional[dict]:
+    """Count the spell against a free user's allowance and return limit_info"""
+    if not user:
+        return None
+    
+    # Increment spell count for authenticated free users
+    if user.get('subscription_tier') == 'free':
+        await increment_spell_count(user['id'])
+    
+    # Get updated limit info for response
+    updated_user = await load_user(user['id'])
+    limit_check = await check_spell_generation_limit(updated_user)
+    return {
+        'remaining': limit_check['remaining'],
+        'limit': limit_check['limit'],
+        'subscription_tier': user.get('subscription_tier', 'free')
+    }
+
 @api_router.post('/ai/generate-spell')
 async def generate_spell(
     request: SpellRequest,
+    http_request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
 ):
     """Generate a structured spell with historical context and optional imagery"""
     try:
-        # Check if user is authenticated
-        user = None
-        if credentials:
-            try:
-                token = credentials.credentials
-                payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-                user_id = payload.get('user_id')
-                user = await db.users.find_one({'id': user_id}, {'_id': 0})
-            except:
-                pass  # Anonymous user
+        user = await get_optional_user(credentials)
         
         # Check generation limits for authenticated users
-        if user:
-            limit_check = await check_spell_generation_limit(user)
-            if not limit_check['can_generate']:
-                raise HTTPException(
-                    status_code=403, 
-                    detail={
-                        'error': 'spell_limit_reached',
-                        'message': f"You've reached your limit of {limit_check['limit']} free spells. Upgrade to Pro for unlimited spell generation!",
-                        'limit': limit_check['limit'],
-                        'current_count': limit_check['current_count']
-                    }
-                )
+        await enforce_spell_generation_limit(user)
         
         session_id = str(uuid.uuid4())
-        archetype_id = request.archetype
-        
-        # Get archetype info
-        if archetype_id and archetype_id in ARCHETYPE_PERSONAS:
-            persona = ARCHETYPE_PERSONAS[archetype_id]
-            archetype_name = persona['name']
-            archetype_title = persona['title']
-        else:
-            archetype_id = None
-            archetype_name = 'The Crowlands Guide'
-            archetype_title = 'Keeper of Ancestral Wisdom'
+        archetype = resolve_spell_archetype(request.archetype)
+        messages = build_spell_messages(request, archetype['id'])
+        admission = admission_for(user, http_request)
         
-        # Fetch related content from database for context
-        deities = await db.deities.find({}, {'_id': 0, 'name': 1, 'description': 1}).to_list(10)
-        rituals = await db.rituals.find({}, {'_id': 0, 'name': 1, 'description': 1}).to_list(10)
-        figures = await db.historical_figures.find({}, {'_id': 0, 'name': 1, 'bio': 1}).to_list(10)
-        
-        # Build context from database
-        db_context = ""
-        if deities:
-            db_context += f"\\nRELEVANT DEITIES FROM OUR ARCHIVE: {', '.join([d['name'] for d in deities])}"
-        if rituals:
-            db_context += f"\\nRELEVANT RITUALS FROM OUR ARCHIVE: {', '.join([r['name'] for r in rituals])}"
-        if figures:
-            db_context += f"\\nHISTORICAL FIGURES TO REFERENCE: {', '.join([f['name'] for f in figures])}"
-        
-        # Build personalization context from leading questions (if provided)
-        personalization_context = ""
-        if request.context:
-            ctx = request.context
-            personalization_parts = []
-            
-            if ctx.get('materials'):
-                materials_list = ctx['materials'] if isinstance(ctx['materials'], list) else [ctx['materials']]
-                personalization_parts.append(f"SEEKER HAS ACCESS TO: {', '.join(materials_list)} - prioritize using these materials")
-            
-            if ctx.get('time'):
-                time_map = {
-                    'quick': 'KEEP IT BRIEF: Seeker has only 5-10 minutes. Create a focused, simple ritual.',
-                    'medium': 'MODERATE LENGTH: Seeker has 20-30 minutes. Include proper setup and closing.',
-                    'deep': 'DEEP WORKING: Seeker has 1+ hours. Create a rich, multi-layered ritual.',
-                    'extended': 'EXTENDED RITUAL: Seeker can work over multiple days. Include preparation, main working, and integration phases.'
-                }
-                personalization_parts.append(time_map.get(ctx['time'], ''))
-            
-            if ctx.get('experience'):
-                exp_map = {
-                    'beginner': 'BEGINNER SEEKER: Explain everything clearly. Include detailed instructions and why each step matters. Avoid jargon.',
-                    'some': 'SOME EXPERIENCE: Seeker knows basics. Include intermediate techniques but explain unusual elements.',
-                    'regular': 'REGULAR PRACTITIONER: Can assume familiarity with standard practices. Include some advanced elements.',
-                    'experienced': 'EXPERIENCED PRACTITIONER: Include depth, nuance, and advanced variations. Can use technical language.'
-                }
-                personalization_parts.append(exp_map.get(ctx['experience'], ''))
-            
-            if ctx.get('environment'):
-                env_map = {
-                    'apartment': 'SMALL SPACE: Design for apartment living. Minimize smoke, large flames, or loud sounds.',
-                    'house': 'PRIVATE SPACE: Can include candles, incense, and vocal work without concern.',
-                    'garden': 'OUTDOOR SPACE: Include earth-touching elements, weather-dependent timing, natural materials.',
-                    'nature': 'NATURE SETTING: Fully embrace outdoor elements—trees, water, sky, earth. Include walking or movement.',
-                    'discreet': 'DISCRETION NEEDED: Design for shared/public spaces. Use portable, inconspicuous tools. Internal/silent variations.'
-                }
-                personalization_parts.append(env_map.get(ctx['environment'], ''))
-            
-            if ctx.get('style'):
-                style_map = {
-                    'contemplative': 'CONTEMPLATIVE STYLE: Emphasize meditation, visualization, breath work, stillness.',
-                    'active': 'ACTIVE STYLE: Include movement, walking, physical actions, gesture magic.',
-                    'creative': 'CREATIVE STYLE: Center the ritual around making something—writing, crafting, drawing, sewing.',
-                    'vocal': 'VOCAL STYLE: Emphasize singing, chanting, spoken word, humming, breath as sound.',
-                    'nature': 'NATURE-BASED: Work with elements—water, earth, fire, air, plants, stones, weather.',
-                    'surprise': 'SURPRISE THE SEEKER: Include unexpected elements, unusual combinations, fresh approaches.'
-                }
-                personalization_parts.append(style_map.get(ctx['style'], ''))
-            
-            if personalization_parts:
-                personalization_context = "\\n\\nSEEKER PERSONALIZATION:\\n" + "\\n".join([p for p in personalization_parts if p])
-        
-        # Add Katherine-specific context when she is the selected archetype
-        katherine_context = ""
-        if archetype_id == 'catherine':
-            katherine_materials = ", ".join([m['name'] for m in KATHERINE_MATERIALS['signature_materials'][:6]])
-            katherine_context = f"""
-
-KATHERINE'S CRAFT-BASED MATERIALS (prefer these over traditional materials):
-{katherine_materials}
-
-KATHERINE'S MATERIAL CORRESPONDENCES:
-- Use THREAD instead of candles (white silk = purity, black silk = protection, red wool = life force)
-- Use PINS instead of salt circles (seven pins create a boundary)
-- Use SCISSORS instead of athame (tailor's scissors cut ties and sever connections)
-- Use BONE NEEDLE instead of wand (directs intention, pierces the veil)
-- Use THIMBLE instead of cauldron (contains and protects)
-- Use BLACK SILK for scrying instead of mirrors
-
-KATHERINE'S SÉANCE METHODOLOGY (include when relevant):
-- Red light conditions for spirit work (preserves night vision)
-- Table-tapping codes: 1 knock = yes, 2 = no, 3 = uncertain
-- Automatic writing with relaxed hand, suspended judgment
-- ALWAYS include testing protocols - never accept spirit communication blindly
-- Protection through iron (scissors) to break unwanted connections
-
-KATHERINE'S HISTORICAL SOURCES TO CITE:
-- Sir Oliver Lodge, 'Raymond, or Life and Death' (1916) - spirit communication methodology
-- F.W.H. Myers, 'Human Personality and Its Survival of Bodily Death' (1903) - SPR research
-- Dion Fortune, 'Psychic Self-Defence' (1930) - protection techniques
-- Society for Psychical Research, 'Proceedings' (1920s) - testing protocols
-- Traditional Spitalfields weaving practices - textile as sympathetic magic
-
-KATHERINE'S FIVE DARK MAGIC CATEGORIES (structure spells around these):
-1. Shadow Integration - facing and transforming grief/anger/fear
-2. Night Magic - liminal consciousness, spirit communication, prophecy
-3. Protective Dark Magic - binding, sealing, personal power
-4. Divination in Darkness - scrying, hidden knowledge
-5. Ancestor & Grief Work - honoring the dead, ancestral wounds
-
-KATHERINE'S SIGNATURE RITUAL ELEMENTS:
-- "The needle knows what the mind forgets" - include needle/thread work
-- Midnight as the liminal hour for most potent work
-- Crows and magpies as messengers (not omens of evil)
-- Integration over banishment - face what is veiled, don't cast it out
-- Huguenot precision - test everything, accept nothing blindly
-"""
-        
-        # Add Cathleen-specific context when she is the selected archetype
-        cathleen_context = ""
-        if archetype_id == 'kathleen':
-            cathleen_materials = ", ".join([m['name'] for m in CATHLEEN_MATERIALS['signature_materials'][:6]])
-            cathleen_context = f"""
-
-CATHLEEN'S CORE IDENTITY (emphasize these unique elements - DIFFERENT FROM KATHERINE):
-- VOICE AS PRIMARY MAGIC (not craft): Her powerful soprano voice is her greatest talisman. Singing is not performance—it is spellwork. Humming, singing, and spoken incantations are her tools. Katherine uses needle and thread; Cathleen uses voice and breath.
-- BRITISH SPIRITUALISM (not psychical research): Cathleen's practice is rooted in WARM, PRACTICAL spiritualism—home circles, table-tipping, healing nights—the kind that offered COMFORT during WWI/WWII grief. This is NOT Katherine's intellectual SPR-style testing and documentation.
-- COMFORT & HEALING FOCUS: Cathleen serves those seeking comfort after loss, connection with departed loved ones, and hope. Katherine serves those seeking hidden knowledge and shadow integration.
-- THE MORRIGAN CONNECTION: Irish witchcraft flows through her. Darkness is not to be feared but integrated. True power is forged in hardship.
-- PSYCHIC INTUITION: Premonitions, meaningful dreams, moments of knowing. She TRUSTS these gifts; she doesn't "test" them like Katherine would.
-- WARDS & TALISMANS: She MUST suggest a ward/talisman with EVERY spell—silver animals, brooches, feathers, buttons.
-
-CATHLEEN'S SIGNATURE MATERIALS (prefer these):
-{cathleen_materials}
-
-HOW CATHLEEN DIFFERS FROM KATHERINE (critical distinction):
-- KATHERINE: Intellectual rigor, testing spirits, SPR methodology, demanding proof, craft-based needle/thread magic, séance PROTOCOLS
-- CATHLEEN: Loving trust, comfort-focused, home circle warmth, psychic intuition, VOICE-based magic, healing and hope
-
-CATHLEEN'S SPIRITUALIST PRACTICES (use these, not Katherine's craft methods):
-- TABLE-TIPPING: "Hands lightly on the table, ask your question, wait for the knock. One for yes, two for no."
-- HOME CIRCLES: "We gather in the front room with trusted friends—prayers, hands joined, messages received."
-- HEALING NIGHTS: "When grief is heavy, we sit together and share it. Hands on shoulders, humming, breathing as one."
-- PSYCHIC INTUITION: "Trust your dreams, your premonitions, those moments when you simply KNOW."
-- VOICE MAGIC: "Hum a protection into being. Sing to seal a working. Your breath carries intention."
-
-CATHLEEN'S FIVE CATEGORIES OF MAGIC (structure spells around these):
-1. VOICE MAGIC - Singing protection, humming shields, spoken incantations, breath as power
-2. COMFORT & HEALING - Processing grief, finding hope, connecting with the departed through love (not testing)
-3. SPIRITUALIST PRACTICES - Table-tipping, home circles, healing nights, receiving messages
-4. WARDS & TALISMANS - Finding, blessing, and carrying protective objects
-5. THE MORRIGAN'S WISDOM - Shadow integration, transformation, but with warmth and hope
-
-CATHLEEN'S HISTORICAL SOURCES TO CITE (Spiritualist tradition, not SPR):
-- Gladys Osborne Leonard, 'My Life in Two Worlds' (1931) - Britain's most famous medium
-- Sir Oliver Lodge, 'Raymond, or Life and Death' (1916) - a father's love and messages from his fallen son
-- Psychic News (founded 1932) - "a sitting," "a circle," "a message"
-- Maurice Barbanell and the Silver Birch teachings
-- The College of Psychic Studies, London
-- Home circle traditions: "We don't need a church—just a kitchen table and trust"
-- Lady Gregory, 'Gods and Fighting Men' (1904) - for Morrigan references
-- W.Y. Evans-Wentz, 'The Fairy-Faith in Celtic Countries' (1911) - Irish protective traditions
-
-CATHLEEN'S WARD SUGGESTIONS (include one with every spell):
-- Silver Rabbit: luck, quick thinking, maternal protection
-- Silver Owl: wisdom, night vision, seeing truth
-- Silver Raven: transformation, Morrigan's blessing
-- Crow Feather: magic, ancestral connection
-- Symbolic Brooch: protection worn close to heart
-- Lucky Button: holding things together
-- Small Stone: grounding, endurance
-
-CATHLEEN'S VOICE (how she speaks—WARMER than Katherine):
-- Warm, maternal, comforting—but never condescending
-- Practical—"I've dressed duchesses and factory girls alike"
-- Discreet—"Loose lips sink ships shaped my whole generation"
-- HOPEFUL—where Katherine might say "test the spirits," Cathleen says "trust what you feel"
-- Often says: "The dead are not gone; they simply wait in the next room"
-- Often says: "Strength is not the absence of softness, but the refusal to break"
-
-MANDATORY FOR CATHLEEN SPELLS:
-1. Include a "suggested_ward" object in your JSON with: name, symbol (emoji), meaning, and how_to_find
-2. Include a song, hum, or vocal element to seal the working
-3. Include words of COMFORT and HOPE—not just instruction
-4. Reference home circle/spiritualist practices rather than formal séance methodology
-5. When dealing with grief, emphasize CONNECTION and LOVE, not just "communication protocols"
-6. IF the spell involves secrets, protection, privacy, hiding, or discretion—include a "concealment_suggestion" object
-
-CATHLEEN'S SUGGESTED_WARD FORMAT (REQUIRED for all Cathleen spells):
-Add this field to your JSON response:
-"suggested_ward": {{
-    "name": "Silver Rabbit" or "Crow Feather" or another ward from the list,
-    "symbol": "🐇" or "🪶" or appropriate emoji,
-    "meaning": "What this ward represents and why it's right for this seeker (1-2 sentences)",
-    "how_to_find": "Practical advice on where/how to find this ward (antique shops, nature walks, family jewelry, etc.)",
-    "activation": "Brief instruction on how to activate/bond with the ward once found"
-}}
-
-CATHLEEN'S CONCEALMENT SUGGESTION (OPTIONAL - include when contextually appropriate):
-If the seeker's intention involves SECRETS, PRIVACY, PROTECTION, HIDING something precious, or DISCRETION, add:
-"concealment_suggestion": {{
-    "title": "Keep Your Secrets Close",
-    "historical_inspiration": "Brief true story from WWII tradecraft (button compasses, hairbrush compartments, seam hiding, compact mirrors, etc.)",
-    "your_adaptation": "How the seeker can adapt this to hide their spell, intention, ward, or private items in a household object",
-    "suggested_items": ["List of everyday objects that could work: locket, coat lining, book hollow, button, compact, etc."],
-    "cathleen_note": "A warm personal note about why discretion matters and how hiding something makes it more powerful"
-}}
-
-WWII CONCEALMENT EXAMPLES CATHLEEN KNOWS:
-- Button Compass: MI9 hid compasses in ordinary buttons; Sister Sylvia Muir carried one as a POW
-- Hairbrush Compartment: SOE brushes with hidden space beneath bristles for maps and tools
-- Compact Mirror: CIA compacts with messages visible only at certain angles
-- Seam Hiding: Messages and maps sewn into clothing linings—tailors were essential to operations
-- Pendant Pouch: Compasses sealed and worn around neck, looking like simple pendants
-- Hollow Books: Centuries-old tradition; wartime books hid everything from maps to radio parts
-- Coin Concealment: Hollow coins with microdots or tiny messages, carried as pocket change
-
-Cathleen believes: "What you hide becomes charged with the energy of protection. The act of concealment is itself a spell—intention wrapped in discretion. Loose lips sink ships, but quiet magic runs deep."
-"""
-
-        # Build the structured prompt
-        structured_prompt = f"""Create a spell/ritual for this intention: "{request.intention}"
-
-You MUST respond with a JSON object in this EXACT format (no markdown, just pure JSON):
-{{
-    "tarot_card": {{
-        "title": "Short evocative title (3-5 words max)",
-        "symbol": "A single emoji or symbol that represents this spell",
-        "essence": "One sentence capturing the core purpose (under 15 words)",
-        "key_action": "The single most important action to take (under 20 words)",
-        "incantation": "A brief, memorable phrase of power (under 15 words)",
-        "timing": "When to perform, very brief (e.g., 'Full Moon, Midnight')",
-        "warning": "One line caution if needed (under 15 words)"
-    }},
-    "title": "A poetic, evocative title for this spell",
-    "subtitle": "A brief tagline or description (10 words max)",
-    "introduction": "A 2-3 sentence personal introduction in your voice, speaking directly to the seeker",
-    "materials": [
-        {{"name": "Material name", "icon": "candle|herb|crystal|feather|water|fire|moon|sun|book|pen|mirror|salt|oil|incense|bell|cord|photo|bowl", "note": "Brief note on why/how to use"}},
-    ],
-    "timing": {{
-        "moon_phase": "New Moon|Waxing|Full Moon|Waning|Any",
-        "time_of_day": "Dawn|Morning|Noon|Dusk|Night|Midnight|Any",
-        "day": "Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Any",
-        "note": "Brief explanation of timing significance"
-    }},
-    "steps": [
-        {{"number": 1, "title": "Step title", "instruction": "Detailed instruction", "duration": "5 minutes", "note": "Optional tip or variation"}}
-    ],
-    "spoken_words": {{
-        "invocation": "Words to speak at the beginning (can be poetry, affirmation, or prayer)",
-        "main_incantation": "The central words of power for this spell",
-        "closing": "Words to seal and close the ritual"
-    }},
-    "historical_context": {{
-        "tradition": "Name the magical tradition this draws from",
-        "time_period": "The relevant era for this practice",
-        "practitioners": ["Historical figures who used similar practices"],
-        "sources": [
-            {{"author": "Author name", "work": "Book/work title", "year": 1930, "relevance": "How this source relates to the spell"}}
-        ],
-        "cultural_notes": "Any important cultural or historical context"
-    }},
-    "variations": [
-        {{"name": "Variation name", "description": "How to adapt for different needs"}}
-    ],
-    "warnings": ["Any cautions or ethical considerations"],
-    "closing_message": "A personal message of encouragement in your voice",
-    "image_prompt": "A detailed prompt to generate a header image for this spell (describe visual elements, mood, symbols)",
-    "suggested_ward": {{
-        "name": "Name of the ward or talisman (FOR CATHLEEN ONLY - omit for other archetypes)",
-        "symbol": "Emoji representing the ward",
-        "meaning": "What this ward represents and why it's right for this seeker",
-        "how_to_find": "Where/how to find this ward",
-        "activation": "How to activate/bond with the ward"
-    }}
-}}
-
-NOTE: The "suggested_ward" field is REQUIRED for Cathleen spells and OPTIONAL for others.
-
-CRITICAL GUIDELINES FOR RICH, VARIED SPELLS:
-
-1. DRAW FROM DIVERSE SPIRITUAL TRADITIONS (not just 1900s Britain):
-   - Ancient Celtic & Irish practices (Druids, bean feasa, Morrigan traditions)
-   - Medieval grimoire traditions (cunning craft, herbalism, protective charms)
-   - Victorian & Edwardian spiritualism (séances, mediumship, psychical research)
-   - Folk magic from multiple cultures (hoodoo, hedge witchcraft, kitchen magic)
-   - Theosophical & Golden Dawn influences
-   - Modern psychological frameworks (shadow work, ritual psychology)
-   - Indigenous wisdom traditions (where appropriate and respectful)
-   While speaking in the voice of your era (1900s-1940s Britain), draw wisdom from ALL reliable sources.
-
-2. AVOID REPETITIVE MATERIALS - vary your suggestions:
-   - Don't always suggest candles—consider: oil lamps, lanterns, firelight, starlight
-   - Don't always suggest salt—consider: iron filings, brick dust, ash, blessed water
-   - Don't always suggest crystals—consider: river stones, shells, bones, coins, buttons
-   - Don't always suggest herbs—consider: tree bark, flower petals, seeds, roots, moss
-   - Rotate through categories: found objects, household items, natural materials, symbolic objects
-   - Consider what the seeker might ALREADY HAVE access to
-
-3. MAKE EACH SPELL UNIQUE:
-   - Vary the structure: some spells are single-action, some are elaborate multi-day workings
-   - Vary the timing: not always full moon/midnight—dawn, dusk, rainy days, first frost
-   - Vary the approach: some contemplative, some active, some creative, some destructive
-   - Create unexpected combinations: sewing + singing, cooking + meditation, walking + incantation
-   - Include at least one surprising or unusual element in each spell
-
-4. PERSONALIZATION BASED ON CONTEXT:
-   - If seeker mentions specific materials they have, incorporate those
-   - If seeker mentions time constraints, offer abbreviated versions
-   - If seeker mentions specific challenges, address those directly
-   - Consider the seeker's likely environment (apartment vs. house, urban vs. rural)
-
-5. HISTORICAL SOURCES - BE EXPANSIVE:
-   - Cite sources from MULTIPLE eras, not just 1920s-1940s
-   - Include folklore collections (Briggs, Frazer, Campbell)
-   - Include practical magic texts (Agrippa, Leland, Valiente)
-   - Include spiritual memoirs and autobiographies
-   - Include academic studies on folk practice
-   - Make historical_context genuinely EDUCATIONAL and surprising
-
-6. THE TAROT CARD SUMMARY must be BRIEF - all fields under 20 words
-7. Include 4-8 VARIED materials with appropriate icons
-8. Include 5-8 detailed steps - but vary the complexity
-9. The spoken_words should feel authentic, poetic, and MEMORABLE
-{katherine_context}{cathleen_context}{db_context}{personalization_context}
-
-Respond ONLY with the JSON object, no other text."""
-
-        # Get system message based on archetype
-        if archetype_id and archetype_id in ARCHETYPE_PERSONAS:
-            system_message = ARCHETYPE_PERSONAS[archetype_id]['system_prompt'] + "\n\nYou must respond with structured JSON as specified."
-        else:
-            system_message = DEFAULT_SYSTEM_MESSAGE + "\n\nYou must respond with structured JSON as specified."
-        
-        # Use direct OpenAI API for spell generation
-        chat_response = await openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": structured_prompt}
-            ],
-            temperature=0.8,
-            max_tokens=4000
-        )
-        
-        response = chat_response.choices[0].message.content
-        
-        # Parse the JSON response
-        import json
+        # Text and image run concurrently, so the call takes max(text, image)
+        image_task = start_spell_image_task(request, archetype['id'], admission)
         try:
-            # Clean up response if needed (remove markdown code blocks)
-            clean_response = response.strip()
-            if clean_response.startswith('```'):
-                clean_response = clean_response.split('```')[1]
-                if clean_response.startswith('json'):
-                    clean_response = clean_response[4:]
-            clean_response = clean_response.strip()
-            
-            spell_data = json.loads(clean_response)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return the raw response
-            spell_data = {
-                'title': 'Your Custom Spell',
-                'raw_response': response,
-                'parse_error': True
-            }
-        
-        # Generate image if requested
-        image_base64 = None
-        if request.generate_image and 'image_prompt' in spell_data:
-            try:
-                style = ARCHETYPE_IMAGE_STYLES.get(archetype_id or 'neutral', ARCHETYPE_IMAGE_STYLES['neutral'])
-                image_prompt = f"{style}, {spell_data['image_prompt']}, mystical ritual scene, no text"
-                
-                # Use direct OpenAI API for image generation
-                image_response = await openai_client.images.generate(
-                    model="dall-e-3",
-                    prompt=image_prompt,
-                    size="1024x1024",
-                    quality="standard",
-                    n=1,
-                    response_format="b64_json"
-                )
-                
-                if image_response.data and len(image_response.data) > 0:
-                    image_base64 = image_response.data[0].b64_json
-            except Exception as img_error:
-                logging.error(f'Spell image generation error: {str(img_error)}')
+            spell_text = await llm_gateway.complete(
+                'spell', messages, max_tokens=spell_output_budget(request.context), **admission
+            )
+        except Exception:
+            if image_task:
+                image_task.cancel()
+            raise
         
-        # Increment spell count for authenticated free users
-        if user and user.get('subscription_tier') == 'free':
-            await increment_spell_count(user['id'])
+        spell_data, truncated = parse_spell_response(spell_text)
+        image_base64 = await image_task if image_task else None
         
-        # Get updated limit info for response
-        limit_info = None
-        if user:
-            updated_user = await db.users.find_one({'id': user['id']}, {'_id': 0})
-            limit_check = await check_spell_generation_limit(updated_user)
-            limit_info = {
-                'remaining': limit_check['remaining'],
-                'limit': limit_check['limit'],
-                'subscription_tier': user.get('subscription_tier', 'free')
-            }
+        limit_info = await record_spell_generation(user)
         
         return {
             'spell': spell_data,
+            'truncated': truncated,
             'image_base64': image_base64,
-            'archetype': {
-                'id': archetype_id,
-                'name': archetype_name,
-                'title': archetype_title
-            },
+            'archetype': archetype,
             'session_id': session_id,
             'limit_info': limit_info
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f'Spell generation error: {str(e)}')
         raise HTTPException(status_code=500, detail=f'Failed to generate spell: {str(e)}')
 
+@api_router.post('/ai/generate-spell/stream')
+async def generate_spell_stream(
+    request: SpellRequest,
+    http_request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    """Stream spell generation as Server-Sent Events.
+    
+    Emits `token` events ({"delta": ...}) as the model writes, then a single
+    `spell` event carrying the same body /ai/generate-spell returns (parsed
+    spell, truncated flag, image, archetype, session_id, limit_info). Failures
+    after the stream has opened arrive as an `error` event.
+    """
+    user = await get_optional_user(credentials)
+    
+    # Limit errors must surface as a normal 403 before the stream opens
+    await enforce_spell_generation_limit(user)
+    
+    session_id = str(uuid.uuid4())
+    archetype = resolve_spell_archetype(request.archetype)
+    messages = build_spell_messages(request, archetype['id'])
+    admission = admission_for(user, http_request)
+    
+    async def event_stream():
+        image_task = start_spell_image_task(request, archetype['id'], admission)
+        try:
+            parts = []
+            async for delta in llm_gateway.stream(
+                'spell', messages, max_tokens=spell_output_budget(request.context), **admission
+            ):
+                parts.append(delta)
+                yield sse_event('token', {'delta': delta})
+            
+            spell_data, truncated = parse_spell_response(''.join(parts))
+            image_base64 = await image_task if image_task else None
+            
+            limit_info = await record_spell_generation(user)
+            
+            yield sse_event('spell', {
+                'spell': spell_data,
+                'truncated': truncated,
+                'image_base64': image_base64,
+                'archetype': archetype,
+                'session_id': session_id,
+                'limit_info': limit_info
+            })
+        except HTTPException as e:
+            yield sse_event('error', {'detail': e.detail, 'status': e.status_code})
+        except Exception as e:
+            logging.error(f'Spell stream error: {str(e)}')
+            yield sse_event('error', {'detail': 'Failed to generate spell'})
+        finally:
+            # Client went away or the text failed - don't leave the image running
+            if image_task and not image_task.done():
+                image_task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # AI Image Generation endpoint
 @api_router.post('/ai/generate-image')
-async def generate_image(request: ImageGenerationRequest):
+async def generate_image(request: ImageGenerationRequest, http_request: Request):
     try:
-        # Use direct OpenAI API for image generation
-        image_response = await openai_client.images.generate(
-            model="dall-e-3",
-            prompt=f"1920s-1940s mystical art style, {request.prompt}, art deco influences, rich jewel tones, Bloomsbury aesthetic",
-            size="1024x1024",
-            quality="standard",
-            n=1,
-            response_format="b64_json"
+        image_base64 = await llm_gateway.generate_image(
+            'image',
+            f"1920s-1940s mystical art style, {request.prompt}, art deco influences, rich jewel tones, Bloomsbury aesthetic",
+            **admission_for(None, http_request)
         )
         
-        if image_response.data and len(image_response.data) > 0:
-            image_base64 = image_response.data[0].b64_json
+        if image_base64:
             return {'image_base64': image_base64}
         else:
             raise HTTPException(status_code=500, detail='No image was generated')
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f'Image generation error: {str(e)}')
         raise HTTPException(status_code=500, detail='Failed to generate image')
@@ -2389,12 +2406,12 @@ async def add_favorite(request: FavoriteRequest, user = Depends(get_current_user
         {'id': user['id']},
         {'$addToSet': {'favorites': favorite}}
     )
+    invalidate_cached_user(user['id'])
     return {'success': True}
 
 @api_router.get('/favorites')
 async def get_favorites(user = Depends(get_current_user)):
-    user_data = await db.users.find_one({'id': user['id']}, {'_id': 0})
-    return user_data.get('favorites', [])
+    return user.get('favorites', [])
 
 @api_router.delete('/favorites')
 async def remove_favorite(request: FavoriteRequest, user = Depends(get_current_user)):
@@ -2403,11 +2420,12 @@ async def remove_favorite(request: FavoriteRequest, user = Depends(get_current_u
         {'id': user['id']},
         {'$pull': {'favorites': favorite}}
     )
+    invalidate_cached_user(user['id'])
     return {'success': True}
 
 # Grimoire (Saved Spells) endpoints
 @api_router.post('/grimoire/save', response_model=SavedSpellResponse)
-async def save_spell_to_grimoire(request: SaveSpellRequest, user = Depends(get_current_user)):
+async def save_spell_to_grimoire(request: SaveSpellRequest, background_tasks: BackgroundTasks, user = Depends(get_current_user)):
     """Save a generated spell to the user's personal grimoire"""
     
     # Check subscription - only paid users can save
@@ -2427,6 +2445,16 @@ async def save_spell_to_grimoire(request: SaveSpellRequest, user = Depends(get_c
     # Extract title from spell data for easy display
     title = request.spell_data.get('title', 'Untitled Spell')
     
+    # The image goes to the blob store - the document only keeps its key
+    image_ref = None
+    if request.image_base64:
+        try:
+            image_ref = await asyncio.to_thread(put_base64_blob, request.image_base64)
+        except BlobTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError:
+            raise HTTPException(status_code=400, detail='Invalid image data')
+    
     saved_spell = {
         'id': spell_id,
         'user_id': user['id'],
@@ -2434,7 +2462,7 @@ async def save_spell_to_grimoire(request: SaveSpellRequest, user = Depends(get_c
         'archetype_id': request.archetype_id,
         'archetype_name': request.archetype_name,
         'archetype_title': request.archetype_title,
-        'image_base64': request.image_base64,
+        'image_ref': image_ref,
         'title': title,
         'created_at': datetime.now(timezone.utc).isoformat()
     }
@@ -2446,22 +2474,42 @@ async def save_spell_to_grimoire(request: SaveSpellRequest, user = Depends(get_c
         {'id': user['id']},
         {'$inc': {'total_spells_saved': 1}}
     )
+    invalidate_cached_user(user['id'])
+    
+    # Thumbnail/WebP variants are encoded after the response goes out
+    if image_ref:
+        background_tasks.add_task(add_image_variants, spell_id, image_ref)
     
-    return SavedSpellResponse(**saved_spell)
+    return SavedSpellResponse(**with_image_urls(saved_spell))
 
-@api_router.get('/grimoire/spells', response_model=List[SavedSpellResponse])
-async def get_user_grimoire(user = Depends(get_current_user)):
-    """Retrieve all spells saved by the current user"""
-    spells = await db.user_spells.find(
-        {'user_id': user['id']}, 
-        {'_id': 0}
-    ).sort('created_at', -1).to_list(100)
+async def fetch_grimoire_page(collection, user, projection, cursor, limit):
+    """One page of a user's saved items, newest first; 400 for a malformed cursor"""
+    try:
+        return await fetch_page(collection, {'user_id': user['id']}, projection, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+@api_router.get('/grimoire/spells', response_model=SavedSpellPage)
+async def get_user_grimoire(cursor: Optional[str] = None, limit: int = GRIMOIRE_PAGE_SIZE, user = Depends(get_current_user)):
+    """List the current user's saved spells a page at a time (summaries only)"""
+    spells, next_cursor = await fetch_grimoire_page(db.user_spells, user, SPELL_SUMMARY_FIELDS, cursor, limit)
+    return {'items': [with_image_urls(spell) for spell in spells], 'next_cursor': next_cursor}
+
+@api_router.get('/grimoire/spells/{spell_id}', response_model=SavedSpellResponse)
+async def get_saved_spell(spell_id: str, user = Depends(get_current_user)):
+    """Retrieve one saved spell in full"""
+    spell = await db.user_spells.find_one(
+        {'id': spell_id, 'user_id': user['id']},
+        {'_id': 0, 'image_base64': 0}
+    )
+    if not spell:
+        raise HTTPException(status_code=404, detail='Spell not found or unauthorized')
     
-    return spells
+    return with_image_urls(spell)
 
 @api_router.delete('/grimoire/spells/{spell_id}')
 async def delete_saved_spell(spell_id: str, user = Depends(get_current_user)):
-    """Delete a saved spell from the user's grimoire"""
+    """Delete a saved spell from the user's grimoire (its image blobs go at the next sweep)"""
     result = await db.user_spells.delete_one({
         'id': spell_id,
         'user_id': user['id']
@@ -2472,6 +2520,106 @@ async def delete_saved_spell(spell_id: str, user = Depends(get_current_user)):
     
     return {'success': True, 'message': 'Spell deleted from grimoire'}
 
+# Stored images (content-addressed - a key always names the same bytes)
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@api_router.get('/images/{key}')
+async def get_image(key: str, request: Request):
+    """Serve an image from the blob store by its content hash"""
+    found = await asyncio.to_thread(find_blob, key)
+    if not found:
+        raise HTTPException(status_code=404, detail='Image not found')
+    
+    headers = {'ETag': f'"{key}"', 'Cache-Control': IMAGE_CACHE_CONTROL}
+    if etag_matches(request, headers['ETag']):
+        return Response(status_code=304, headers=headers)
+    path, media_type = found
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+def with_image_urls(spell):
+    """Add URLs for a saved spell's image - the list uses the thumbnail, detail the full WebP"""
+    variants = spell.get('image_variants') or {}
+    spell['image_url'] = image_url(spell.get('image_ref'))
+    # Until the variants exist, fall back to the original
+    spell['thumbnail_url'] = image_url(variants.get('thumb')) or spell['image_url']
+    spell['webp_url'] = image_url(variants.get('webp'))
+    return spell
+
+async def add_image_variants(spell_id, image_ref):
+    """Encode and store a saved spell image's variants, then record them on the spell"""
+    try:
+        variants = await asyncio.to_thread(derive_variants, image_ref)
+    except Exception as e:
+        logging.error(f'Image variants failed for spell {spell_id}: {str(e)}')
+        variants = None
+    # An empty mapping marks the image as processed so the backfill doesn't retry it forever
+    await db.user_spells.update_one({'id': spell_id}, {'$set': {'image_variants': variants or {}}})
+
+async def backfill_image_variants(batch_size=20):
+    """Derive variants for saved spell images that don't have them yet"""
+    while True:
+        spells = await db.user_spells.find(
+            {'image_ref': {'$ne': None}, 'image_variants': {'$exists': False}},
+            {'_id': 0, 'id': 1, 'image_ref': 1}
+        ).to_list(batch_size)
+        if not spells:
+            break
+        for spell in spells:
+            await add_image_variants(spell['id'], spell['image_ref'])
+
+async def migrate_inline_images(batch_size=20):
+    """Move images saved inline on older grimoire spells into the blob store"""
+    moved = 0
+    while True:
+        spells = await db.user_spells.find(
+            {'image_base64': {'$exists': True}},
+            {'_id': 0, 'id': 1, 'image_base64': 1}
+        ).to_list(batch_size)
+        if not spells:
+            break
+        for spell in spells:
+            update = {'$unset': {'image_base64': ''}}
+            if spell.get('image_base64'):
+                try:
+                    # These were already inside documents (so under 16MB) - no upload cap
+                    update['$set'] = {'image_ref': await asyncio.to_thread(put_base64_blob, spell['image_base64'], None)}
+                except ValueError:
+                    logging.error(f"Dropping unreadable inline image on spell {spell['id']}")
+            await db.user_spells.update_one({'id': spell['id']}, update)
+            moved += 1
+    if moved:
+        logging.info(f'Moved {moved} inline grimoire images to the blob store')
+
+async def sweep_unreferenced_images():
+    """Delete blobs no saved spell points at any more (deleted spells, replaced images)"""
+    referenced = set()
+    async for spell in db.user_spells.find(
+        {'image_ref': {'$ne': None}},
+        {'_id': 0, 'image_ref': 1, 'image_variants': 1}
+    ):
+        referenced.add(spell['image_ref'])
+        referenced.update((spell.get('image_variants') or {}).values())
+    swept = await asyncio.to_thread(sweep_blobs, referenced)
+    if swept:
+        logging.info(f'Swept {swept} unreferenced images from the blob store')
+    return swept
+
+async def _prepare_stored_images_quietly():
+    try:
+        await migrate_inline_images()
+        await backfill_image_variants()
+        await sweep_unreferenced_images()
+    except Exception as e:
+        logging.error(f'Stored image migration failed: {str(e)}')
+
+@api_router.post('/admin/sweep-images')
+async def admin_sweep_images(admin_key: str):
+    """Delete stored images that no saved spell references (admin only)"""
+    if admin_key != os.environ.get('ADMIN_KEY', 'change-me-in-production'):
+        raise HTTPException(status_code=403, detail='Unauthorized')
+    
+    return {'success': True, 'swept': await sweep_unreferenced_images()}
+
 # Ward saving endpoints
 class SaveWardRequest(BaseModel):
     ward_data: dict  # The ward object (name, symbol, meaning, etc.)
@@ -2520,18 +2668,24 @@ async def save_ward_to_grimoire(request: SaveWardRequest, user = Depends(get_cur
         {'id': user['id']},
         {'$inc': {'total_wards_saved': 1}}
     )
+    invalidate_cached_user(user['id'])
     
     return {'success': True, 'ward': saved_ward}
 
 @api_router.get('/grimoire/wards')
-async def get_user_wards(user = Depends(get_current_user)):
-    """Retrieve all wards saved by the current user"""
-    wards = await db.user_wards.find(
-        {'user_id': user['id']}, 
-        {'_id': 0}
-    ).sort('created_at', -1).to_list(100)
+async def get_user_wards(cursor: Optional[str] = None, limit: int = GRIMOIRE_PAGE_SIZE, user = Depends(get_current_user)):
+    """List the current user's saved wards a page at a time (summaries only)"""
+    wards, next_cursor = await fetch_grimoire_page(db.user_wards, user, WARD_SUMMARY_FIELDS, cursor, limit)
+    return {'items': wards, 'next_cursor': next_cursor}
+
+@api_router.get('/grimoire/wards/{ward_id}')
+async def get_saved_ward(ward_id: str, user = Depends(get_current_user)):
+    """Retrieve one saved ward in full"""
+    ward = await db.user_wards.find_one({'id': ward_id, 'user_id': user['id']}, {'_id': 0})
+    if not ward:
+        raise HTTPException(status_code=404, detail='Ward not found or unauthorized')
     
-    return wards
+    return ward
 
 @api_router.delete('/grimoire/wards/{ward_id}')
 async def delete_saved_ward(ward_id: str, user = Depends(get_current_user)):
@@ -2588,6 +2742,7 @@ async def manual_upgrade_user(user_email: str, admin_key: str):
             }
         }
     )
+    invalidate_cached_user(user['id'])
     
     return {'success': True, 'message': f'User {user_email} upgraded to paid tier'}
 
@@ -2710,6 +2865,7 @@ async def get_checkout_status(session_id: str, user = Depends(get_current_user))
                     }
                 }
             )
+            invalidate_cached_user(transaction['user_id'])
             
             # Mark transaction as processed
             await db.payment_transactions.update_one(
@@ -2765,6 +2921,7 @@ async def stripe_webhook(request: Request):
                         }
                     }
                 )
+                invalidate_cached_user(transaction['user_id'])
                 
                 # Mark as processed
                 await db.payment_transactions.update_one(
@@ -2784,6 +2941,33 @@ async def stripe_webhook(request: Request):
         logging.error(f'Webhook error: {str(e)}')
         raise HTTPException(status_code=500, detail=str(e))
 
+# Operational metrics (per worker process)
+@api_router.get('/metrics')
+async def get_metrics(admin_key: str):
+    """Return in-process pool and queue metrics for this worker (admin only)"""
+    if admin_key != os.environ.get('ADMIN_KEY', 'change-me-in-production'):
+        raise HTTPException(status_code=403, detail='Unauthorized')
+    
+    return {
+        'password_pool': get_password_pool_metrics(),
+        'user_cache': get_user_cache_metrics(),
+        'response_cache': get_response_cache_metrics(),
+        'cobbles_render': get_cobbles_render_metrics(),
+        'oracle_cache': get_oracle_cache_metrics(),
+        'blob_store': get_blob_store_metrics(),
+        'image_variants': get_image_variant_metrics(),
+        'indexes': get_index_metrics(),
+        'llm_gateway': llm_gateway.metrics()
+    }
+
+@api_router.get('/metrics/indexes')
+async def get_index_usage(admin_key: str):
+    """Declared indexes that are missing, plus existing ones that are undeclared or unused (admin only)"""
+    if admin_key != os.environ.get('ADMIN_KEY', 'change-me-in-production'):
+        raise HTTPException(status_code=403, detail='Unauthorized')
+    
+    return await index_usage(db)
+
 # Include router
 app.include_router(api_router)
 
@@ -2801,6 +2985,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event('startup')
+async def prepare_collections():
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error(f'Index creation failed: {str(e)}')
+    
+    await _refresh_reference_context_quietly()
+    
+    # tiktoken may download its encoding - don't hold up startup for it
+    start_tokenizer_load()
+    
+    # Older grimoire spells carry their image inline or lack variants - fix them up in the background,
+    # then sweep images no spell references any more
+    app.state.image_migration = asyncio.create_task(_prepare_stored_images_quietly())
+
 @app.on_event('shutdown')
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    password_executor.shutdown(wait=False)
\ No newline at end of file
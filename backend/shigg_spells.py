@@ -2,6 +2,8 @@
 # Based on Rubáiyát of Omar Khayyám, W.B. Yeats, T.S. Eliot, and WWII-era British spiritualism
 # Practices: tea-leaf reading, wartime astrology, herb lore, remembrance charm-work, Bird Oracle
 
+from seed_sync import sync_seed
+
 SHIGG_SAMPLE_SPELLS = [
     {
         "id": "shigg-dawn-cup-blessing",
@@ -469,16 +471,9 @@ SHIGG_CORRIE_CHARACTERS = {
 }
 
 # Function to seed Shigg's sample spells into the database
-async def seed_shigg_spells(db):
-    """Seed Shigg's sample spells into the database"""
-    collection = db.sample_spells
-    
-    # Remove existing Shigg spells
-    await collection.delete_many({"archetype_id": "shiggy"})
-    
-    # Insert new spells
-    for spell in SHIGG_SAMPLE_SPELLS:
-        await collection.insert_one(spell)
+async def seed_shigg_spells(db, force=False):
+    """Seed Shigg's sample spells into the database (upserted in bulk; a no-op if unchanged)"""
+    result = await sync_seed(db, 'sample_spells', SHIGG_SAMPLE_SPELLS, scope={"archetype_id": "shiggy"}, name="sample_spells:shiggy", force=force)
     
     print(f"Seeded {len(SHIGG_SAMPLE_SPELLS)} Shigg sample spells")
-    return len(SHIGG_SAMPLE_SPELLS)
+    return result
@@ -0,0 +1,98 @@
+# Token budgeting for LLM calls
+# Prompt tokens are counted locally with the model's tokenizer and max_tokens is
+# sized to what a request can actually produce - a one-card Quick Draw no
+# longer reserves room for a five-card spread, nor a 10-minute spell for a
+# multi-day ritual. Smaller reservations are cheaper and finish sooner.
+#
+# tiktoken downloads its encoding on first use, so start_tokenizer_load() loads
+# it on a background thread at startup; until it finishes (or if it can't)
+# token counts fall back to a characters-per-token estimate.
+
+import os
+import asyncio
+import logging
+
+TOKENIZER_ENCODING = os.environ.get('TOKENIZER_ENCODING', 'o200k_base')  # gpt-4o family
+MODEL_CONTEXT_WINDOW = int(os.environ.get('MODEL_CONTEXT_WINDOW', '128000'))
+# Chat format overhead per message, and for priming the assistant's reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+CONTEXT_SAFETY_MARGIN = 64
+
+# Output needed for a reading: a fixed frame (greeting, synthesis, closing)
+# plus a share per card/bird/ward the model has to write up
+READING_BUDGETS = {
+    'cobbles_oracle': {'base': 300, 'per_item': 400},
+    'corrie_tarot': {'base': 350, 'per_item': 300},
+    'bird_oracle': {'base': 300, 'per_item': 450},
+    'ward_finder': {'base': 250, 'per_item': 500}
+}
+
+# A spell always carries the full JSON template - only its lists grow with the
+# time the seeker has (spell-context "time"). The prompt caps each list at these
+# lengths (spell_prompts.build_personalization_context) and the budget is the
+# fixed frame plus room for that many items, so a short ritual gets a smaller
+# reservation without its trailing fields (closing_message, image_prompt,
+# suggested_ward) being cut off.
+SPELL_LENGTHS = {
+    'quick': {'materials': 4, 'steps': 4, 'sources': 1, 'variations': 1},
+    'medium': {'materials': 6, 'steps': 6, 'sources': 2, 'variations': 2},
+    'deep': {'materials': 8, 'steps': 8, 'sources': 3, 'variations': 3},
+    'extended': {'materials': 8, 'steps': 12, 'sources': 3, 'variations': 3}
+}
+# tarot_card, introduction, timing, spoken_words, historical_context, warnings,
+# closing_message, image_prompt and suggested_ward, with headroom for the
+# verbose personas. Re-check against real replies (finish_reason "length" in
+# benchmarks/bench_model_routing.py --record) before tightening.
+SPELL_FRAME_TOKENS = 2000
+SPELL_ITEM_TOKENS = {'materials': 45, 'steps': 110, 'sources': 50, 'variations': 50}
+# No time answer means no list caps in the prompt - reserve the profile's full 4000
+SPELL_DEFAULT_BUDGET = 4000
+
+tokenizer = {'encoding': None, 'failed': False, 'load_task': None}
+
+def load_tokenizer():
+    """Load the tiktoken encoding (blocking - may download it); safe to call again"""
+    if tokenizer['encoding'] is not None or tokenizer['failed']:
+        return tokenizer['encoding']
+    try:
+        import tiktoken
+        tokenizer['encoding'] = tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        tokenizer['failed'] = True
+        logging.warning(f'Tokenizer unavailable, estimating token counts: {str(e)}')
+    return tokenizer['encoding']
+
+def start_tokenizer_load():
+    """Load the tokenizer off the event loop without waiting for it"""
+    if tokenizer['load_task'] is None:
+        tokenizer['load_task'] = asyncio.create_task(asyncio.to_thread(load_tokenizer))
+
+def count_tokens(text):
+    """Tokens in text - exact once the tokenizer has loaded, estimated before"""
+    if not text:
+        return 0
+    encoding = tokenizer['encoding']
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages):
+    """Prompt tokens for a chat completion request"""
+    return sum(TOKENS_PER_MESSAGE + count_tokens(message.get('content') or '') for message in messages) + TOKENS_PER_REPLY
+
+def reading_output_budget(feature, items):
+    """max_tokens for a reading with `items` cards/birds/wards to interpret"""
+    budget = READING_BUDGETS[feature]
+    return budget['base'] + budget['per_item'] * max(1, items)
+
+def spell_output_budget(context=None):
+    """max_tokens for a spell, scaled by the list lengths its time answer allows"""
+    lengths = SPELL_LENGTHS.get((context or {}).get('time'))
+    if lengths is None:
+        return SPELL_DEFAULT_BUDGET
+    return SPELL_FRAME_TOKENS + sum(SPELL_ITEM_TOKENS[kind] * count for kind, count in lengths.items())
+
+def fit_max_tokens(prompt_tokens, max_tokens, context_window=MODEL_CONTEXT_WINDOW):
+    """Clamp max_tokens so prompt + completion stays inside the context window"""
+    return max(1, min(max_tokens, context_window - prompt_tokens - CONTEXT_SAFETY_MARGIN))
@@ -1173,32 +1173,67 @@ class SpiritualAppAPITester:
             return False
         
         success, response = self.run_test(
-            "Get Grimoire Spells",
+            "Get Grimoire Spells (first page)",
             "GET",
-            "grimoire/spells",
+            "grimoire/spells?limit=1",
             200
         )
         
-        if success and isinstance(response, list):
-            print(f"   ✅ Found {len(response)} spells in grimoire")
+        if not success or not isinstance(response, dict) or not isinstance(response.get('items'), list):
+            print(f"   ❌ Expected a page with items and next_cursor")
+            return False
+        
+        items = response['items']
+        print(f"   ✅ Found {len(items)} spell(s) on the first page")
+        if len(items) > 1:
+            print(f"   ❌ Page holds {len(items)} spells, limit was 1")
+            return False
+        
+        # Verify summary structure if any spells exist
+        if items:
+            spell = items[0]
+            required_fields = ['id', 'title', 'created_at']
+            missing_fields = [field for field in required_fields if field not in spell]
             
-            # Verify spell structure if any spells exist
-            if len(response) > 0:
-                spell = response[0]
-                required_fields = ['id', 'user_id', 'spell_data', 'title', 'created_at']
-                missing_fields = [field for field in required_fields if field not in spell]
-                
-                if missing_fields:
-                    print(f"   ❌ Missing fields in spell: {missing_fields}")
-                    return False
-                
-                print(f"   ✅ First spell title: {spell.get('title')}")
-                if spell.get('archetype_name'):
-                    print(f"   ✅ First spell archetype: {spell.get('archetype_name')}")
+            if missing_fields:
+                print(f"   ❌ Missing fields in spell: {missing_fields}")
+                return False
+            if 'spell_data' in spell:
+                print(f"   ❌ Listing should carry summaries, not spell_data")
+                return False
             
-            return True
+            print(f"   ✅ First spell title: {spell.get('title')}")
+            if spell.get('archetype_name'):
+                print(f"   ✅ First spell archetype: {spell.get('archetype_name')}")
         
-        return False
+        next_cursor = response.get('next_cursor')
+        if next_cursor:
+            success, next_page = self.run_test(
+                "Get Grimoire Spells (next page)",
+                "GET",
+                f"grimoire/spells?limit=1&cursor={next_cursor}",
+                200
+            )
+            if not success or not isinstance(next_page, dict):
+                return False
+            next_items = next_page.get('items', [])
+            if next_items and next_items[0]['id'] == items[0]['id']:
+                print(f"   ❌ Next page repeated spell {items[0]['id']}")
+                return False
+            if next_items and next_items[0]['created_at'] > items[0]['created_at']:
+                print(f"   ❌ Next page is not older than the first")
+                return False
+            print(f"   ✅ Next page has {len(next_items)} spell(s)")
+        else:
+            print(f"   ✅ Single page - no next_cursor")
+        
+        success, _ = self.run_test(
+            "Get Grimoire Spells (bad cursor)",
+            "GET",
+            "grimoire/spells?cursor=not-a-cursor",
+            400
+        )
+        return success
 
     def test_grimoire_delete_spell(self):
         """Test deleting a spell from grimoire (requires authentication)"""
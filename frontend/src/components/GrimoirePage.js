@@ -76,7 +76,7 @@ const ARCHETYPE_STYLES = {
 };
 
 // Enhanced Tarot Card View with Image
-const TarotCardView = ({ spell, archetype, style, imageBase64, onViewFull, onCopy, onSave, onNewSpell, isSaving }) => {
+const TarotCardView = ({ spell, archetype, style, imageSrc, onViewFull, onCopy, onSave, onNewSpell, isSaving }) => {
   const tarot = spell?.tarot_card;
   if (!tarot) return null;
   
@@ -107,10 +107,10 @@ const TarotCardView = ({ spell, archetype, style, imageBase64, onViewFull, onCop
         {/* Card inner container */}
         <div className="absolute inset-1 rounded-lg overflow-hidden bg-[#1a1a1a]">
           {/* Background Image */}
-          {imageBase64 ? (
+          {imageSrc ? (
             <div className="absolute inset-0">
               <img 
-                src={`data:image/png;base64,${imageBase64}`}
+                src={imageSrc}
                 alt={spell.title}
                 className="w-full h-full object-cover"
               />
@@ -270,7 +270,9 @@ const TarotCardView = ({ spell, archetype, style, imageBase64, onViewFull, onCop
   );
 };
 
-export const GrimoirePage = ({ spell, archetype, imageBase64, onNewSpell }) => {
+export const GrimoirePage = ({ spell, archetype, imageBase64, imageUrl, onNewSpell }) => {
+  // Saved spells link to the stored image; a freshly generated one is still inline
+  const imageSrc = imageUrl || (imageBase64 ? `data:image/png;base64,${imageBase64}` : null);
   const [showHistoricalContext, setShowHistoricalContext] = useState(false);
   const [checklistMode, setChecklistMode] = useState(false);
   const [completedSteps, setCompletedSteps] = useState(new Set());
@@ -438,7 +440,7 @@ export const GrimoirePage = ({ spell, archetype, imageBase64, onNewSpell }) => {
         spell={spell}
         archetype={archetype}
         style={style}
-        imageBase64={imageBase64}
+        imageSrc={imageSrc}
         onViewFull={() => setViewMode('full')}
         onCopy={copySpellToClipboard}
         onSave={saveToGrimoire}
@@ -483,10 +485,10 @@ export const GrimoirePage = ({ spell, archetype, imageBase64, onNewSpell }) => {
       )}
 
       {/* Header Image */}
-      {imageBase64 && (
+      {imageSrc && (
         <div className="relative h-48 md:h-64 overflow-hidden">
           <img 
-            src={`data:image/png;base64,${imageBase64}`}
+            src={imageSrc}
             alt={spell.title}
             className="w-full h-full object-cover"
           />
@@ -503,7 +505,7 @@ export const GrimoirePage = ({ spell, archetype, imageBase64, onNewSpell }) => {
       )}
 
       {/* No image header */}
-      {!imageBase64 && (
+      {!imageSrc && (
         <div className={`p-6 ${style.bgAccent} border-b border-border`}>
           <h1 className="font-italiana text-3xl md:text-4xl text-primary">{spell.title}</h1>
           {spell.subtitle && (
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { BookOpen, Trash2, Eye, Loader2, Calendar, Sparkles, Hand, Heart, MapPin } from 'lucide-react';
-import { grimoireAPI } from '../utils/api';
+import { grimoireAPI, storedImageURL } from '../utils/api';
 import { GrimoirePage } from '../components/GrimoirePage';
 import { toast } from 'sonner';
 
@@ -10,6 +10,10 @@ const API_URL = process.env.REACT_APP_BACKEND_URL;
 export const MyGrimoire = () => {
   const [spells, setSpells] = useState([]);
   const [wards, setWards] = useState([]);
+  const [spellsCursor, setSpellsCursor] = useState(null);
+  const [wardsCursor, setWardsCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [openingSpell, setOpeningSpell] = useState(null);
   const [loading, setLoading] = useState(true);
   const [selectedSpell, setSelectedSpell] = useState(null);
   const [selectedWard, setSelectedWard] = useState(null);
@@ -22,12 +26,14 @@ export const MyGrimoire = () => {
 
   const loadGrimoire = async () => {
     try {
-      const [spellsData, wardsData] = await Promise.all([
-        grimoireAPI.getAllSpells(),
+      const [spellsPage, wardsPage] = await Promise.all([
+        grimoireAPI.getSpells(),
         loadWards()
       ]);
-      setSpells(spellsData);
-      setWards(wardsData || []);
+      setSpells(spellsPage.items);
+      setSpellsCursor(spellsPage.next_cursor);
+      setWards(wardsPage.items);
+      setWardsCursor(wardsPage.next_cursor);
     } catch (error) {
       console.error('Failed to load grimoire:', error);
       if (error.response?.status === 401) {
@@ -40,20 +46,42 @@ export const MyGrimoire = () => {
     }
   };
 
-  const loadWards = async () => {
+  const loadWards = async (cursor) => {
+    const emptyPage = { items: [], next_cursor: null };
     try {
       const token = localStorage.getItem('token');
-      if (!token) return [];
+      if (!token) return emptyPage;
       
-      const response = await fetch(`${API_URL}/api/grimoire/wards`, {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+      const response = await fetch(`${API_URL}/api/grimoire/wards${query}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       
-      if (!response.ok) return [];
+      if (!response.ok) return emptyPage;
       return await response.json();
     } catch (error) {
       console.error('Failed to load wards:', error);
-      return [];
+      return emptyPage;
+    }
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      if (activeTab === 'spells') {
+        const page = await grimoireAPI.getSpells(spellsCursor);
+        setSpells([...spells, ...page.items]);
+        setSpellsCursor(page.next_cursor);
+      } else {
+        const page = await loadWards(wardsCursor);
+        setWards([...wards, ...page.items]);
+        setWardsCursor(page.next_cursor);
+      }
+    } catch (error) {
+      console.error('Failed to load more:', error);
+      toast.error('Failed to load more of your grimoire');
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -106,8 +134,17 @@ export const MyGrimoire = () => {
     }
   };
 
-  const handleViewSpell = (spell) => {
-    setSelectedSpell(spell);
+  // The list only has summaries - fetch the full spell to show it
+  const handleViewSpell = async (spell) => {
+    setOpeningSpell(spell.id);
+    try {
+      setSelectedSpell(await grimoireAPI.getSpell(spell.id));
+    } catch (error) {
+      console.error('Failed to open spell:', error);
+      toast.error('Failed to open spell');
+    } finally {
+      setOpeningSpell(null);
+    }
   };
 
   const handleBackToList = () => {
@@ -133,7 +170,7 @@ export const MyGrimoire = () => {
               name: selectedSpell.archetype_name,
               title: selectedSpell.archetype_title
             }}
-            imageBase64={selectedSpell.image_base64}
+            imageUrl={storedImageURL(selectedSpell.webp_url || selectedSpell.image_url)}
             onNewSpell={handleBackToList}
           />
         </div>
@@ -215,7 +252,7 @@ export const MyGrimoire = () => {
                 }`}
               >
                 <Sparkles className="w-4 h-4" />
-                Spells ({spells.length})
+                Spells ({spells.length}{spellsCursor ? '+' : ''})
               </button>
               <button
                 onClick={() => setActiveTab('wards')}
@@ -226,7 +263,7 @@ export const MyGrimoire = () => {
                 }`}
               >
                 <Hand className="w-4 h-4" />
-                Wards ({wards.length})
+                Wards ({wards.length}{wardsCursor ? '+' : ''})
               </button>
             </div>
 
@@ -262,10 +299,11 @@ export const MyGrimoire = () => {
                       className="bg-card/80 border-2 border-border rounded-sm overflow-hidden hover:border-primary/30 transition-all group"
                     >
                       {/* Spell Image */}
-                      {spell.image_base64 ? (
+                      {spell.thumbnail_url ? (
                         <div className="relative h-48 overflow-hidden">
                           <img
-                            src={`data:image/png;base64,${spell.image_base64}`}
+                            src={storedImageURL(spell.thumbnail_url)}
+                            loading="lazy"
                             alt={spell.title}
                             className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
                           />
@@ -304,9 +342,14 @@ export const MyGrimoire = () => {
                         <div className="flex gap-2">
                           <button
                             onClick={() => handleViewSpell(spell)}
-                            className="flex-1 px-3 py-2 bg-primary/10 text-primary rounded-sm font-montserrat text-xs uppercase tracking-wider hover:bg-primary/20 transition-colors flex items-center justify-center gap-2"
+                            disabled={openingSpell === spell.id}
+                            className="flex-1 px-3 py-2 bg-primary/10 text-primary rounded-sm font-montserrat text-xs uppercase tracking-wider hover:bg-primary/20 transition-colors flex items-center justify-center gap-2 disabled:opacity-50"
                           >
-                            <Eye className="w-3 h-3" />
+                            {openingSpell === spell.id ? (
+                              <Loader2 className="w-3 h-3 animate-spin" />
+                            ) : (
+                              <Eye className="w-3 h-3" />
+                            )}
                             View
                           </button>
                           <button
@@ -433,6 +476,20 @@ export const MyGrimoire = () => {
                 </div>
               )
             )}
+
+            {/* Next page of the active tab */}
+            {(activeTab === 'spells' ? spellsCursor : wardsCursor) && (
+              <div className="flex justify-center mt-8">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="px-6 py-3 bg-card/50 text-primary border border-primary/30 rounded-sm font-montserrat text-sm uppercase tracking-wider hover:bg-primary/10 transition-all flex items-center gap-2 disabled:opacity-50"
+                >
+                  {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                  Load more
+                </button>
+              </div>
+            )}
           </>
         )}
       </div>
@@ -3,6 +3,9 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Stored images come back as a path ("/api/images/<hash>") on the backend
+export const storedImageURL = (path) => (path ? `${BACKEND_URL}${path}` : null);
+
 const getAuthHeader = () => {
   const token = localStorage.getItem('token');
   return token ? { Authorization: `Bearer ${token}` } : {};
@@ -148,8 +151,16 @@ export const grimoireAPI = {
     );
     return response.data;
   },
-  getAllSpells: async () => {
+  // One page of saved spell summaries: { items, next_cursor }
+  getSpells: async (cursor) => {
     const response = await axios.get(`${API}/grimoire/spells`, {
+      params: cursor ? { cursor } : {},
+      headers: getAuthHeader(),
+    });
+    return response.data;
+  },
+  getSpell: async (spellId) => {
+    const response = await axios.get(`${API}/grimoire/spells/${spellId}`, {
       headers: getAuthHeader(),
     });
     return response.data;
@@ -0,0 +1,50 @@
+"""Shared test setup: backend modules on the path, and throwaway MongoDB databases.
+
+Database tests run against MONGO_URL (default mongodb://localhost:27017) and are
+skipped when no MongoDB is reachable.
+"""
+import os
+import sys
+import uuid
+import asyncio
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+
+@pytest.fixture(scope='session')
+def mongo_available():
+    """Whether MONGO_URL answers a ping - checked once per run"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+@pytest.fixture
+def scratch_db(mongo_available):
+    """run(check) -> awaits check(db) against a fresh database, dropped afterwards"""
+    if not mongo_available:
+        pytest.skip(f'No MongoDB at {MONGO_URL}')
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    def run(check):
+        async def scoped():
+            # A client per run: motor clients are bound to the event loop that made them
+            client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+            db = client[f'test_{uuid.uuid4().hex[:12]}']
+            try:
+                return await check(db)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+        return asyncio.run(scoped())
+    return run
@@ -0,0 +1,127 @@
+"""Admission must hand out slots by priority, refuse fast when full, and never leak a slot or a caller count."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController, PRIORITY_ANONYMOUS, PRIORITY_MEMBER, PRIORITY_PRO
+
+async def settle():
+    """Let every runnable task reach its next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_waiters_are_admitted_in_priority_order():
+    async def run():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, per_caller_limit=10, queue_timeout=5)
+        order = []
+
+        async def call(priority, name):
+            async with admission.admit(priority, name):
+                order.append(name)
+
+        await admission.acquire(PRIORITY_PRO, 'holder')
+        tasks = [asyncio.create_task(call(priority, name)) for priority, name in [
+            (PRIORITY_ANONYMOUS, 'anonymous-1'), (PRIORITY_MEMBER, 'member'),
+            (PRIORITY_PRO, 'pro'), (PRIORITY_ANONYMOUS, 'anonymous-2')
+        ]]
+        await settle()
+        assert admission.waiting == 4
+        admission.release('holder')
+        await asyncio.gather(*tasks)
+        return order, admission
+
+    order, admission = asyncio.run(run())
+    # Same priority keeps arrival order
+    assert order == ['pro', 'member', 'anonymous-1', 'anonymous-2']
+    assert admission.active == 0 and admission.waiting == 0 and admission.per_caller == {}
+
+def test_cancelled_waiter_gives_everything_back():
+    async def run():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, per_caller_limit=10, queue_timeout=5)
+        await admission.acquire(PRIORITY_PRO, 'holder')
+        waiter = asyncio.create_task(admission.acquire(PRIORITY_MEMBER, 'waiter'))
+        await settle()
+        assert admission.per_caller == {'holder': 1, 'waiter': 1}
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert admission.per_caller == {'holder': 1} and admission.waiting == 0
+        admission.release('holder')
+        return admission
+
+    admission = asyncio.run(run())
+    assert admission.active == 0 and admission.per_caller == {}
+
+def test_waiter_cancelled_as_it_is_handed_a_slot_leaks_nothing():
+    async def run():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, per_caller_limit=10, queue_timeout=5)
+
+        async def call(name):
+            async with admission.admit(PRIORITY_PRO, name):
+                await asyncio.sleep(0)
+
+        await admission.acquire(PRIORITY_PRO, 'holder')
+        first = asyncio.create_task(call('first'))
+        second = asyncio.create_task(call('second'))
+        await settle()
+        # Hand the slot to first, then cancel it before it gets to run. Depending on
+        # the Python version first either passes the slot on or keeps and releases it.
+        admission.release('holder')
+        first.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        return admission
+
+    admission = asyncio.run(run())
+    assert admission.active == 0 and admission.waiting == 0 and admission.per_caller == {}
+
+def test_queue_timeout_returns_503_and_gives_everything_back():
+    async def run():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, per_caller_limit=10, queue_timeout=0.01)
+        await admission.acquire(PRIORITY_PRO, 'holder')
+        with pytest.raises(HTTPException) as raised:
+            await admission.acquire(PRIORITY_MEMBER, 'waiter')
+        assert admission.per_caller == {'holder': 1} and admission.waiting == 0
+        admission.release('holder')
+        return raised.value, admission
+
+    error, admission = asyncio.run(run())
+    assert error.status_code == 503
+    assert admission.stats['timed_out'] == 1
+    assert admission.active == 0 and admission.per_caller == {}
+
+def test_per_caller_cap_returns_429():
+    async def run():
+        admission = AdmissionController(max_concurrency=10, max_queue=10, per_caller_limit=2, queue_timeout=5)
+        await admission.acquire(PRIORITY_ANONYMOUS, 'ip:203.0.113.7')
+        await admission.acquire(PRIORITY_ANONYMOUS, 'ip:203.0.113.7')
+        with pytest.raises(HTTPException) as raised:
+            await admission.acquire(PRIORITY_ANONYMOUS, 'ip:203.0.113.7')
+        # Other callers are unaffected
+        await admission.acquire(PRIORITY_ANONYMOUS, 'ip:198.51.100.1')
+        return raised.value, admission
+
+    error, admission = asyncio.run(run())
+    assert error.status_code == 429
+    assert admission.stats['rejected_caller_limit'] == 1
+    assert admission.active == 3 and admission.per_caller == {'ip:203.0.113.7': 2, 'ip:198.51.100.1': 1}
+
+def test_full_queue_returns_503():
+    async def run():
+        admission = AdmissionController(max_concurrency=1, max_queue=2, per_caller_limit=10, queue_timeout=5)
+        await admission.acquire(PRIORITY_PRO, None)
+        waiters = [asyncio.create_task(admission.acquire(PRIORITY_PRO, None)) for _ in range(2)]
+        await settle()
+        with pytest.raises(HTTPException) as raised:
+            await admission.acquire(PRIORITY_PRO, 'late')
+        assert admission.per_caller == {}
+        for _ in range(3):
+            admission.release(None)
+            await settle()
+        await asyncio.gather(*waiters)
+        return raised.value, admission
+
+    error, admission = asyncio.run(run())
+    assert error.status_code == 503
+    assert admission.stats['rejected_queue_full'] == 1
+    assert admission.active == 0 and admission.waiting == 0
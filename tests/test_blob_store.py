@@ -0,0 +1,74 @@
+"""Uploads must be bounded images, and sweeping must only remove blobs nothing references."""
+import os
+import time
+import base64
+
+import pytest
+
+import blob_store
+from blob_store import BlobTooLarge, media_type, put_base64_blob, put_blob, sweep_blobs
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+WEBP = b'RIFF\x24\x00\x00\x00WEBPVP8 ' + b'\x00' * 64
+WAV = b'RIFF\x24\x00\x00\x00WAVEfmt ' + b'\x00' * 64
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, 'BLOB_STORE_DIR', tmp_path)
+    return tmp_path
+
+def encoded(data):
+    return base64.b64encode(data).decode('ascii')
+
+def age(key, seconds):
+    path = blob_store.blob_path(key)
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def test_media_types():
+    assert media_type(PNG) == 'image/png'
+    assert media_type(WEBP) == 'image/webp'
+    assert media_type(b'\xff\xd8\xff\xe0') == 'image/jpeg'
+    assert media_type(WAV) == 'application/octet-stream'
+
+def test_images_are_stored_once():
+    key = put_base64_blob(encoded(PNG))
+    assert put_base64_blob(encoded(PNG)) == key
+    assert blob_store.get_blob(key) == PNG
+
+@pytest.mark.parametrize('data', [WAV, b'<svg xmlns="http://www.w3.org/2000/svg"/>', b'plain text'])
+def test_non_images_are_refused(data):
+    with pytest.raises(ValueError):
+        put_base64_blob(encoded(data))
+    assert not any(blob_store.BLOB_STORE_DIR.iterdir())
+
+def test_oversized_upload_is_refused_before_decoding(monkeypatch):
+    def no_decode(*args, **kwargs):
+        raise AssertionError('decoded an oversized upload')
+    monkeypatch.setattr(blob_store.base64, 'b64decode', no_decode)
+    with pytest.raises(BlobTooLarge):
+        put_base64_blob('A' * 4000, max_bytes=1000)
+
+def test_size_cap_is_exact():
+    limit = len(PNG)
+    assert put_base64_blob(encoded(PNG), max_bytes=limit)
+    with pytest.raises(BlobTooLarge):
+        put_base64_blob(encoded(PNG + b'\x00'), max_bytes=limit)
+    assert put_base64_blob(encoded(PNG + b'\x00' * 4096), max_bytes=None)
+
+def test_sweep_removes_only_old_unreferenced_blobs():
+    kept = put_blob(PNG)
+    orphan = put_blob(PNG + b'orphan')
+    fresh = put_blob(PNG + b'fresh')
+    for key in (kept, orphan):
+        age(key, 3600)
+    assert sweep_blobs({kept}, grace_seconds=60) == 1
+    assert blob_store.find_blob(kept) and blob_store.find_blob(fresh)
+    assert blob_store.find_blob(orphan) is None
+
+def test_resaving_restarts_the_grace_period():
+    key = put_blob(PNG)
+    age(key, 3600)
+    put_blob(PNG)
+    assert sweep_blobs(set(), grace_seconds=60) == 0
+    assert blob_store.find_blob(key)
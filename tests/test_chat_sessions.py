@@ -0,0 +1,138 @@
+"""Concurrent exchanges on one chat session must all be kept, capped turns must reach the summary,
+and the next prompt must be built from the newest stored history.
+
+The scratch_db tests are skipped when no MongoDB is reachable (tests/conftest.py);
+the FakeSessions ones always run.
+"""
+import copy
+import uuid
+import asyncio
+from types import SimpleNamespace
+
+from pymongo import ReturnDocument
+from chat_sessions import (
+    CHAT_SESSION_CACHE_TTL_SECONDS, CHAT_SESSION_MAX_TURNS,
+    append_chat_turns, build_chat_messages, load_chat_session, session_cache
+)
+
+def test_concurrent_exchanges_are_all_stored(scratch_db):
+    exchanges = CHAT_SESSION_MAX_TURNS // 2 - 1
+    async def check(db):
+        session_id = f'session-{uuid.uuid4().hex}'
+        await asyncio.gather(*(
+            append_chat_turns(db, session_id, 'catherine', f'question {i}', f'answer {i}') for i in range(exchanges)
+        ))
+        return await db.chat_sessions.find_one({'session_id': session_id})
+    doc = scratch_db(check)
+    assert len(doc['turns']) == exchanges * 2
+    assert {turn['content'] for turn in doc['turns']} == (
+        {f'question {i}' for i in range(exchanges)} | {f'answer {i}' for i in range(exchanges)}
+    )
+    assert doc['summary'] == ''
+
+def test_capped_turns_are_folded_into_the_summary(scratch_db):
+    exchanges = CHAT_SESSION_MAX_TURNS // 2 + 3
+    async def check(db):
+        session_id = f'session-{uuid.uuid4().hex}'
+        await asyncio.gather(*(
+            append_chat_turns(db, session_id, 'catherine', f'question {i}.', f'answer {i}.') for i in range(exchanges)
+        ))
+        session_cache.pop(session_id, None)
+        return await load_chat_session(db, session_id)
+    session = scratch_db(check)
+    assert len(session['turns']) == CHAT_SESSION_MAX_TURNS
+    kept = {turn['content'] for turn in session['turns']}
+    summarised = {line.split(': ', 1)[1] for line in session['summary'].split('\n')}
+    # Every turn is either still stored or in the summary - none lost to a race
+    assert len(kept | summarised) == exchanges * 2
+    assert not kept & summarised
+
+class FakeSessions:
+    """Just enough of a motor collection for chat_sessions, with each reply held back by a chosen delay"""
+
+    def __init__(self, delays=()):
+        self.docs = {}
+        self.delays = list(delays)
+
+    async def _reply(self, value):
+        # The write is already applied; only the caller hearing about it is late
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        return value
+
+    @staticmethod
+    def _project(doc, projection):
+        return {key: value for key, value in doc.items() if projection.get(key)}
+
+    async def find_one(self, query, projection):
+        doc = self.docs.get(query['session_id'])
+        return self._project(doc, projection) if doc else None
+
+    async def find_one_and_update(self, query, update, projection, upsert, return_document):
+        assert upsert and return_document is ReturnDocument.BEFORE
+        doc = self.docs.get(query['session_id'])
+        before = self._project(copy.deepcopy(doc), projection) if doc else None
+        if doc is None:
+            doc = self.docs[query['session_id']] = {'session_id': query['session_id'], **update['$setOnInsert']}
+        push = update['$push']['turns']
+        doc['turns'] = (doc.get('turns', []) + push['$each'])[push['$slice']:]
+        doc.update(update['$set'])
+        doc['version'] = doc.get('version', 0) + update['$inc']['version']
+        return await self._reply(before)
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query['session_id'])
+        matched = doc is not None and doc.get('summary') == query['summary']
+        if matched:
+            doc.update(update['$set'])
+        return SimpleNamespace(matched_count=int(matched))
+
+def test_out_of_order_appends_keep_the_newest_history():
+    sessions = FakeSessions(delays=[0.05, 0])
+    db = SimpleNamespace(chat_sessions=sessions)
+    session_id = f'session-{uuid.uuid4().hex}'
+
+    async def run():
+        # The first exchange is written first but its reply arrives last
+        await asyncio.gather(
+            append_chat_turns(db, session_id, 'catherine', 'q1', 'a1'),
+            append_chat_turns(db, session_id, 'catherine', 'q2', 'a2')
+        )
+        return await load_chat_session(db, session_id)
+
+    session = asyncio.run(run())
+    stored = [turn['content'] for turn in sessions.docs[session_id]['turns']]
+    assert stored == ['q1', 'a1', 'q2', 'a2']
+    assert [turn['content'] for turn in session['turns']] == stored
+    messages = build_chat_messages('sys', session, 'q3')
+    assert [message['content'] for message in messages] == ['sys', 'q1', 'a1', 'q2', 'a2', 'q3']
+
+def test_cached_session_expires():
+    sessions = FakeSessions()
+    db = SimpleNamespace(chat_sessions=sessions)
+    session_id = f'session-{uuid.uuid4().hex}'
+    asyncio.run(append_chat_turns(db, session_id, 'catherine', 'q1', 'a1'))
+    # Another worker appends directly to Mongo
+    sessions.docs[session_id]['turns'] += [{'role': 'user', 'content': 'q2'}, {'role': 'assistant', 'content': 'a2'}]
+    sessions.docs[session_id]['version'] += 1
+    assert len(asyncio.run(load_chat_session(db, session_id))['turns']) == 2
+    session_cache.expire(session_cache.timer() + CHAT_SESSION_CACHE_TTL_SECONDS + 1)
+    assert len(asyncio.run(load_chat_session(db, session_id))['turns']) == 4
+
+def test_capped_turns_fold_into_summary_without_mongo():
+    sessions = FakeSessions()
+    db = SimpleNamespace(chat_sessions=sessions)
+    session_id = f'session-{uuid.uuid4().hex}'
+    exchanges = CHAT_SESSION_MAX_TURNS // 2 + 1
+
+    async def run():
+        for i in range(exchanges):
+            await append_chat_turns(db, session_id, 'catherine', f'question {i}.', f'answer {i}.')
+        return await load_chat_session(db, session_id)
+
+    session = asyncio.run(run())
+    assert session == {
+        'turns': sessions.docs[session_id]['turns'],
+        'summary': 'Seeker: question 0.\nGuide: answer 0.',
+        'version': exchanges
+    }
+    assert sessions.docs[session_id]['summary'] == session['summary']
@@ -0,0 +1,75 @@
+"""The one-pass routing regex must route at least as well as the substring checks it replaced.
+
+Safety triage in particular must fire on every inflection the old
+`kw in situation` checks caught ("abuser", "dangerous", ...).
+"""
+import pytest
+
+from cobbles_oracle import CARD_ROUTING_RULES, route_situation
+
+def substring_route(situation):
+    """The pre-regex matcher: safety if any trigger is a substring, else the first topic with a substring hit"""
+    text = situation.lower()
+    safety = any(kw in text for kw in CARD_ROUTING_RULES['safety_triggers']['keywords'])
+    topic = next((topic for topic, rules in CARD_ROUTING_RULES['topic_routing'].items()
+                  if any(kw in text for kw in rules['keywords'])), None)
+    return safety, topic
+
+CORPUS = [
+    'my abuser keeps calling',
+    'I was abused as a child',
+    'my ex is dangerous',
+    'he is in a dangerous mood',
+    'he keeps hitting the wall',
+    'someone has been stalking me online',
+    'I am scared to go home tonight',
+    'I am panicking about tomorrow',
+    'I feel so anxious all the time',
+    'everything is overwhelming me',
+    'my workplace is toxic',
+    'my boss takes credit for everything',
+    'I got fired yesterday',
+    'my father never listens',
+    "my sister's wedding is coming up",
+    'I cannot pay my bills this month',
+    'I am in debt and broke',
+    'my partner is distant lately',
+    'we broke up and he started ghosting me',
+    'I keep saying yes because of guilt',
+    'people pleasing is draining me',
+    'there is gossip about me at school',
+    'my dog died last week',
+    'I need a fresh start',
+    'I want revenge on him',
+    'I feel betrayed by my best friend',
+    'nothing in particular today'
+]
+
+@pytest.mark.parametrize('situation', CORPUS)
+def test_matches_substring_routing(situation):
+    safety, topic = substring_route(situation)
+    routing = route_situation(situation)
+    assert routing['safety'] == safety
+    assert (routing['topics'][0][0] if routing['topics'] else None) == topic
+
+# Where the substring checks were wrong: "rent" inside "parents", "ex" inside "exhausting"
+SUBSTRING_MISROUTES = {
+    'my parents keep fighting': 'family',
+    'people pleasing is exhausting me': 'boundaries_people_pleasing'
+}
+
+@pytest.mark.parametrize('situation,topic', SUBSTRING_MISROUTES.items())
+def test_fixes_substring_misroutes(situation, topic):
+    assert substring_route(situation)[1] != topic
+    assert route_situation(situation)['topics'][0][0] == topic
+
+@pytest.mark.parametrize('situation', ['my next exam is monday', 'I am so excited', 'can you text me the context'])
+def test_short_keywords_need_whole_words(situation):
+    assert route_situation(situation)['topics'] == []
+
+def test_short_keywords_take_plurals_and_possessives():
+    for situation in ['my exes keep texting', "my ex's new partner"]:
+        assert route_situation(situation)['topics'][0][0] == 'dating_relationships'
+
+def test_curly_apostrophes_match():
+    assert route_situation('I can’t say no to anyone')['topics'][0][0] == 'boundaries_people_pleasing'
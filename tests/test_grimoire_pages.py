@@ -0,0 +1,68 @@
+"""Grimoire cursors must round-trip, reject anything else, and page through ties without gaps or repeats."""
+import pytest
+
+from grimoire_pages import PAGE_ORDER, decode_cursor, encode_cursor, page_query
+
+def matches(doc, query):
+    """Evaluate the subset of Mongo query syntax page_query produces"""
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not doc[field] < condition['$lt']:
+                return False
+        elif doc[field] != condition:
+            return False
+    return True
+
+def walk(docs, limit):
+    """Every page of docs, the way fetch_page asks Mongo for them"""
+    pages, cursor = [], None
+    while True:
+        found = [doc for doc in docs if matches(doc, page_query({'user_id': 'u'}, cursor))]
+        for field, direction in reversed(PAGE_ORDER):
+            found.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        pages.append(found[:limit])
+        if len(found) <= limit:
+            return pages
+        cursor = encode_cursor(found[limit - 1])
+
+def test_cursor_round_trips():
+    doc = {'created_at': '2026-10-18T09:30:00.123456+00:00', 'id': '0b9c7a1e-3f1d-4d2c-9a55-6f0c1e2d3b4a'}
+    cursor = encode_cursor(doc)
+    assert '=' not in cursor and '/' not in cursor and '+' not in cursor
+    assert decode_cursor(cursor) == (doc['created_at'], doc['id'])
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', '', '!!!', encode_cursor({'created_at': 1, 'id': 'x'}),
+                                    'WzEsMl0', 'eyJhIjoxfQ'])
+def test_decode_rejects_foreign_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_page_query_without_cursor_is_unchanged():
+    assert page_query({'user_id': 'u'}) == {'user_id': 'u'}
+
+def test_page_query_breaks_ties_on_id():
+    cursor = encode_cursor({'created_at': '2026-10-18T09:00:00+00:00', 'id': 'm'})
+    query = page_query({'user_id': 'u'}, cursor)
+    assert query['$or'] == [
+        {'created_at': {'$lt': '2026-10-18T09:00:00+00:00'}},
+        {'created_at': '2026-10-18T09:00:00+00:00', 'id': {'$lt': 'm'}}
+    ]
+    same_instant = {'user_id': 'u', 'created_at': '2026-10-18T09:00:00+00:00'}
+    assert matches({**same_instant, 'id': 'a'}, query)
+    assert not matches({**same_instant, 'id': 'm'}, query)
+    assert not matches({**same_instant, 'id': 'z'}, query)
+    assert matches({'user_id': 'u', 'created_at': '2026-10-18T08:59:59+00:00', 'id': 'z'}, query)
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 10])
+def test_pages_cover_equal_timestamps_exactly_once(limit):
+    # Seven items saved in the same instant between two others
+    docs = [{'user_id': 'u', 'created_at': '2026-10-18T10:00:00+00:00', 'id': 'newest'}]
+    docs += [{'user_id': 'u', 'created_at': '2026-10-18T09:00:00+00:00', 'id': f'tie-{i}'} for i in range(7)]
+    docs += [{'user_id': 'u', 'created_at': '2026-10-18T08:00:00+00:00', 'id': 'oldest'}]
+    pages = walk(docs, limit)
+    served = [doc['id'] for page in pages for doc in page]
+    assert served == ['newest'] + [f'tie-{i}' for i in reversed(range(7))] + ['oldest']
+    assert all(len(page) <= limit for page in pages)
@@ -0,0 +1,55 @@
+"""Model replies must parse whole when they can, and keep every complete field when cut off."""
+import pytest
+
+from llm_json import parse_json_reply, repair_truncated
+
+@pytest.mark.parametrize('reply,expected', [
+    ('{"a": 1}', {'a': 1}),
+    ('Here you go:\n```json\n{"a": [1, 2]}\n```', {'a': [1, 2]}),
+    ('{"a": "b"} and some closing prose', {'a': 'b'})
+])
+def test_whole_replies_parse_unrepaired(reply, expected):
+    assert parse_json_reply(reply) == (expected, False)
+
+@pytest.mark.parametrize('text,expected', [
+    # Partial string - kept, closed where it stopped
+    ('{"a": "hello wor', {'a': 'hello wor'}),
+    # Partial array - complete items kept
+    ('{"a": [1, 2, 3', {'a': [1, 2, 3]}),
+    ('{"a": ["x", "y', {'a': ['x', 'y']}),
+    ('{"a": [{"b": 1}, {"b": 2', {'a': [{'b': 1}, {'b': 2}]}),
+    # Cut between fields
+    ('{"a": 1, "b": ', {'a': 1}),
+    ('{"a": 1, ', {'a': 1}),
+    ('{"a": 1, "b', {'a': 1}),
+    # Trailing number or literal
+    ('{"a": 12', {'a': 12}),
+    ('{"a": "x", "b": 1.5', {'a': 'x', 'b': 1.5}),
+    ('{"a": "x", "b": true', {'a': 'x', 'b': True}),
+    ('{"a": "x", "b": 1.', {'a': 'x'}),
+    ('{"a": "x", "b": tru', {'a': 'x'}),
+    ('{"a": "x", "b": -', {'a': 'x'}),
+    # Partial escape inside a string
+    ('{"a": "x\\', {'a': 'x'}),
+    ('{"a": "line\\nnext\\', {'a': 'line\nnext'}),
+    ('{"a": "caf\\u00', {'a': 'caf'}),
+    ('{"a": "caf\\u00e9', {'a': 'café'}),
+    ('{"a": "say \\"hi\\"', {'a': 'say "hi"'})
+])
+def test_truncated_replies_are_repaired(text, expected):
+    assert repair_truncated(text) == expected
+    assert parse_json_reply('Sure!\n' + text) == (expected, True)
+
+@pytest.mark.parametrize('text', ['{"a', '{', '{"a": ', '{"a": tru'])
+def test_nothing_recoverable(text):
+    assert repair_truncated(text) is None
+    with pytest.raises(ValueError):
+        parse_json_reply(text)
+
+def test_no_object_at_all():
+    with pytest.raises(ValueError):
+        parse_json_reply('I could not do that.')
+
+def test_repair_starts_at_the_object():
+    text = 'prefix {"not": "it"} {"a": "b'
+    assert repair_truncated(text, text.rindex('{')) == {'a': 'b'}
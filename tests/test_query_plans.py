@@ -0,0 +1,44 @@
+"""Hot queries must be served by an index, never a collection scan.
+
+Uses the scratch_db fixture (tests/conftest.py): skipped when no MongoDB is reachable.
+"""
+from db_indexes import HOT_QUERIES, REQUIRED_INDEXES, ensure_indexes, find_collection_scans, index_usage, plan_stages
+
+async def create_collections(db):
+    # explain() on a collection that doesn't exist reports EOF, not a scan
+    for collection in REQUIRED_INDEXES:
+        await db[collection].insert_one({'probe': True})
+
+def test_plan_stages_finds_nested_collscan():
+    plan = {'stage': 'SORT', 'inputStage': {'stage': 'OR', 'inputStages': [
+        {'stage': 'IXSCAN'}, {'stage': 'FETCH', 'inputStage': {'stage': 'COLLSCAN'}}
+    ]}}
+    assert 'COLLSCAN' in plan_stages(plan)
+
+def test_hot_queries_use_indexes(scratch_db):
+    async def check(db):
+        await create_collections(db)
+        report = await ensure_indexes(db)
+        assert report['failed'] == []
+        return await find_collection_scans(db)
+    scans = scratch_db(check)
+    assert scans == [], f'Collection scans: {scans}'
+
+def test_check_catches_unindexed_queries(scratch_db):
+    async def check(db):
+        await create_collections(db)
+        return await find_collection_scans(db)
+    assert len(scratch_db(check)) == len(HOT_QUERIES)
+
+def test_ensure_indexes_is_idempotent(scratch_db):
+    async def check(db):
+        first = await ensure_indexes(db)
+        second = await ensure_indexes(db)
+        usage = await index_usage(db)
+        return first, second, usage
+    first, second, usage = scratch_db(check)
+    declared = sum(len(specs) for specs in REQUIRED_INDEXES.values())
+    assert len(first['created']) == declared
+    assert second['created'] == [] and second['failed'] == []
+    assert second['present'] == declared
+    assert all(not report['missing'] for report in usage.values())
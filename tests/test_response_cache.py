@@ -0,0 +1,33 @@
+"""Each encoding of a cached body must carry its own ETag and revalidate only against it."""
+from starlette.requests import Request
+from response_cache import static_json_payload, serve_encoded
+
+ENTRY = static_json_payload({'items': [{'id': i, 'name': f'item {i}'} for i in range(100)]})
+
+def request(**headers):
+    return Request({
+        'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]
+    })
+
+def test_encodings_get_distinct_etags():
+    identity = serve_encoded(request(), ENTRY)
+    compressed = serve_encoded(request(accept_encoding='gzip, br'), ENTRY)
+    assert identity.body == ENTRY['body'] and 'content-encoding' not in identity.headers
+    assert compressed.body == ENTRY['gzip'] and compressed.headers['content-encoding'] == 'gzip'
+    assert identity.headers['etag'] != compressed.headers['etag']
+    assert compressed.headers['vary'] == 'Accept-Encoding'
+
+def test_revalidation_is_per_encoding():
+    identity_etag = ENTRY['etag']
+    gzip_etag = ENTRY['gzip_etag']
+    assert serve_encoded(request(if_none_match=identity_etag), ENTRY).status_code == 304
+    assert serve_encoded(request(accept_encoding='gzip', if_none_match=gzip_etag), ENTRY).status_code == 304
+    # The other encoding's tag doesn't validate - the client gets the bytes it asked for
+    assert serve_encoded(request(accept_encoding='gzip', if_none_match=identity_etag), ENTRY).status_code == 200
+    assert serve_encoded(request(if_none_match=gzip_etag), ENTRY).status_code == 200
+
+def test_gzip_refused_with_q_zero():
+    response = serve_encoded(request(accept_encoding='gzip;q=0'), ENTRY)
+    assert response.headers['etag'] == ENTRY['etag']
+    assert 'content-encoding' not in response.headers
@@ -0,0 +1,85 @@
+"""Reseeding must converge the collection on the seed, and only skip work when it already matches.
+
+Uses the scratch_db fixture (tests/conftest.py): skipped when no MongoDB is reachable.
+"""
+from seed_sync import seed_hash, sync_seed
+
+SCOPE = {'archetype_id': 'catherine'}
+SEED = [
+    {'id': 'spell-1', 'archetype_id': 'catherine', 'title': 'Witch Bottle'},
+    {'id': 'spell-2', 'archetype_id': 'catherine', 'title': 'Threshold Salt'},
+    {'id': 'spell-3', 'archetype_id': 'catherine', 'title': 'Iron Nail Ward'}
+]
+OTHER = {'id': 'spell-9', 'archetype_id': 'kathleen', 'title': 'Not in scope'}
+
+async def seeded(db):
+    return sorted([doc async for doc in db.spells.find(SCOPE, {'_id': 0})], key=lambda doc: doc['id'])
+
+def sync(db, docs, **kwargs):
+    return sync_seed(db, 'spells', docs, scope=SCOPE, name='spells:catherine', **kwargs)
+
+def test_seed_hash_ignores_key_order():
+    assert seed_hash([{'id': 'a', 'title': 'x'}]) == seed_hash([{'title': 'x', 'id': 'a'}])
+    assert seed_hash([{'id': 'a', 'title': 'x'}]) != seed_hash([{'id': 'a', 'title': 'y'}])
+
+def test_unchanged_seed_is_a_no_op(scratch_db):
+    async def check(db):
+        await db.spells.insert_one(dict(OTHER))
+        first = await sync(db, SEED)
+        second = await sync(db, SEED)
+        return first, second, await seeded(db), await db.spells.count_documents({})
+    first, second, docs, total = scratch_db(check)
+    assert first['changed'] and first['upserted'] == len(SEED)
+    assert not second['changed'] and second['upserted'] == second['modified'] == second['deleted'] == 0
+    assert docs == SEED
+    assert total == len(SEED) + 1
+
+def test_removed_document_is_deleted(scratch_db):
+    async def check(db):
+        await db.spells.insert_one(dict(OTHER))
+        await sync(db, SEED)
+        result = await sync(db, SEED[:2])
+        return result, await seeded(db), await db.spells.find_one({'id': OTHER['id']})
+    result, docs, other = scratch_db(check)
+    assert result['deleted'] == 1
+    assert docs == SEED[:2]
+    assert other is not None
+
+def test_edited_document_is_rewritten(scratch_db):
+    async def check(db):
+        await sync(db, SEED)
+        edited = [SEED[0], {**SEED[1], 'title': 'Threshold Salt (revised)'}, SEED[2]]
+        return await sync(db, edited), await seeded(db), edited
+    result, docs, edited = scratch_db(check)
+    assert result['modified'] == 1 and result['upserted'] == 0
+    assert docs == edited
+
+def test_wiped_collection_is_restored(scratch_db):
+    async def check(db):
+        await sync(db, SEED)
+        await db.spells.delete_many({})
+        return await sync(db, SEED), await seeded(db)
+    result, docs = scratch_db(check)
+    assert result['changed'] and result['upserted'] == len(SEED)
+    assert docs == SEED
+
+def test_stray_document_in_scope_is_removed(scratch_db):
+    async def check(db):
+        await sync(db, SEED)
+        await db.spells.insert_one({'id': 'spell-4', 'archetype_id': 'catherine', 'title': 'Added by hand'})
+        return await sync(db, SEED), await seeded(db)
+    result, docs = scratch_db(check)
+    assert result['deleted'] == 1
+    assert docs == SEED
+
+def test_force_rewrites_when_manifest_matches(scratch_db):
+    async def check(db):
+        await sync(db, SEED)
+        await db.spells.update_one({'id': 'spell-1'}, {'$set': {'title': 'Edited by hand'}})
+        skipped = await sync(db, SEED)
+        forced = await sync(db, SEED, force=True)
+        return skipped, forced, await seeded(db)
+    skipped, forced, docs = scratch_db(check)
+    assert not skipped['changed']
+    assert forced['modified'] == 1
+    assert docs == SEED
@@ -0,0 +1,21 @@
+"""Spell budgets must follow the list caps the prompt asks for, and stay inside the spell profile's ceiling."""
+from llm_gateway import FEATURE_PROFILES
+from spell_prompts import build_personalization_context
+from token_budget import SPELL_DEFAULT_BUDGET, SPELL_LENGTHS, spell_output_budget
+
+def test_budgets_grow_with_time_and_stay_under_the_ceiling():
+    budgets = [spell_output_budget({'time': time}) for time in ('quick', 'medium', 'deep', 'extended')]
+    assert budgets == sorted(budgets)
+    assert budgets[-1] <= FEATURE_PROFILES['spell']['max_tokens']
+
+def test_uncapped_spells_get_the_full_budget():
+    assert spell_output_budget(None) == spell_output_budget({'time': 'whenever'}) == SPELL_DEFAULT_BUDGET
+    assert SPELL_DEFAULT_BUDGET == FEATURE_PROFILES['spell']['max_tokens']
+
+def test_prompt_states_the_caps_the_budget_assumes():
+    for time, lengths in SPELL_LENGTHS.items():
+        prompt = build_personalization_context({'time': time})
+        assert f"steps at most {lengths['steps']}" in prompt
+        assert f"materials at most {lengths['materials']}" in prompt
+        assert 'closing_message' in prompt and 'image_prompt' in prompt
+    assert 'LENGTH LIMITS' not in build_personalization_context({'style': 'vocal'})